@@ -0,0 +1,102 @@
+"""
+Measure the throughput of the segmented AES-GCM file encryption in GB/s.
+
+Example (from the repository root):
+    python benchmarks/bench_encryption.py --size-mb 512
+    python benchmarks/bench_encryption.py --input data/UNSW-NB15_1.csv
+
+Encrypts and decrypts a file (random data of --size-mb by default) with 1, 2, 4, ...
+threads up to --max-workers for every segment size, and compares with the
+single-blob encrypt_data call. Files are written to --tmp-dir, so use a RAM disk
+(e.g. /dev/shm) to measure the cipher rather than the storage. Also reports the
+latency of reading a few random 4 KiB ranges through EncryptedFile.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from security import encrypt_data, encrypt_file, decrypt_file, EncryptedFile  # noqa: E402
+
+
+def _worker_counts(max_workers):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def _best(function, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="File to encrypt (random data is generated if omitted)")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the generated data")
+    parser.add_argument("--segment-kb", type=int, nargs="+", default=[64, 1024, 4096])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is reported)")
+    parser.add_argument("--tmp-dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    # security configures INFO logging on import; keep the per-file messages out of the table.
+    logging.getLogger().setLevel(logging.WARNING)
+    key = os.urandom(32)
+    work_dir = tempfile.mkdtemp(dir=args.tmp_dir)
+    source = args.input
+    if source is None:
+        source = os.path.join(work_dir, "plain.bin")
+        with open(source, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1 << 20))
+    size = os.path.getsize(source)
+    encrypted, decrypted = os.path.join(work_dir, "data.enc"), os.path.join(work_dir, "data.dec")
+    gb = size / 1e9
+
+    try:
+        with open(source, "rb") as f:
+            blob = f.read()
+        single = _best(lambda: encrypt_data(blob, key), args.repeat)
+        del blob
+        print(f"encrypt_data (one blob, {size / 1e6:.0f} MB): {gb / single:.2f} GB/s")
+
+        print(f"{'segment KB':>10} {'workers':>8} {'encrypt GB/s':>13} {'decrypt GB/s':>13}")
+        for segment_kb in args.segment_kb:
+            for workers in _worker_counts(args.max_workers):
+                enc = _best(lambda: encrypt_file(source, encrypted, key, segment_size=segment_kb << 10,
+                                                 workers=workers), args.repeat)
+                dec = _best(lambda: decrypt_file(encrypted, decrypted, key, workers=workers), args.repeat)
+                print(f"{segment_kb:>10} {workers:>8} {gb / enc:>13.2f} {gb / dec:>13.2f}")
+
+            rng = random.Random(0)
+            with EncryptedFile(encrypted, key) as f:
+                offsets = [rng.randrange(max(f.size - 4096, 1)) for _ in range(100)]
+
+                def random_reads():
+                    for offset in offsets:
+                        f.seek(offset)
+                        f.read(4096)
+                latency = _best(random_reads, args.repeat) / len(offsets)
+            print(f"{segment_kb:>10} random 4 KiB read: {latency * 1e6:.0f} us")
+    finally:
+        for path in (encrypted, decrypted, os.path.join(work_dir, "plain.bin")):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare sklearn predict with the compiled forest predictor across batch sizes.
+
+Example (from the repository root):
+    python benchmarks/bench_inference.py data/UNSW_NB15_training-set.csv \
+        data/UNSW_NB15_testing-set.csv data/NUSW-NB15_features.csv
+
+A RandomForest is trained with the default engine of train_predictive_model
+(cross-validation disabled), compiled with compile_model, and both predictors
+score batches of 1, 10, 100, ... up to --max-batch rows drawn from the testing
+set. Predictions are checked for equality before timing. Reported numbers are
+the median per-call latency and the matching rows/sec.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from schema import load_feature_schema  # noqa: E402
+from column_cache import read_csv_cached  # noqa: E402
+from modeling import train_predictive_model, BASELINE_FEATURES  # noqa: E402
+from compiled_model import compile_model  # noqa: E402
+
+
+def _median_latency(predict, batch, min_time=0.5, max_calls=1000):
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 3 or (time.perf_counter() < deadline and len(timings) < max_calls):
+        start = time.perf_counter()
+        predict(batch)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("train", help="Training set CSV")
+    parser.add_argument("test", help="Testing set CSV")
+    parser.add_argument("features", help="Features CSV")
+    parser.add_argument("--max-batch", type=int, default=100_000)
+    parser.add_argument("--n-jobs", type=int, default=1, help="Cores used by sklearn predict")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    schema = load_feature_schema(args.features)
+    columns = BASELINE_FEATURES + ["attack_cat"]
+    df_train = read_csv_cached(args.train, columns=columns, schema=schema)
+    df_test = read_csv_cached(args.test, columns=columns, schema=schema)
+    model = train_predictive_model(df_train, cv=0, n_jobs=args.n_jobs)
+    if model is None:
+        sys.exit("Training failed (see log).")
+    compiled = compile_model(model)
+
+    X_test = df_test[BASELINE_FEATURES]
+    # Repeat the testing set if it is smaller than the largest batch.
+    repeats = -(-args.max_batch // len(X_test))
+    X_pool = X_test.iloc[np.tile(np.arange(len(X_test)), repeats)[:args.max_batch]].reset_index(drop=True)
+    if not np.array_equal(compiled.predict(X_pool), model.predict(X_pool)):
+        sys.exit("Compiled predictions differ from model.predict.")
+
+    print(f"{'batch':>8} {'sklearn ms':>11} {'compiled ms':>12} {'sklearn rows/s':>15} "
+          f"{'compiled rows/s':>16} {'speedup':>8}")
+    batch = 1
+    while batch <= args.max_batch:
+        X = X_pool.iloc[:batch]
+        reference = _median_latency(model.predict, X)
+        fast = _median_latency(compiled.predict, X)
+        print(f"{batch:>8} {reference * 1e3:>11.3f} {fast * 1e3:>12.3f} {batch / reference:>15,.0f} "
+              f"{batch / fast:>16,.0f} {reference / fast:>7.1f}x")
+        batch *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measure how multi-file ingestion scales with the number of worker processes.
+
+Example (from the repository root):
+    python benchmarks/bench_ingest.py "data/UNSW-NB15_*.csv" data/NUSW-NB15_GT.csv \
+        data/NUSW-NB15_features.csv --max-workers 32
+
+Each configuration runs load_and_merge_data with 1, 2, 4, ... workers up to
+--max-workers. The main files are split into byte ranges, so parsing, typing and
+joining scale past the number of files. By default the ground truth cache is warmed
+first; pass --cold to delete the caches before every run.
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from column_cache import CACHE_DIRNAME  # noqa: E402
+from data_processing import load_and_merge_data  # noqa: E402
+from parallel_ingest import resolve_input_files  # noqa: E402
+
+
+def _worker_counts(max_workers):
+    counts, n = [], 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def _clear_caches(paths):
+    for directory in {os.path.join(os.path.dirname(os.path.abspath(p)), CACHE_DIRNAME) for p in paths}:
+        for path in glob.glob(os.path.join(directory, "*.parquet")):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("main", nargs="+", help="Main dataset files or glob patterns")
+    parser.add_argument("gt", help="Ground truth CSV")
+    parser.add_argument("features", help="Features CSV")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is reported)")
+    parser.add_argument("--cold", action="store_true", help="Rebuild the columnar caches for every run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    paths = resolve_input_files(args.main)
+    if not args.cold:
+        load_and_merge_data(paths, args.gt, args.features)
+
+    print(f"{'workers':>8} {'rows':>12} {'best s':>10} {'speedup':>8}")
+    baseline = None
+    for workers in _worker_counts(args.max_workers):
+        best, rows = float("inf"), 0
+        for _ in range(args.repeat):
+            if args.cold:
+                _clear_caches(paths + [args.gt])
+            start = time.perf_counter()
+            df = load_and_merge_data(paths, args.gt, args.features, n_workers=workers)
+            best = min(best, time.perf_counter() - start)
+            rows = len(df)
+        baseline = baseline or best
+        print(f"{workers:>8} {rows:>12} {best:>10.2f} {baseline / best:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare the model engines on the UNSW-NB15 training/testing split.
+
+Example (from the repository root):
+    python benchmarks/bench_models.py data/UNSW_NB15_training-set.csv \
+        data/UNSW_NB15_testing-set.csv data/NUSW-NB15_features.csv
+
+For every engine this reports the fit time (cross-validation disabled, so only the
+final fit is timed), prediction throughput on the testing set, the size of the
+pickled model and the test accuracy.
+"""
+import os
+import sys
+import time
+import pickle
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from sklearn.metrics import accuracy_score  # noqa: E402
+from schema import load_feature_schema  # noqa: E402
+from column_cache import read_csv_cached  # noqa: E402
+from modeling import train_predictive_model, select_feature_columns, DEFAULT_PARAM_GRIDS, TARGET  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("train", help="Training set CSV")
+    parser.add_argument("test", help="Testing set CSV")
+    parser.add_argument("features", help="Features CSV")
+    parser.add_argument("--engines", nargs="+", default=list(DEFAULT_PARAM_GRIDS))
+    parser.add_argument("--repeat", type=int, default=3, help="Prediction runs per engine (best is reported)")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    schema = load_feature_schema(args.features)
+    df_train = read_csv_cached(args.train, schema=schema)
+    df_test = read_csv_cached(args.test, schema=schema)
+
+    print(f"{'engine':>24} {'features':>8} {'fit s':>8} {'predict rows/s':>15} {'size MB':>8} {'accuracy':>9}")
+    for engine in args.engines:
+        categorical, numeric = select_feature_columns(df_train, engine)
+        start = time.perf_counter()
+        model = train_predictive_model(df_train, cv=0, n_jobs=args.n_jobs, engine=engine)
+        fit_time = time.perf_counter() - start
+        if model is None:
+            print(f"{engine:>24} failed (see log)")
+            continue
+
+        X_test = df_test[categorical + numeric]
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            y_pred = model.predict(X_test)
+            best = min(best, time.perf_counter() - start)
+        size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6
+        accuracy = accuracy_score(df_test[TARGET], y_pred)
+        print(f"{engine:>24} {len(categorical) + len(numeric):>8} {fit_time:>8.2f} "
+              f"{len(X_test) / best:>15,.0f} {size:>8.1f} {accuracy:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measure IP pseudonymization on a large flow-sized frame.
+
+Example (from the repository root):
+    python benchmarks/bench_pseudonymize.py --rows 2500000 --distinct 50000
+
+Builds srcip/dstip columns of --rows rows drawn from --distinct addresses (with a
+few non-IPv4 placeholders), then times pseudonymize_ips on the string columns and
+on the uint32 columns produced by compact_dtypes. The per-value encrypt_data
+approach is timed on a sample and extrapolated for comparison.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from schema import format_ipv4  # noqa: E402
+from security import encrypt_data  # noqa: E402
+from pseudonymize import IPPseudonymizer, pseudonymize_ips  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_500_000)
+    parser.add_argument("--distinct", type=int, default=50_000, help="Distinct addresses per column")
+    parser.add_argument("--sample", type=int, default=20_000, help="Values timed with encrypt_data")
+    args = parser.parse_args()
+
+    # security configures INFO logging on import; keep the per-call messages out of the table.
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    key = os.urandom(32)
+    pool = rng.integers(0, 2 ** 32, size=args.distinct, dtype=np.uint64).astype(np.uint32)
+    packed = pd.DataFrame({col: pool[rng.integers(0, args.distinct, size=args.rows)] for col in ("srcip", "dstip")})
+    text = pd.DataFrame({col: format_ipv4(packed[col].to_numpy()) for col in packed.columns})
+    text.loc[::997, "srcip"] = "-"
+
+    start = time.perf_counter()
+    for value in text["srcip"].head(args.sample):
+        encrypt_data(value.encode(), key)
+    per_value = (time.perf_counter() - start) / args.sample
+    print(f"encrypt_data per value: {per_value * 2 * args.rows:8.2f} s (extrapolated to {2 * args.rows:,} values)")
+
+    for label, frame in (("strings", text), ("uint32", packed)):
+        start = time.perf_counter()
+        pseudonymize_ips(frame, pseudonymizer=IPPseudonymizer(key))
+        print(f"pseudonymize_ips ({label}):{time.perf_counter() - start:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Load-test the /score endpoint with and without micro-batching.
+
+Example (from the repository root):
+    python benchmarks/bench_scoring.py data/UNSW_NB15_training-set.csv \
+        data/NUSW-NB15_features.csv --concurrency 1 8 32 --latency-ms 0 2 5
+
+A model is trained with train_predictive_model (cross-validation disabled) and
+served by a threaded Flask server in a separate process. Client threads keep
+sending requests of --records flows each over keep-alive connections for
+--duration seconds. For every (max latency, concurrency) pair this reports
+requests/s, flows/s, latency percentiles and the mean number of flows per
+predict call. --latency-ms 0 flushes immediately, i.e. no batching beyond
+requests that are already queued.
+"""
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import http.client
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from schema import load_feature_schema  # noqa: E402
+from column_cache import read_csv_cached  # noqa: E402
+from modeling import train_predictive_model, BASELINE_FEATURES, TARGET  # noqa: E402
+from scoring import register_scoring_endpoint, NPY_CONTENT_TYPE, SCORE_ROUTE  # noqa: E402
+
+
+def _serve(model, schema, port, max_batch_size, max_latency_ms, ready):
+    from flask import Flask, jsonify
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app = Flask("bench_scoring")
+    batcher = register_scoring_endpoint(app, model, schema, max_batch_size=max_batch_size,
+                                        max_latency_ms=max_latency_ms)
+    app.add_url_rule("/stats", "stats", lambda: jsonify(batches=batcher.batches, rows=batcher.rows))
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+def _client(port, body, content_type, deadline, latencies, errors):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Content-Type": content_type}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        connection.request("POST", SCORE_ROUTE, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(response.status)
+    connection.close()
+
+
+def _stats(port):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", "/stats")
+    return json.loads(connection.getresponse().read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("train", help="Training set CSV")
+    parser.add_argument("features", help="Features CSV")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    parser.add_argument("--max-batch-size", type=int, default=1024)
+    parser.add_argument("--records", type=int, default=1, help="Flows per request")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per configuration")
+    parser.add_argument("--binary", action="store_true", help="Send np.save payloads instead of JSON")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    schema = load_feature_schema(args.features)
+    df_train = read_csv_cached(args.train, columns=BASELINE_FEATURES + [TARGET], schema=schema)
+    model = train_predictive_model(df_train, cv=0)
+    if model is None:
+        sys.exit("Training failed (see log).")
+
+    sample = df_train[BASELINE_FEATURES].head(args.records)
+    if args.binary:
+        buffer = io.BytesIO()
+        np.save(buffer, sample.to_numpy(dtype=np.float64))
+        body, content_type = buffer.getvalue(), NPY_CONTENT_TYPE
+    else:
+        body, content_type = json.dumps(sample.to_dict(orient="records")).encode(), "application/json"
+
+    print(f"{'latency ms':>10} {'clients':>8} {'req/s':>9} {'flows/s':>10} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'flows/batch':>12} {'errors':>7}")
+    for latency_ms in args.latency_ms:
+        for concurrency in args.concurrency:
+            ready = multiprocessing.Event()
+            server = multiprocessing.Process(
+                target=_serve, args=(model, schema, args.port, args.max_batch_size, latency_ms, ready), daemon=True)
+            server.start()
+            ready.wait(30)
+            latencies, errors = [], []
+            deadline = time.perf_counter() + args.duration
+            clients = [threading.Thread(target=_client,
+                                        args=(args.port, body, content_type, deadline, latencies, errors))
+                       for _ in range(concurrency)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            stats = _stats(args.port)
+            server.terminate()
+            server.join()
+
+            timings = np.array(latencies) * 1e3 if latencies else np.zeros(1)
+            p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+            per_batch = stats["rows"] / stats["batches"] if stats["batches"] else 0.0
+            print(f"{latency_ms:>10.1f} {concurrency:>8} {len(latencies) / args.duration:>9,.0f} "
+                  f"{len(latencies) * args.records / args.duration:>10,.0f} {p50:>8.2f} {p95:>8.2f} "
+                  f"{p99:>8.2f} {per_batch:>12.1f} {len(errors):>7}")
+
+
+if __name__ == "__main__":
+    main()
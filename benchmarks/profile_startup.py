@@ -0,0 +1,158 @@
+"""
+Profile the cold start of the dashboard server: imports, initialization and first page.
+
+Example (from the repository root):
+    python benchmarks/profile_startup.py
+    python benchmarks/profile_startup.py --target wsgi --top 30
+    python benchmarks/profile_startup.py --env STARTUP_SNAPSHOT=off
+
+A fresh interpreter is started in the modules directory with -X importtime and
+PIPELINE_METRICS=1. It imports the target module, calls its create_app(), requests
+the dashboard page and then the first chart callback through the Flask test client.
+The report lists:
+
+  - the wall time of each phase and the time to the first served page and charts,
+    measured from before the interpreter was launched;
+  - import time per repository module (cumulative, including what it pulls in) and
+    per third-party package (self time summed over its submodules);
+  - the initialization stages recorded by instrumentation.stage during create_app
+    (snapshot loading, dashboard construction, CSV loads, training, ...).
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules")
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+STAGE_LINE = re.compile(r"stage (\{.*\})\s*$")
+
+CHILD = r"""
+import sys, time, json, logging, importlib
+start = time.perf_counter()
+logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+target = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+app = target.create_app()
+created = time.perf_counter()
+if app is None:
+    sys.exit("create_app() returned None")
+client = app.server.test_client()
+page = client.get("/")
+first_page = time.perf_counter()
+deps = [d for d in client.get("/_dash-dependencies").get_json() if "time-series-chart" in d["output"]]
+status = None
+if deps:
+    deps = deps[0]
+    outputs = [{"id": o.split(".")[0], "property": o.split(".")[1]} for o in deps["output"].strip(".").split("...")]
+    body = {"output": deps["output"], "outputs": outputs, "inputs": [dict(i, value=None) for i in deps["inputs"]],
+            "state": [], "changedPropIds": []}
+    status = client.post("/_dash-update-component", json=body).status_code
+charts = time.perf_counter()
+print(json.dumps({"imports": imported - start, "create_app": created - imported, "first_page": first_page - created,
+                  "first_charts": charts - first_page, "page_status": page.status_code, "charts_status": status}))
+"""
+
+
+def parse_importtime(text):
+    """
+    Parse the stderr of `python -X importtime`.
+
+    Returns:
+        list: (module, self seconds, cumulative seconds, nesting depth) per imported module.
+    """
+    entries = []
+    for line in text.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6,
+                            len(match.group(3)) // 2))
+    return entries
+
+
+def parse_stages(text):
+    """Return the stage records logged by instrumentation (one JSON object per finished stage)."""
+    stages = []
+    for line in text.splitlines():
+        match = STAGE_LINE.search(line)
+        if match:
+            try:
+                stages.append(json.loads(match.group(1)))
+            except ValueError:
+                pass
+    return stages
+
+
+def profile(target="main", env=None):
+    """
+    Run the cold start in a fresh interpreter.
+
+    Returns:
+        dict: Phase timings ("phases"), parsed imports ("imports") and stages ("stages").
+    """
+    child_env = dict(os.environ, PIPELINE_METRICS="1", PYTHONDONTWRITEBYTECODE="1", **(env or {}))
+    launched = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, target], cwd=MODULES_DIR,
+                            env=child_env, capture_output=True, text=True)
+    finished = time.perf_counter()
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed (exit {result.returncode}):\n{result.stderr[-4000:]}")
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    phases["process"] = finished - launched
+    return {"phases": phases, "imports": parse_importtime(result.stderr), "stages": parse_stages(result.stderr)}
+
+
+def _package_self_times(imports):
+    totals = defaultdict(float)
+    for module, self_seconds, _, _ in imports:
+        totals[module.split(".")[0]] += self_seconds
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="main", help="Module providing create_app() (main or wsgi)")
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra environment variables")
+    parser.add_argument("--top", type=int, default=15, help="Packages listed in the import report")
+    parser.add_argument("--json", help="Also write the raw profile to this file")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    report = profile(args.target, env)
+    phases = report["phases"]
+
+    print("Phases (s):")
+    for name in ("imports", "create_app", "first_page", "first_charts"):
+        print(f"  {name:<24} {phases[name]:>8.3f}")
+    # Interpreter start-up and shutdown: whatever the process took beyond the measured phases.
+    measured = phases["imports"] + phases["create_app"] + phases["first_page"] + phases["first_charts"]
+    print(f"  {'interpreter + teardown':<24} {phases['process'] - measured:>8.3f}")
+    print(f"  {'process total':<24} {phases['process']:>8.3f}")
+    print(f"  first page HTTP {phases['page_status']}, charts HTTP {phases['charts_status']}")
+
+    repo_modules = {name[:-3] for name in os.listdir(MODULES_DIR) if name.endswith(".py")}
+    print("\nRepository modules (cumulative import s):")
+    for module, _, cumulative, _ in sorted((e for e in report["imports"] if e[0] in repo_modules),
+                                           key=lambda e: -e[2]):
+        print(f"  {module:<24} {cumulative:>8.3f}")
+    print(f"\nPackages (self import s, top {args.top}):")
+    for package, seconds in _package_self_times(report["imports"])[:args.top]:
+        print(f"  {package:<24} {seconds:>8.3f}")
+    print("\nInitialization stages (s):")
+    for record in report["stages"]:
+        labels = ", ".join(f"{k}={v}" for k, v in record.items()
+                           if k not in ("stage", "seconds", "rows", "rows_per_second", "peak_rss_mb", "rss_mb", "rss_delta_mb",
+                                        "process_peak_rss_mb"))
+        print(f"  {record['stage']:<12} {record['seconds']:>8.3f}  {labels}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Run the pipeline benchmarks on a synthetic dataset and record the results.
+
+Example (from the repository root):
+    python benchmarks/run_benchmarks.py --rows 1M
+    python benchmarks/run_benchmarks.py --rows 10M --only load_and_merge_data update_charts
+
+The dataset is generated with benchmarks/synthetic.py on first use and reused by
+later runs with the same --rows, --files and --seed. The suite times:
+
+    load_and_merge_data.cold      CSV parsing, typing and the ground truth join (column caches removed)
+    load_and_merge_data.warm      the same with the columnar caches in place
+    train_predictive_model        final fit on the training set (cross-validation disabled)
+    exploratory_data_analysis     describe() and plots of the merged dataset
+    run_eda                       streaming EDA report over the main files (report cache removed)
+    build_dashboard               dashboard store and index construction
+    update_charts.cold            filter callback, first request for a filter state (per request)
+    update_charts.cached          the same filter states again (per request)
+
+Every benchmark runs --repeat times. Results are written to --results-dir as one
+JSON file per run, together with the git revision and library versions, and
+compared with the previous run on the same dataset (or --baseline); medians that
+got slower by more than --threshold are reported as regressions.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import logging
+import argparse
+import datetime
+import subprocess
+import statistics
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "modules"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from synthetic import write_dataset, dataset_paths, parse_rows  # noqa: E402
+from schema import load_feature_schema  # noqa: E402
+from column_cache import read_csv_cached, CACHE_DIRNAME  # noqa: E402
+from data_processing import load_and_merge_data, exploratory_data_analysis  # noqa: E402
+from modeling import train_predictive_model  # noqa: E402
+from eda import run_eda  # noqa: E402
+from dashboard import build_dashboard  # noqa: E402
+
+BENCHMARKS = ["load_and_merge_data", "train_predictive_model", "exploratory_data_analysis", "run_eda",
+              "update_charts"]
+DEFAULT_DATA_DIR = os.path.join(BENCHMARKS_DIR, "..", "data", "synthetic")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+# Values per filter column requested from the dashboard by the update_charts benchmark.
+FILTER_VALUES = 5
+
+
+def _clear_caches(directory):
+    for path in glob.glob(os.path.join(directory, CACHE_DIRNAME, "*")):
+        os.remove(path)
+
+
+def _time(function, repeat, setup=None):
+    """Run function repeat times; returns (seconds per run, last result)."""
+    seconds, result = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return seconds, result
+
+
+def _summary(seconds, rows=None):
+    summary = {"runs": len(seconds), "best": min(seconds), "median": statistics.median(seconds),
+               "p95": sorted(seconds)[max(0, int(round(0.95 * len(seconds))) - 1)], "seconds": seconds}
+    if rows:
+        summary["rows"] = rows
+        summary["rows_per_second"] = rows / summary["median"] if summary["median"] else None
+    return summary
+
+
+def _filter_states(df, deps):
+    """Callback inputs for a sequence of filter states: no filters, then single selections."""
+    inputs = [dict(item, value=None) for item in deps["inputs"]]
+    states = [inputs]
+    for i, item in enumerate(deps["inputs"]):
+        column = item["id"][:-len("-filter")] if item["id"].endswith("-filter") else None
+        if column is None or column not in df.columns:
+            continue
+        for value in df[column].value_counts().index[:FILTER_VALUES]:
+            state = [dict(entry) for entry in inputs]
+            state[i]["value"] = [value.item() if hasattr(value, "item") else value]
+            states.append(state)
+    return states
+
+
+def _callback_body(deps, inputs):
+    outputs = [{"id": output.split(".")[0], "property": output.split(".")[1]}
+               for output in deps["output"].strip(".").split("...")]
+    changed = [f"{item['id']}.{item['property']}" for item in inputs if item["value"] is not None]
+    return {"output": deps["output"], "outputs": outputs, "inputs": inputs, "state": [],
+            "changedPropIds": changed}
+
+
+def bench_update_charts(df, repeat):
+    """Time dashboard construction and the filter callback through the Dash HTTP endpoint."""
+    build, cold, cached = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        app = build_dashboard(df)
+        build.append(time.perf_counter() - start)
+        client = app.server.test_client()
+        client.get("/")
+        deps = [d for d in client.get("/_dash-dependencies").get_json() if "time-series-chart" in d["output"]][0]
+        bodies = [_callback_body(deps, inputs) for inputs in _filter_states(df, deps)]
+        for timings in (cold, cached):
+            for body in bodies:
+                start = time.perf_counter()
+                response = client.post("/_dash-update-component", json=body)
+                timings.append(time.perf_counter() - start)
+                if response.status_code not in (200, 204):
+                    raise RuntimeError(f"update_charts returned HTTP {response.status_code}")
+    return {"build_dashboard": _summary(build, len(df)), "update_charts.cold": _summary(cold),
+            "update_charts.cached": _summary(cached)}
+
+
+def run_suite(paths, repeat, only=None):
+    """
+    Run the benchmarks on a dataset written by synthetic.write_dataset.
+
+    Returns:
+        dict: Benchmark name -> timing summary (seconds per run, median, best, p95, rows/s).
+    """
+    only = set(only or BENCHMARKS)
+    data_dir = os.path.dirname(paths["gt"])
+    schema = load_feature_schema(paths["features"])
+    results = {}
+    df_merged = None
+
+    if "load_and_merge_data" in only or "exploratory_data_analysis" in only:
+        load = lambda: load_and_merge_data(paths["main"], paths["gt"], paths["features"])  # noqa: E731
+        if "load_and_merge_data" in only:
+            seconds, df_merged = _time(load, repeat, setup=lambda: _clear_caches(data_dir))
+            results["load_and_merge_data.cold"] = _summary(seconds, len(df_merged))
+        seconds, df_merged = _time(load, repeat)
+        if "load_and_merge_data" in only:
+            results["load_and_merge_data.warm"] = _summary(seconds, len(df_merged))
+        if df_merged.empty:
+            raise RuntimeError("load_and_merge_data returned no rows (see log).")
+
+    if "exploratory_data_analysis" in only:
+        seconds, _ = _time(lambda: exploratory_data_analysis(df_merged), repeat)
+        results["exploratory_data_analysis"] = _summary(seconds, len(df_merged))
+
+    if "run_eda" in only:
+        reports = os.path.join(data_dir, CACHE_DIRNAME, "*.eda.*.json")
+        seconds, report = _time(lambda: run_eda(paths["main"], schema, header=None, names=list(schema)), repeat,
+                                setup=lambda: [os.remove(p) for p in glob.glob(reports)])
+        results["run_eda"] = _summary(seconds, report["rows"] if report else None)
+
+    if "train_predictive_model" in only or "update_charts" in only:
+        df_train = read_csv_cached(paths["train"], schema=schema)
+        if "train_predictive_model" in only:
+            seconds, model = _time(lambda: train_predictive_model(df_train, cv=0), repeat)
+            if model is None:
+                raise RuntimeError("train_predictive_model failed (see log).")
+            results["train_predictive_model"] = _summary(seconds, len(df_train))
+        if "update_charts" in only:
+            results.update(bench_update_charts(df_train, repeat))
+    return results
+
+
+def _environment():
+    import numpy
+    import pandas
+    import sklearn
+    import dash
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {"git_revision": revision, "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numpy": numpy.__version__, "pandas": pandas.__version__,
+            "sklearn": sklearn.__version__, "dash": dash.__version__}
+
+
+def _previous_result(results_dir, dataset, exclude=None):
+    """Most recent result file recorded on the same dataset."""
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json")), reverse=True):
+        if path == exclude:
+            continue
+        with open(path) as f:
+            previous = json.load(f)
+        if previous.get("dataset") == dataset:
+            return path, previous
+    return None, None
+
+
+def compare(current, baseline, threshold):
+    """
+    Compare the medians of two result sets.
+
+    Returns:
+        list: (benchmark, baseline median, current median, ratio, regressed) tuples.
+    """
+    rows = []
+    for name, summary in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        ratio = summary["median"] / before["median"] if before["median"] else float("inf")
+        rows.append((name, before["median"], summary["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("1M"), help="Main dataset rows (100k-100M)")
+    parser.add_argument("--files", type=int, default=4, help="Main dataset files")
+    parser.add_argument("--train-rows", type=parse_rows, help="Training set rows (default: min(rows, 2M))")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where synthetic datasets are kept")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark")
+    parser.add_argument("--baseline", help="Result file to compare with (default: previous run on this dataset)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    dataset = {"rows": args.rows, "files": args.files, "train_rows": args.train_rows, "seed": args.seed}
+    name = f"{args.rows}-f{args.files}-t{args.train_rows or 'default'}-s{args.seed}"
+    data_dir = os.path.join(args.data_dir, name)
+    paths = dataset_paths(data_dir, args.files)
+    if not all(os.path.exists(p) for p in paths["main"] + [paths["gt"], paths["train"], paths["features"]]):
+        print(f"Generating {args.rows:,} rows in {data_dir} ...")
+        write_dataset(data_dir, args.rows, args.files, train_rows=args.train_rows, seed=args.seed)
+
+    current = {"dataset": dataset, "started": datetime.datetime.now().isoformat(timespec="seconds"),
+               "environment": _environment(), "results": run_suite(paths, args.repeat, args.only)}
+    os.makedirs(args.results_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    result_path = os.path.join(args.results_dir, f"{stamp}-{name}.json")
+    with open(result_path, "w") as f:
+        json.dump(current, f, indent=2)
+
+    if args.baseline:
+        baseline_path = args.baseline
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    else:
+        baseline_path, baseline = _previous_result(args.results_dir, dataset, exclude=result_path)
+
+    print(f"{'benchmark':>28} {'median s':>10} {'best s':>10} {'p95 s':>10} {'rows/s':>12}")
+    for bench, summary in current["results"].items():
+        rate = f"{summary['rows_per_second']:>12,.0f}" if summary.get("rows_per_second") else f"{'':>12}"
+        print(f"{bench:>28} {summary['median']:>10.4f} {summary['best']:>10.4f} {summary['p95']:>10.4f} {rate}")
+    print(f"Results written to {result_path}")
+
+    if baseline is None:
+        return
+    print(f"\nCompared with {baseline_path} ({baseline['environment'].get('git_revision')}):")
+    print(f"{'benchmark':>28} {'before s':>10} {'now s':>10} {'ratio':>7}")
+    regressions = 0
+    for bench, before, now, ratio, regressed in compare(current, baseline, args.threshold):
+        regressions += regressed
+        print(f"{bench:>28} {before:>10.4f} {now:>10.4f} {ratio:>6.2f}x{'  REGRESSION' if regressed else ''}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
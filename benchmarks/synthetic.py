@@ -0,0 +1,334 @@
+"""
+Generate a synthetic UNSW-NB15 dataset for benchmarking.
+
+Example (from the repository root):
+    python benchmarks/synthetic.py data/synthetic --rows 10M --files 4
+
+The column names, order and types come from NUSW-NB15_features.csv, so the output
+goes through the same loaders as the real captures:
+
+    UNSW-NB15_<i>.csv               main flow records, no header (load_and_merge_data)
+    NUSW-NB15_GT.csv                ground truth of the attack flows, joinable on the 5-tuple
+    UNSW_NB15_training-set.csv      labelled flows with normalized column names (main.py)
+    UNSW_NB15_testing-set.csv
+    NUSW-NB15_features.csv          copy of the features file
+
+Nominal columns follow the skew of the real captures: a few protocols, services and
+states dominate with a long tail of rare values, about 87% of the flows are normal
+traffic, attackers and victims come from the testbed address ranges and attack flows
+have shifted size and packet distributions. Counters are log-normal and start times
+increase through the capture. Like the real captures, a share of the values is dirty
+(--dirty, 0.1% by default): hex and '-' ports, blank ct_ftp_cmd and ct_flw_http_mthd
+entries and integer counters written as floats ("3.0"). The output only depends on --seed and the sizes, not on
+the number of worker processes.
+"""
+import os
+import re
+import sys
+import shutil
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "modules"))
+
+from schema import load_feature_schema, normalize_name, NOMINAL, FLOAT, TIMESTAMP, BINARY  # noqa: E402
+
+FEATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "NUSW-NB15_features.csv")
+GT_COLUMNS = ["Start time", "Last time", "Attack category", "Attack subcategory", "Protocol", "Source IP",
+              "Source Port", "Destination IP", "Destination Port", "Attack Name", "Attack Reference"]
+# Rows generated (and written) at a time per file.
+CHUNK_ROWS = 500_000
+# First start time of the capture (22 Jan 2015, like the real one) and flows per second.
+CAPTURE_START = 1421927414
+FLOWS_PER_SECOND = 2000
+
+# Share of each attack category; blank attack_cat marks normal traffic in the main files.
+ATTACK_CATEGORIES = {"Normal": 0.8735, "Generic": 0.0848, "Exploits": 0.0175, "Fuzzers": 0.0095,
+                     "DoS": 0.0064, "Reconnaissance": 0.0055, "Analysis": 0.0011, "Backdoor": 0.0009,
+                     "Shellcode": 0.0006, "Worms": 0.0002}
+PROTOCOLS = {"tcp": 0.59, "udp": 0.39, "unas": 0.0014, "arp": 0.0014, "ospf": 0.0007, "sctp": 0.0004}
+# Rare protocols share what is left of the protocol distribution, Zipf-distributed.
+RARE_PROTOCOLS = 130
+SERVICES = {"-": 0.47, "dns": 0.31, "http": 0.081, "ftp-data": 0.049, "smtp": 0.032, "ftp": 0.019,
+            "ssh": 0.018, "pop3": 0.0006, "dhcp": 0.0001, "snmp": 0.0001, "ssl": 0.0001, "irc": 0.00002,
+            "radius": 0.00001}
+STATES = {"FIN": 0.58, "CON": 0.22, "INT": 0.19, "REQ": 0.0061, "ECO": 0.0004, "RST": 0.0003, "CLO": 0.0002,
+          "ACC": 0.0001, "URH": 0.0001, "PAR": 0.00005, "ECR": 0.00003, "TST": 0.00002, "MAS": 0.00001,
+          "no": 0.00001, "TXD": 0.00001, "URN": 0.00001}
+# Well-known destination ports get this share of the flows; the rest are ephemeral.
+COMMON_PORTS = {53: 0.30, 80: 0.12, 111: 0.06, 25: 0.03, 21: 0.02, 22: 0.02, 143: 0.005, 0: 0.005}
+# Testbed address ranges: normal clients, attackers and the servers both talk to.
+CLIENT_HOSTS = ["59.166.0.%d" % i for i in range(10)]
+ATTACKER_HOSTS = ["175.45.176.%d" % i for i in range(4)]
+SERVER_HOSTS = ["149.171.126.%d" % i for i in range(20)]
+# Default share of dirty values in the columns that have them in the real captures.
+DIRTY_SHARE = 0.001
+# Counters that the real captures leave blank when the protocol has no such field.
+BLANK_COLUMNS = {"ct_ftp_cmd": " ", "ct_flw_http_mthd": ""}
+
+
+def parse_rows(text):
+    """Parse a row count such as 100000, 100k, 2.5M or 1e8."""
+    match = re.fullmatch(r"\s*([0-9.eE+]+)\s*([kKmMgG]?)\s*", str(text))
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid row count: {text!r}")
+    scale = {"": 1, "k": 10 ** 3, "m": 10 ** 6, "g": 10 ** 9}[match.group(2).lower()]
+    return int(float(match.group(1)) * scale)
+
+
+def _choice(rng, weights, size):
+    values = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype=np.float64)
+    return values[rng.choice(len(values), size=size, p=p / p.sum())]
+
+
+def _protocols(rng, size):
+    proto = _choice(rng, PROTOCOLS, size)
+    rare = rng.random(size) > sum(PROTOCOLS.values())
+    ranks = np.minimum(rng.zipf(1.5, int(rare.sum())), RARE_PROTOCOLS)
+    proto[rare] = np.char.add("proto-", ranks.astype(str)).astype(object)
+    return proto
+
+
+def _ports(rng, size, common):
+    ports = rng.integers(1024, 65536, size)
+    if common:
+        well_known = rng.random(size) < sum(COMMON_PORTS.values())
+        ports[well_known] = _choice(rng, COMMON_PORTS, int(well_known.sum())).astype(np.int64)
+    return ports
+
+
+def _dirty_ports(rng, ports, share):
+    """Replace a share of the ports by hex strings ("0x000b", as for ICMP flows) and '-'."""
+    dirty = rng.random(len(ports)) < share
+    if not dirty.any():
+        return ports
+    ports = ports.astype(object)
+    n = int(dirty.sum())
+    hex_ports = np.array(["0x%04x" % v for v in rng.integers(0, 0x100, n)], dtype=object)
+    ports[dirty] = np.where(rng.random(n) < 0.5, hex_ports, "-")
+    return ports
+
+
+def _dirty_counter(rng, values, share, blank=None):
+    """Write a share of an integer column as floats ("3.0"), or as the blank value if given."""
+    dirty = rng.random(len(values)) < share
+    if not dirty.any():
+        return values
+    values = values.astype(object)
+    values[dirty] = blank if blank is not None else [f"{float(v)}" for v in values[dirty]]
+    return values
+
+
+def _lognormal(rng, size, mean, sigma, shift=None):
+    values = rng.lognormal(mean, sigma, size)
+    return values * shift if shift is not None else values
+
+
+def generate_flows(rng, schema, size, first_row=0, dirty=DIRTY_SHARE):
+    """
+    Generate one chunk of flow records.
+
+    Args:
+        rng (np.random.Generator): Source of randomness.
+        schema (dict): Schema from load_feature_schema; gives the columns and their types.
+        size (int): Rows to generate.
+        first_row (int): Position of the chunk in the capture; drives the start times.
+        dirty (float): Share of dirty values (hex/'-' ports, blanks, floats in integer columns).
+
+    Returns:
+        pd.DataFrame: Flows with the feature file's column names, attack_cat blank for normal traffic.
+    """
+    category = _choice(rng, ATTACK_CATEGORIES, size)
+    attack = category != "Normal"
+    n_attack = int(attack.sum())
+    # Attack flows are smaller and shorter on average (scans, single exploit payloads).
+    shift = np.where(attack, 0.3, 1.0)
+
+    stime = CAPTURE_START + (first_row + np.arange(size)) // FLOWS_PER_SECOND
+    dur = np.round(_lognormal(rng, size, -1.5, 2.0, shift), 6)
+    spkts = np.maximum(np.round(_lognormal(rng, size, 2.0, 1.2, shift)), 1).astype(np.int64)
+    dpkts = np.round(_lognormal(rng, size, 1.8, 1.3, shift)).astype(np.int64)
+    columns = {}
+    for name, kind in schema.items():
+        key = normalize_name(name)
+        if key == "srcip":
+            values = _choice(rng, dict.fromkeys(CLIENT_HOSTS, 1.0), size)
+            values[attack] = _choice(rng, dict.fromkeys(ATTACKER_HOSTS, 1.0), n_attack)
+        elif key == "dstip":
+            values = _choice(rng, dict.fromkeys(SERVER_HOSTS, 1.0), size)
+        elif key == "sport":
+            values = _dirty_ports(rng, _ports(rng, size, common=False), dirty)
+        elif key == "dsport":
+            values = _dirty_ports(rng, _ports(rng, size, common=True), dirty)
+        elif key == "proto":
+            values = _protocols(rng, size)
+        elif key == "service":
+            values = _choice(rng, SERVICES, size)
+        elif key == "state":
+            values = _choice(rng, STATES, size)
+        elif key == "attack_cat":
+            values = np.where(attack, category, "")
+        elif key == "label":
+            values = attack.astype(np.int64)
+        elif key == "stime":
+            values = stime
+        elif key == "ltime":
+            values = stime + np.ceil(dur).astype(np.int64)
+        elif key == "dur":
+            values = dur
+        elif key == "spkts":
+            values = spkts
+        elif key == "dpkts":
+            values = dpkts
+        elif key in ("sbytes", "dbytes"):
+            packets = spkts if key == "sbytes" else dpkts
+            values = packets * np.round(_lognormal(rng, size, 5.0, 0.8)).astype(np.int64)
+        elif key in ("sttl", "dttl"):
+            values = _choice(rng, {31: 0.5, 254: 0.3, 62: 0.1, 0: 0.05, 29: 0.05}, size).astype(np.int64)
+        elif kind == BINARY:
+            values = (rng.random(size) < 0.02).astype(np.int64)
+        elif kind == NOMINAL:
+            values = np.char.add(f"{key}-", rng.zipf(2.0, size).astype(str)).astype(object)
+        elif kind == FLOAT:
+            values = np.round(_lognormal(rng, size, 1.0, 2.0, shift), 6)
+        elif kind == TIMESTAMP:
+            values = stime
+        else:
+            # Counters: mostly small with a heavy tail, zero for about a third of the flows.
+            values = np.round(_lognormal(rng, size, 1.0, 1.5, shift)).astype(np.int64)
+            values[rng.random(size) < 0.3] = 0
+            values = _dirty_counter(rng, values, dirty, BLANK_COLUMNS.get(key))
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+
+def ground_truth_rows(df, schema):
+    """Build the ground truth records of the attack flows of a chunk."""
+    names = {normalize_name(name): name for name in schema}
+    attacks = df[df[names["attack_cat"]] != ""]
+    category = attacks[names["attack_cat"]].to_numpy()
+    return pd.DataFrame({
+        "Start time": attacks[names["stime"]].to_numpy(),
+        "Last time": attacks[names["ltime"]].to_numpy(),
+        "Attack category": category,
+        "Attack subcategory": np.char.add(category.astype(str), " variant"),
+        "Protocol": attacks[names["proto"]].to_numpy(),
+        "Source IP": attacks[names["srcip"]].to_numpy(),
+        "Source Port": attacks[names["sport"]].to_numpy(),
+        "Destination IP": attacks[names["dstip"]].to_numpy(),
+        "Destination Port": attacks[names["dsport"]].to_numpy(),
+        "Attack Name": np.char.add("Synthetic ", category.astype(str)),
+        "Attack Reference": "-",
+    }, columns=GT_COLUMNS)
+
+
+def _write_part(task):
+    """Write one output file (in a worker process). Returns (path, rows, ground truth part or None)."""
+    kind, path, seed, file_index, first_row, rows, features_path, dirty = task
+    schema = load_feature_schema(features_path)
+    # Ground truth records of a main file go to a part file, concatenated by write_dataset.
+    gt_path = path + ".gt.part" if kind == "main" else None
+    written = 0
+    with open(path, "w", newline="") as out, open(gt_path or os.devnull, "w", newline="") as gt:
+        while written < rows:
+            size = min(CHUNK_ROWS, rows - written)
+            rng = np.random.default_rng([seed, file_index, written // CHUNK_ROWS])
+            df = generate_flows(rng, schema, size, first_row + written, dirty)
+            if kind == "main":
+                df.to_csv(out, header=False, index=False)
+                ground_truth_rows(df, schema).to_csv(gt, header=False, index=False)
+            else:
+                # The training/testing sets label normal traffic explicitly and use normalized names.
+                df = df.rename(columns=normalize_name)
+                df["attack_cat"] = df["attack_cat"].replace("", "Normal")
+                df.to_csv(out, header=written == 0, index=False)
+            written += size
+    return path, rows, gt_path
+
+
+def dataset_paths(output_dir, files=4):
+    """Paths of the files of a dataset written by write_dataset ("main" is a list)."""
+    return {"main": [os.path.join(output_dir, f"UNSW-NB15_{i + 1}.csv") for i in range(files)],
+            "gt": os.path.join(output_dir, "NUSW-NB15_GT.csv"),
+            "train": os.path.join(output_dir, "UNSW_NB15_training-set.csv"),
+            "test": os.path.join(output_dir, "UNSW_NB15_testing-set.csv"),
+            "features": os.path.join(output_dir, "NUSW-NB15_features.csv")}
+
+
+def write_dataset(output_dir, rows, files=4, train_rows=None, test_rows=None, seed=0, workers=None,
+                  features_path=FEATURES_PATH, dirty=DIRTY_SHARE):
+    """
+    Write a synthetic UNSW-NB15 dataset.
+
+    Args:
+        output_dir (str): Directory for the files (created if needed).
+        rows (int): Flows in the main dataset, split evenly over the main files.
+        files (int): Number of main files (UNSW-NB15_1.csv ...).
+        train_rows (int): Rows of the training set. Defaults to min(rows, 2M).
+        test_rows (int): Rows of the testing set. Defaults to half the training set.
+        seed (int): Random seed; the same seed and sizes give identical files.
+        workers (int): Worker processes (defaults to the CPU count).
+        features_path (str): Features file giving the columns and types.
+        dirty (float): Share of dirty values in the affected columns (0 for clean files).
+
+    Returns:
+        dict: Paths of the written files (see dataset_paths).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    train_rows = min(rows, 2_000_000) if train_rows is None else train_rows
+    test_rows = train_rows // 2 if test_rows is None else test_rows
+    files = max(1, min(files, rows))
+    per_file = [rows // files + (i < rows % files) for i in range(files)]
+    starts = np.concatenate([[0], np.cumsum(per_file)[:-1]]).tolist()
+
+    paths = dataset_paths(output_dir, files)
+    tasks = [("main", path, seed, i, start, n, features_path, dirty)
+             for i, (path, start, n) in enumerate(zip(paths["main"], starts, per_file))]
+    # The training and testing sets come from separate streams (file indexes past the main files).
+    tasks.append(("train", paths["train"], seed, 1000, 0, train_rows, features_path, dirty))
+    tasks.append(("test", paths["test"], seed, 1001, 0, test_rows, features_path, dirty))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_write_part, tasks))
+    for path, n, _ in results:
+        logging.info("Wrote %s (%d rows)", path, n)
+
+    # Concatenate the per-file ground truth parts, in file order, under one header.
+    with open(paths["gt"], "w", newline="") as out:
+        out.write(",".join(GT_COLUMNS) + "\n")
+        for _, _, gt_path in results:
+            if gt_path:
+                with open(gt_path) as part:
+                    shutil.copyfileobj(part, out)
+                os.remove(gt_path)
+    shutil.copyfile(features_path, paths["features"])
+    logging.info("Wrote %s", paths["gt"])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output_dir", help="Directory for the generated files")
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("1M"),
+                        help="Main dataset rows (e.g. 100k, 100M)")
+    parser.add_argument("--files", type=int, default=4, help="Number of main dataset files")
+    parser.add_argument("--train-rows", type=parse_rows, help="Training set rows (default: min(rows, 2M))")
+    parser.add_argument("--test-rows", type=parse_rows, help="Testing set rows (default: half the training set)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--features", default=FEATURES_PATH, help="Features CSV")
+    parser.add_argument("--dirty", type=float, default=DIRTY_SHARE,
+                        help="Share of dirty values: hex/'-' ports, blanks, floats in integer columns (0 for none)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    write_dataset(args.output_dir, args.rows, args.files, args.train_rows, args.test_rows, args.seed, args.workers,
+                  args.features, args.dirty)
+
+
+if __name__ == "__main__":
+    main()
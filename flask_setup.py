@@ -1,6 +1,11 @@
+import os
+import sys
 from flask import Flask
 from flask_talisman import Talisman
 
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'modules'))
+
 app = Flask(__name__)
 talisman = Talisman(app)
 
@@ -28,3 +33,25 @@ talisman.frame_options_allow_from = 'https://www.google.com'
 # Add the headers to Talisman
 talisman.content_security_policy = csp
 talisman.strict_transport_security = hsts
+
+# Serve the registry model named by MODEL_KEY on POST /score (see modules/scoring.py).
+# The model is loaded by the first request; a random forest is memory-mapped from its compiled arrays.
+if os.getenv('MODEL_KEY'):
+	from schema import load_feature_schema
+	from model_registry import ModelRegistry
+	from scoring import register_scoring_endpoint
+
+	registry = ModelRegistry(os.path.join(ROOT_DIR, 'models'))
+
+	def load_model():
+		model = registry.load_compiled(os.getenv('MODEL_KEY'), mmap_mode='r')
+		if model is None:
+			saved = registry.load(os.getenv('MODEL_KEY'))
+			if saved is None:
+				raise LookupError(f"Model {os.getenv('MODEL_KEY')} not found in the registry")
+			model = saved[0]
+		return model
+
+	features_path = os.path.join(ROOT_DIR, 'data', 'NUSW-NB15_features.csv')
+	schema = load_feature_schema(features_path) if os.path.exists(features_path) else None
+	register_scoring_endpoint(app, load_model, schema)
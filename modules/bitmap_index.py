@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Number of set bits for every byte value, used to count rows in a packed bitset.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bitset):
+    """Return the number of rows selected by a packed bitset."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bitset).sum(dtype=np.int64))
+    return int(_POPCOUNT[bitset].sum(dtype=np.int64))
+
+
+class BitmapIndex:
+    """
+    Precomputed row indexes for cross-filtering a read-only DataFrame.
+
+    Categorical columns get one packed bitset (np.packbits, 1 bit per row) per distinct
+    value. Numeric range columns get a sorted copy of their values plus the matching row
+    order, so a range is resolved with two binary searches. Combining filters is then a
+    matter of OR-ing bitsets within a column and AND-ing them across columns, instead of
+    scanning the columns again for every filter.
+
+    Args:
+        df (pd.DataFrame): The data to index.
+        categorical_columns (list): Columns filtered by value.
+        range_columns (list): Numeric columns filtered by [low, high] range.
+    """
+
+    def __init__(self, df, categorical_columns=(), range_columns=()):
+        self.n_rows = len(df)
+        self._bitmaps = {}
+        self._sorted = {}
+        for col in categorical_columns:
+            codes, uniques = pd.factorize(df[col], sort=True)
+            values = uniques.tolist() if hasattr(uniques, "tolist") else list(uniques)
+            self._bitmaps[col] = {value: np.packbits(codes == i) for i, value in enumerate(values)}
+        for col in range_columns:
+            order = np.argsort(df[col].to_numpy(), kind="stable")
+            self._sorted[col] = (df[col].to_numpy()[order], order)
+        self.all_rows = np.packbits(np.ones(self.n_rows, dtype=bool))
+        logging.info("Built bitmap index over %d rows: %d value bitmaps, %d range columns.",
+                     self.n_rows, sum(len(b) for b in self._bitmaps.values()), len(self._sorted))
+
+    def values(self, column):
+        """Return the distinct indexed values of a categorical column, sorted."""
+        return list(self._bitmaps.get(column, {}))
+
+    def bounds(self, column):
+        """Return the (min, max) of an indexed range column."""
+        values = self._sorted[column][0]
+        return (values[0].item(), values[-1].item()) if len(values) else (0, 0)
+
+    def value_bitset(self, column, values):
+        """OR together the bitsets of the given values of a categorical column."""
+        bitmaps = self._bitmaps.get(column, {})
+        result = np.zeros_like(self.all_rows)
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def range_bitset(self, column, low, high):
+        """Return the bitset of rows whose value lies in [low, high]."""
+        values, order = self._sorted[column]
+        start, end = np.searchsorted(values, low, side="left"), np.searchsorted(values, high, side="right")
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[order[start:end]] = True
+        return np.packbits(mask)
+
+    def select(self, selections=(), ranges=()):
+        """
+        Combine value and range filters into one bitset.
+
+        Args:
+            selections (iterable): (column, values) pairs; rows match any of the values.
+            ranges (iterable): (column, (low, high)) pairs.
+
+        Returns:
+            np.ndarray: Packed bitset of the rows matching every filter.
+        """
+        result = self.all_rows.copy()
+        for column, values in selections:
+            result &= self.value_bitset(column, values)
+        for column, (low, high) in ranges:
+            result &= self.range_bitset(column, low, high)
+        return result
+
+    def rows(self, bitset):
+        """Return the positions of the rows selected by a bitset."""
+        return np.flatnonzero(np.unpackbits(bitset, count=self.n_rows))
+
+    def counts(self, column, bitset=None):
+        """
+        Count the selected rows per value of a categorical column without touching the data.
+
+        Returns:
+            pd.Series: Non-zero counts indexed by value, largest first.
+        """
+        bitmaps = self._bitmaps.get(column, {})
+        if bitset is None:
+            counts = {value: popcount(bitmap) for value, bitmap in bitmaps.items()}
+        else:
+            counts = {value: popcount(bitmap & bitset) for value, bitmap in bitmaps.items()}
+        counts = pd.Series(counts, dtype="int64")
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
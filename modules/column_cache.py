@@ -0,0 +1,154 @@
+import os
+import glob
+import json
+import hashlib
+import logging
+import pandas as pd
+from schema import apply_schema_dtypes
+
+# Bump when the on-disk layout or the type conversion rules change so old caches are rebuilt.
+CACHE_VERSION = 1
+CACHE_DIRNAME = ".cache"
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def _cache_dir_for(filepath, cache_dir=None):
+    return cache_dir or os.path.join(os.path.dirname(os.path.abspath(filepath)), CACHE_DIRNAME)
+
+
+def file_fingerprint(filepath, cache_dir=None):
+    """
+    Return the SHA-256 of a file's contents.
+
+    Hashing a multi-hundred MB capture on every run would defeat the purpose of the cache,
+    so the digest is remembered in a small sidecar keyed by the file's size and mtime and
+    only recomputed when either of them changes.
+
+    Args:
+        filepath (str): Path to the source file.
+        cache_dir (str): Directory holding the sidecar. Defaults to a ".cache" folder
+                         next to the source file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    stat = os.stat(filepath)
+    sidecar = os.path.join(_cache_dir_for(filepath, cache_dir), os.path.basename(filepath) + ".hash.json")
+    try:
+        with open(sidecar) as f:
+            known = json.load(f)
+        if known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    try:
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        with open(sidecar, "w") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}, f)
+    except OSError as e:
+        logging.warning("Could not record fingerprint for %s: %s", filepath, e)
+    return sha256
+
+
+def _cache_key(source_hash, schema, read_kwargs):
+    """Combine the source digest, the schema and the parse options into one cache key."""
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "source": source_hash, "schema": schema or {}, "read": read_kwargs},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def ensure_cache(filepath, schema=None, cache_dir=None, **read_kwargs):
+    """
+    Make sure a valid Parquet cache exists for a CSV file, building it if needed.
+
+    The cache file name contains a key derived from the source file's hash, the schema
+    and the read_csv options, so any change to the source (or to how it is parsed)
+    produces a new key and triggers a rebuild. Stale cache files for the same source
+    are removed after a successful rebuild.
+
+    Args:
+        filepath (str): Path to the source CSV file.
+        schema (dict): Optional schema from load_feature_schema used to type the columns.
+        cache_dir (str): Directory to store the cache in. Defaults to a ".cache" folder
+                         next to the source file.
+        **read_kwargs: Extra keyword arguments passed to pd.read_csv (e.g. header, names).
+
+    Returns:
+        str or None: Path of the Parquet cache, or None if it could not be written
+                     (e.g. pyarrow is not installed).
+    """
+    directory = _cache_dir_for(filepath, cache_dir)
+    key = _cache_key(file_fingerprint(filepath, cache_dir), schema, read_kwargs)
+    base = os.path.basename(filepath)
+    cache_path = os.path.join(directory, f"{base}.{key}.parquet")
+    if os.path.exists(cache_path):
+        return cache_path
+
+    logging.info("Building columnar cache for %s", filepath)
+    df = pd.read_csv(filepath, low_memory=False, **read_kwargs)
+    if schema:
+        apply_schema_dtypes(df, schema)
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except (ImportError, OSError, ValueError) as e:
+        logging.warning("Could not write columnar cache for %s: %s", filepath, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    for stale in glob.glob(os.path.join(glob.escape(directory), glob.escape(base) + ".*.parquet")):
+        if stale != cache_path:
+            os.remove(stale)
+    logging.info("Columnar cache written to %s", cache_path)
+    return cache_path
+
+
+def read_csv_cached(filepath, columns=None, schema=None, cache_dir=None, **read_kwargs):
+    """
+    Load a CSV file through its columnar cache.
+
+    On the first call (or after the source changes) the whole CSV is parsed once, typed
+    according to the schema and written to Parquet. Later calls read only the requested
+    columns from the cache. If the cache cannot be used the CSV is parsed directly.
+
+    Args:
+        filepath (str): Path to the source CSV file.
+        columns (list): Optional subset of columns to load. Loads all columns if None.
+        schema (dict): Optional schema from load_feature_schema used to type the columns.
+        cache_dir (str): Directory to store the cache in (see ensure_cache).
+        **read_kwargs: Extra keyword arguments passed to pd.read_csv (e.g. header, names).
+
+    Returns:
+        pd.DataFrame: The loaded data.
+    """
+    cache_path = ensure_cache(filepath, schema=schema, cache_dir=cache_dir, **read_kwargs)
+    if cache_path is not None:
+        return pd.read_parquet(cache_path, columns=columns)
+
+    df = pd.read_csv(filepath, usecols=columns, low_memory=False, **read_kwargs)
+    if schema:
+        apply_schema_dtypes(df, schema)
+    return df
+
+
+def cached_column_names(filepath, schema=None, cache_dir=None, **read_kwargs):
+    """
+    Return the column names of a CSV file, reading them from the cache metadata when possible.
+    """
+    cache_path = ensure_cache(filepath, schema=schema, cache_dir=cache_dir, **read_kwargs)
+    if cache_path is not None:
+        import pyarrow.parquet as pq
+        return pq.read_schema(cache_path).names
+    return pd.read_csv(filepath, nrows=0, **read_kwargs).columns.tolist()
@@ -1,25 +1,90 @@
+import math
 import dash
 import dash_bootstrap_components as dbc
 from dash import html, dcc
-from dash.dependencies import Input, Output
-import plotly.express as px
-import pandas as pd
+from dash.dependencies import Input, Output, State
+from dashboard_store import DashboardStore, MAX_SERIES_POINTS
+from instrumentation import stage
 
-def build_dashboard(df):
+# Refresh period of the live charts.
+LIVE_INTERVAL_MS = 1000
+
+def _zoom_range(relayout_data):
+    """
+    Extract the x-axis range from a Plotly relayoutData event.
+
+    Returns:
+        tuple or None: (start, end) rounded outwards to whole rows, or None when the
+                       event resets the zoom or does not touch the x-axis.
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        start, end = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    elif "xaxis.range" in relayout_data:
+        start, end = relayout_data["xaxis.range"]
+    else:
+        return None
+    return math.floor(float(start)), math.ceil(float(end))
+
+def _triggered_id():
+    """Return the id of the input that fired the current callback (None outside a Dash request)."""
+    try:
+        return dash.callback_context.triggered_id
+    except dash.exceptions.MissingCallbackContextException:
+        return None
+
+def _triggered_value():
+    """Return the new value of the input that fired the current callback, for metric labels."""
+    try:
+        triggered = dash.callback_context.triggered
+    except dash.exceptions.MissingCallbackContextException:
+        return None
+    return triggered[0].get("value") if triggered else None
+
+def _live_figures(live):
+    """Empty live figures as plain dicts; the callbacks fill them with extendData and patches."""
+    series = {"data": [{"type": "scatter", "mode": "lines", "name": "Flows", "x": [], "y": []},
+                       {"type": "scatter", "mode": "lines", "name": "Attack flows", "x": [], "y": []}],
+              "layout": {"title": {"text": f"Live Flows per {live.window_seconds}s Window"}, "uirevision": "live",
+                         "xaxis": {"type": "date", "title": {"text": "Start Time (stime)"}},
+                         "yaxis": {"title": {"text": "Flows"}}}}
+    protocols = {"data": [{"type": "bar", "x": [], "y": []}],
+                 "layout": {"title": {"text": "Live Protocol Frequency"}, "uirevision": "live"}}
+    categories = {"data": [{"type": "pie", "labels": [], "values": []}],
+                  "layout": {"title": {"text": "Live Attack Category Distribution"}, "uirevision": "live"}}
+    return series, protocols, categories
+
+def build_dashboard(df=None, max_points=MAX_SERIES_POINTS, store=None, live=None,
+                    live_interval_ms=LIVE_INTERVAL_MS):
     """
     Build a polished cybersecurity analytics dashboard using Dash and Bootstrap.
     
     The layout includes:
       - A navigation bar (header) for branding.
-      - A fixed sidebar for filtering (e.g., protocol selection).
+      - A fixed sidebar for filtering (multi-select protocol, service, state, attack category
+        and label filters, plus port and byte ranges).
       - A main content area with a time series chart and a row with a bar and pie chart.
+      - With live counters, a live section above it: flows per event-time window and the
+        protocol / attack category mix of the rolling window, refreshed every interval.
     
     Args:
         df (pd.DataFrame): The DataFrame containing the merged dataset.
+        max_points (int): Maximum number of points sent for the time series chart. Zooming
+                          re-queries the visible range at this resolution.
+        store (ChartStore): Optional prebuilt backend, e.g. a DuckDBStore querying the
+                            columnar files on disk. When given, df is not needed.
+        live (RollingWindowCounts): Optional live counters fed by live_ingest. Each refresh
+                                    sends only the windows closed since the previous one
+                                    (extendData) and patches of the bar and pie values.
+        live_interval_ms (int): Refresh period of the live charts.
     
     Returns:
         dash.Dash: The configured Dash application.
     """
+    if store is None:
+        store = DashboardStore(df, max_points=max_points)
+
     # Use a Bootstrap theme (e.g., SLATE for a dark, modern look)
     app = dash.Dash(__name__, external_stylesheets=[dbc.themes.SLATE])
     
@@ -32,24 +97,45 @@ def build_dashboard(df):
         sticky="top",
     )
 
+    # Multi-select filters (rows match any selected value) and range filters, combined with AND.
+    filter_groups = []
+    for col, label in store.category_filters:
+        filter_groups.append(html.Div(
+            [
+                dbc.Label(f"Select {label}", style={"color": "#ffffff"}),
+                dcc.Dropdown(
+                    id=f"{col}-filter",
+                    options=[{"label": str(value), "value": value} for value in store.options(col)],
+                    value=[],
+                    multi=True,
+                    placeholder="All",
+                ),
+            ],
+            className="form-group mb-3"
+        ))
+    for col, label in store.range_filters:
+        low, high = store.bounds(col)
+        filter_groups.append(html.Div(
+            [
+                dbc.Label(f"{label} Range", style={"color": "#ffffff"}),
+                dcc.RangeSlider(
+                    id=f"{col}-range",
+                    min=low,
+                    max=high,
+                    value=[low, high],
+                    marks=None,
+                    tooltip={"placement": "bottom"},
+                ),
+            ],
+            className="form-group mb-3"
+        ))
+
     # Create a sidebar for filters, replacing dbc.FormGroup with an html.Div with className 'form-group'
     sidebar = html.Div(
         [
             html.H5("Filters", className="display-6", style={"color": "#ffffff"}),
             html.Hr(),
-            html.Div(
-                [
-                    dbc.Label("Select Protocol", style={"color": "#ffffff"}),
-                    dcc.Dropdown(
-                        id="protocol-dropdown",
-                        options=[{"label": proto, "value": proto} for proto in sorted(df["proto"].unique())],
-                        value=sorted(df["proto"].unique())[0],
-                        clearable=False,
-                    ),
-                ],
-                className="form-group"
-            ),
-        ],
+        ] + filter_groups,
         style={
             "position": "fixed",
             "top": "70px",  # height of the navbar
@@ -62,9 +148,26 @@ def build_dashboard(df):
         },
     )
 
+    # Live section (only with live counters): the figures start empty and are extended in place.
+    live_rows = []
+    if live is not None:
+        live_series, live_protocols, live_categories = _live_figures(live)
+        live_rows = [
+            dbc.Row([dbc.Col(dcc.Graph(id="live-series-chart", figure=live_series), md=12)], className="mb-4"),
+            dbc.Row(
+                [
+                    dbc.Col(dcc.Graph(id="live-protocol-chart", figure=live_protocols), md=6),
+                    dbc.Col(dcc.Graph(id="live-category-chart", figure=live_categories), md=6),
+                ],
+                className="mb-4",
+            ),
+            dcc.Interval(id="live-interval", interval=live_interval_ms),
+            dcc.Store(id="live-state"),
+        ]
+
     # Create main content area
     content = html.Div(
-        [
+        live_rows + [
             dbc.Row(
                 [
                     dbc.Col(dcc.Graph(id="time-series-chart"), md=12),
@@ -84,48 +187,65 @@ def build_dashboard(df):
     # Define the app layout
     app.layout = html.Div([navbar, sidebar, content])
 
-    # Callback for updating charts based on selected protocol
+    category_columns = [col for col, _ in store.category_filters]
+    range_columns = [col for col, _ in store.range_filters]
+
+    # Callback for updating charts based on the selected filters
     @app.callback(
     [Output("time-series-chart", "figure"),
      Output("bar-chart", "figure"),
      Output("pie-chart", "figure")],
-    [Input("protocol-dropdown", "value")]
+    [Input(f"{col}-filter", "value") for col in category_columns] +
+    [Input(f"{col}-range", "value") for col in range_columns] +
+    [Input("time-series-chart", "relayoutData")]
 )
-    def update_charts(selected_proto):
-        # Filter the dataset based on the selected protocol if one is chosen
-        filtered_df = df[df["proto"] == selected_proto] if selected_proto else df
-        print("Filtered DataFrame shape:", filtered_df.shape)
-        
-        # --- Time Series Chart ---
-        # Since there is no timestamp column, we use the DataFrame index as a proxy.
-        ts_fig = {}
-        if "sbytes" in filtered_df.columns:
-            ts_fig = px.line(filtered_df, x=filtered_df.index, y="sbytes", 
-                            title="Traffic Over Rows (sbytes)",
-                            labels={"x": "Row Index", "sbytes": "Source Bytes"})
-        else:
-            ts_fig = px.scatter(title="No source bytes data available")
-        
-        # --- Bar Chart: Protocol Frequency ---
-        bar_fig = {}
-        if "proto" in filtered_df.columns:
-            bar_data = filtered_df["proto"].value_counts().reset_index()
-            bar_data.columns = ["protocol", "count"]
-            bar_fig = px.bar(bar_data, x="protocol", y="count", title="Protocol Frequency",
-                            labels={"protocol": "Protocol", "count": "Count"})
-        else:
-            bar_fig = px.scatter(title="No protocol data available")
-        
-        # --- Pie Chart: Attack Category Distribution ---
-        pie_fig = {}
-        if "attack_cat" in filtered_df.columns:
-            pie_data = filtered_df["attack_cat"].value_counts().reset_index()
-            pie_data.columns = ["attack_cat", "count"]
-            pie_fig = px.pie(pie_data, names="attack_cat", values="count", title="Attack Category Distribution")
-        else:
-            pie_fig = px.scatter(title="No attack category data available")
-        
-        return ts_fig, bar_fig, pie_fig
+    def update_charts(*args):
+        *filter_values, relayout_data = args
+        triggered = _triggered_id()
+        # Callback latency is recorded per input and selection (see instrumentation).
+        with stage("callback", callback="update_charts", filter=triggered or "initial",
+                   value="zoom" if triggered == "time-series-chart" else _triggered_value()):
+            key = store.filter_key(
+                selections=dict(zip(category_columns, filter_values[:len(category_columns)])),
+                ranges=dict(zip(range_columns, filter_values[len(category_columns):])),
+            )
+            # A zoom on the time series only needs that chart, re-sampled for the visible range.
+            if triggered == "time-series-chart":
+                if not any(name.startswith("xaxis") for name in (relayout_data or {})):
+                    return dash.no_update, dash.no_update, dash.no_update
+                return store.series_figure(key, _zoom_range(relayout_data)), dash.no_update, dash.no_update
+            # Filters are resolved through the bitmap index and finished figures memoized per filter state.
+            return store.figures(key)
 
+    if live is not None:
+        @app.callback(
+            [Output("live-series-chart", "extendData"),
+             Output("live-protocol-chart", "figure"),
+             Output("live-category-chart", "figure"),
+             Output("live-state", "data")],
+            [Input("live-interval", "n_intervals")],
+            [State("live-state", "data")],
+        )
+        def update_live_charts(_, state):
+            # The state remembers, per browser tab, the last window sent and the counter version.
+            state = state or {}
+            with stage("callback", callback="update_live_charts"):
+                starts, flows, attacks, cursor = live.closed_since(state.get("cursor"))
+                series = dash.no_update
+                if starts:
+                    x = [start * 1000 for start in starts]
+                    series = ({"x": [x, x], "y": [flows, attacks]}, [0, 1], live.capacity)
+                version = live.version
+                if version == state.get("version"):
+                    if not starts:
+                        raise dash.exceptions.PreventUpdate
+                    return series, dash.no_update, dash.no_update, dict(state, cursor=cursor)
+                protocols, categories = live.totals("proto"), live.totals("attack_cat")
+                bar, pie = dash.Patch(), dash.Patch()
+                bar["data"][0]["x"] = list(protocols)
+                bar["data"][0]["y"] = list(protocols.values())
+                pie["data"][0]["labels"] = list(categories)
+                pie["data"][0]["values"] = list(categories.values())
+                return series, bar, pie, {"cursor": cursor, "version": version}
 
     return app
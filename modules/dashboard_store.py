@@ -0,0 +1,222 @@
+import logging
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from downsampling import decimate
+from bitmap_index import BitmapIndex
+from schema import normalize_name
+
+# Number of finished figure sets kept per dashboard process.
+FIGURE_CACHE_SIZE = 128
+# Upper bound on the points sent to the browser for the time series chart.
+MAX_SERIES_POINTS = 2000
+
+# Columns offered as multi-select filters and as range filters, with their display labels.
+CATEGORY_FILTERS = [("proto", "Protocol"), ("service", "Service"), ("state", "State"),
+                    ("attack_cat", "Attack Category"), ("label", "Label")]
+RANGE_FILTERS = [("sport", "Source Port"), ("dsport", "Destination Port"), ("sbytes", "Source Bytes"),
+                 ("dbytes", "Destination Bytes")]
+
+
+
+def resolve_filters(filters, columns):
+    """
+    Match (column, label) filter definitions to the columns present, ignoring case and
+    spaces (so "label" also finds "Label"). Returns the matched (column, label) pairs.
+    """
+    by_name = {}
+    for col in columns:
+        by_name.setdefault(normalize_name(col), col)
+    return [(by_name[normalize_name(col)], label) for col, label in filters if normalize_name(col) in by_name]
+
+
+# Filter state with nothing selected.
+NO_FILTERS = ((), ())
+
+
+class ChartStore:
+    """
+    Figure building and memoization shared by the dashboard backends.
+
+    Subclasses provide the data access: category_filters / range_filters (lists of
+    (column, label) pairs), has_proto / has_attack_cat, protocols, options(column), bounds(column),
+    counts(column, key) and series_points(key, x_range). Finished figures are memoized
+    in bounded LRU caches keyed by the filter state (see filter_key), and the time series
+    is limited to max_points points so the payload stays bounded at any zoom level.
+
+    Args:
+        cache_size (int): Maximum number of cached figure sets.
+        max_points (int): Maximum number of points in the time series chart.
+        initial_figures (tuple): Optional precomputed (time series, bar, pie) figures for
+                                 the unfiltered view, e.g. from a startup snapshot.
+    """
+
+    def __init__(self, cache_size=FIGURE_CACHE_SIZE, max_points=MAX_SERIES_POINTS, initial_figures=None):
+        self.max_points = max_points
+        self.initial_figures = tuple(initial_figures) if initial_figures is not None else None
+        self.figures = lru_cache(maxsize=cache_size)(self._build_figures)
+        self.series_figure = lru_cache(maxsize=cache_size)(self._build_series_figure)
+
+    def filter_key(self, selections=None, ranges=None):
+        """
+        Normalize the filter inputs into a hashable cache key.
+
+        Empty selections and ranges covering the whole column are dropped, and values are
+        sorted, so equivalent filter states share cache entries.
+
+        Args:
+            selections (dict): Column -> list of selected values (rows match any of them).
+            ranges (dict): Column -> [low, high].
+
+        Returns:
+            tuple: (selections, ranges) as nested tuples.
+        """
+        selected = tuple(sorted((col, tuple(sorted(values, key=str)))
+                                for col, values in (selections or {}).items() if values))
+        bounded = []
+        for col, value in (ranges or {}).items():
+            if not value:
+                continue
+            low, high = self.bounds(col)
+            if value[0] > low or value[1] < high:
+                bounded.append((col, (value[0], value[1])))
+        return selected, tuple(sorted(bounded))
+
+    def _build_series_figure(self, key=NO_FILTERS, x_range=None):
+        """
+        Build the time series figure for a filter key, optionally restricted to a row range.
+
+        Args:
+            key (tuple): Filter key from filter_key.
+            x_range (tuple): Optional (start, end) row index range from a zoom.
+        """
+        import plotly.express as px
+        points = self.series_points(key, x_range)
+        if points is None:
+            return px.scatter(title="No source bytes data available")
+        x, y = points
+        # Since there is no timestamp column, we use the row index as a proxy.
+        ts_fig = px.line(pd.DataFrame({"x": x, "y": y}), x="x", y="y", title="Traffic Over Rows (sbytes)",
+                         labels={"x": "Row Index", "y": "Source Bytes"})
+        # Keep the user's zoom when the figure is replaced with a higher resolution one.
+        ts_fig.update_layout(uirevision=str(key))
+        if x_range is not None:
+            ts_fig.update_xaxes(range=list(x_range))
+        return ts_fig
+
+    def _build_figures(self, key=NO_FILTERS):
+        if key == NO_FILTERS and self.initial_figures is not None:
+            return self.initial_figures
+        import plotly.express as px
+        # --- Time Series Chart ---
+        ts_fig = self.series_figure(key)
+
+        # --- Bar Chart: Protocol Frequency ---
+        if self.has_proto:
+            bar_data = self.counts("proto", key).reset_index()
+            bar_data.columns = ["protocol", "count"]
+            bar_fig = px.bar(bar_data, x="protocol", y="count", title="Protocol Frequency",
+                             labels={"protocol": "Protocol", "count": "Count"})
+        else:
+            bar_fig = px.scatter(title="No protocol data available")
+
+        # --- Pie Chart: Attack Category Distribution ---
+        if self.has_attack_cat:
+            pie_data = self.counts("attack_cat", key).reset_index()
+            pie_data.columns = ["attack_cat", "count"]
+            pie_fig = px.pie(pie_data, names="attack_cat", values="count", title="Attack Category Distribution")
+        else:
+            pie_fig = px.scatter(title="No attack category data available")
+
+        return ts_fig, bar_fig, pie_fig
+
+
+class DashboardStore(ChartStore):
+    """
+    In-memory backing store for the dashboard callbacks.
+
+    The dataset does not change while the app runs, so everything the charts need is
+    computed once here: the filter options, a bitmap index over the filterable columns
+    and the protocol / attack category counts for the whole dataset. Filtered counts are
+    popcounts over AND-ed bitsets.
+
+    The time series is decimated to at most max_points points (min/max bucketing by
+    default), and can be re-queried for a sub-range of rows when the user zooms in.
+
+    Args:
+        df (pd.DataFrame): The dataset shown by the dashboard.
+        cache_size (int): Maximum number of cached figure sets.
+        max_points (int): Maximum number of points in the time series chart.
+        decimation (str): Decimation method, "minmax" or "lttb".
+    """
+
+    def __init__(self, df, cache_size=FIGURE_CACHE_SIZE, max_points=MAX_SERIES_POINTS, decimation="minmax"):
+        super().__init__(cache_size=cache_size, max_points=max_points)
+        self.df = df
+        self.decimation = decimation
+        self.category_filters = resolve_filters(CATEGORY_FILTERS, df.columns)
+        self.range_filters = [(col, label) for col, label in RANGE_FILTERS
+                              if col in df.columns and pd.api.types.is_numeric_dtype(df[col])]
+        self.has_proto = "proto" in df.columns
+        self.has_attack_cat = "attack_cat" in df.columns
+
+        self.index = BitmapIndex(df, [col for col, _ in self.category_filters],
+                                 [col for col, _ in self.range_filters])
+        self.protocols = self.index.values("proto")
+        self._totals = {col: self.index.counts(col) for col in ("proto", "attack_cat")}
+        logging.info("Dashboard store ready: %d rows, %d protocols.", len(df), len(self.protocols))
+
+        self._index = df.index.to_numpy()
+        self._index_sorted = df.index.is_monotonic_increasing
+        self._sbytes = df["sbytes"].to_numpy(dtype=np.float64) if "sbytes" in df.columns else None
+
+        self._selection = lru_cache(maxsize=cache_size)(self._build_selection)
+
+    def options(self, column):
+        """Return the values offered by the multi-select filter of a column."""
+        return self.index.values(column)
+
+    def bounds(self, column):
+        """Return the (min, max) of a range filter column."""
+        return self.index.bounds(column)
+
+    def _build_selection(self, key):
+        """Return the bitset of rows matching a filter key, or None when nothing is filtered."""
+        if key == NO_FILTERS:
+            return None
+        return self.index.select(*key)
+
+    def rows(self, key=NO_FILTERS):
+        """Return the rows matching a filter key."""
+        bitset = self._selection(key)
+        return self.df if bitset is None else self.df.iloc[self.index.rows(bitset)]
+
+    def counts(self, column, key=NO_FILTERS):
+        """Return the non-zero value counts of a categorical column under a filter key."""
+        bitset = self._selection(key)
+        if bitset is None and column in self._totals:
+            return self._totals[column]
+        return self.index.counts(column, bitset)
+
+    def series_points(self, key=NO_FILTERS, x_range=None):
+        """
+        Return the decimated (x, y) points of the sbytes series for a filter key and
+        optional row range, or None when the dataset has no sbytes column.
+        """
+        if self._sbytes is None:
+            return None
+        bitset = self._selection(key)
+        if bitset is None:
+            x, y = self._index, self._sbytes
+        else:
+            positions = self.index.rows(bitset)
+            x, y = self._index[positions], self._sbytes[positions]
+        if x_range is not None:
+            if self._index_sorted:
+                start = np.searchsorted(x, x_range[0], side="left")
+                end = np.searchsorted(x, x_range[1], side="right")
+                x, y = x[start:end], y[start:end]
+            else:
+                visible = (x >= x_range[0]) & (x <= x_range[1])
+                x, y = x[visible], y[visible]
+        return decimate(x, y, self.max_points, method=self.decimation)
@@ -1,23 +1,39 @@
 import os
 import logging
 import pandas as pd
-import matplotlib.pyplot as plt
+from schema import schema_from_features, compact_dtypes, GROUND_TRUTH_SCHEMA
+from column_cache import read_csv_cached
+from join_keys import merge_on_composite_key, MAIN_KEY_COLUMNS, GT_KEY_COLUMNS
+from parallel_ingest import resolve_input_files, merge_files_parallel
+from instrumentation import stage
 
-def load_and_merge_data(main_filepath, gt_filepath, features_filepath):
+def load_and_merge_data(main_filepath, gt_filepath, features_filepath, n_workers=None):
     """
     Load the main dataset using column names from the features file,
     then merge it with the ground truth table.
+
+    When several main files are given (e.g. UNSW-NB15_1.csv ... UNSW-NB15_4.csv), or
+    n_workers > 1, the files are split into byte ranges that are parsed and joined in
+    parallel worker processes and concatenated in order (see merge_files_parallel).
     
     Args:
-        main_filepath (str): Path to the main dataset CSV file.
+        main_filepath (str or list): Path to the main dataset CSV file, a glob pattern,
+            or a list of paths/patterns.
         gt_filepath (str): Path to the ground truth CSV file.
         features_filepath (str): Path to the features CSV file containing column metadata.
+        n_workers (int): Worker processes. Defaults to the CPU count for multi-file input
+            and to a single process for one file.
     
     Returns:
         pd.DataFrame: Merged and cleaned dataset.
     """
+    main_paths = resolve_input_files(main_filepath)
+    if not main_paths:
+        logging.error("Main data file %s not found.", main_filepath)
+        return pd.DataFrame()
+
     # Check for file existence
-    for path, desc in [(main_filepath, "Main data file"), (gt_filepath, "Ground truth file"), 
+    for path, desc in [(p, "Main data file") for p in main_paths] + [(gt_filepath, "Ground truth file"),
                        (features_filepath, "Features file")]:
         if not os.path.exists(path):
             logging.error(f"{desc} {path} not found.")
@@ -36,47 +52,68 @@ def load_and_merge_data(main_filepath, gt_filepath, features_filepath):
         return pd.DataFrame()
     unsw_columns = features_df["Name"].tolist()
     logging.info("Loaded feature names from features file: %s", unsw_columns)
-    
-    # Load the main dataset using these column names.
-    logging.info("Loading main dataset from %s", main_filepath)
     try:
-        df_main = pd.read_csv(main_filepath, header=None, names=unsw_columns, low_memory=False)
-    except Exception as e:
-        logging.error("Error reading main dataset: %s", e)
+        schema = schema_from_features(features_df)
+    except ValueError as e:
+        logging.error("Error reading feature types: %s", e)
         return pd.DataFrame()
 
-    # Load the ground truth data.
-    logging.info("Loading ground truth data from %s", gt_filepath)
-    try:
-        df_gt = pd.read_csv(gt_filepath, low_memory=False)
-    except Exception as e:
-        logging.error("Error reading ground truth data: %s", e)
-        return pd.DataFrame()
+    if len(main_paths) > 1 or (n_workers or 1) > 1:
+        # Parse, type and join byte ranges of the capture files in parallel worker processes.
+        try:
+            with stage("merge", files=len(main_paths)) as timer:
+                df_merged = merge_files_parallel(main_paths, gt_filepath, unsw_columns, schema, n_workers)
+                timer.rows = len(df_merged)
+        except Exception as e:
+            logging.error("Error ingesting main dataset files: %s", e)
+            return pd.DataFrame()
+    else:
+        main_filepath = main_paths[0]
+        # Load the main dataset using these column names (typed by the schema and cached on disk).
+        logging.info("Loading main dataset from %s", main_filepath)
+        try:
+            with stage("csv_load", file=os.path.basename(main_filepath)) as timer:
+                df_main = read_csv_cached(main_filepath, schema=schema, header=None, names=unsw_columns)
+                timer.rows = len(df_main)
+        except Exception as e:
+            logging.error("Error reading main dataset: %s", e)
+            return pd.DataFrame()
 
-    # Debug: Print column names from both datasets.
-    logging.info("Main dataset columns after renaming: %s", df_main.columns.tolist())
-    logging.info("Ground truth columns: %s", df_gt.columns.tolist())
+        # Load the ground truth data.
+        logging.info("Loading ground truth data from %s", gt_filepath)
+        try:
+            with stage("csv_load", file=os.path.basename(gt_filepath)) as timer:
+                df_gt = read_csv_cached(gt_filepath, schema=GROUND_TRUTH_SCHEMA)
+                timer.rows = len(df_gt)
+        except Exception as e:
+            logging.error("Error reading ground truth data: %s", e)
+            return pd.DataFrame()
 
-    # Define the composite key for merging.
-        # Define the composite key for merging
-    merge_columns_main = ["srcip", "sport", "dstip", "dsport", "proto"]
-    merge_columns_gt = ["Source IP", "Source Port", "Destination IP", "Destination Port", "Protocol"]
+        # Debug: Print column names from both datasets.
+        logging.info("Main dataset columns after renaming: %s", df_main.columns.tolist())
+        logging.info("Ground truth columns: %s", df_gt.columns.tolist())
 
-    # Ensure merge key columns are of the same type (convert to string)
-    for col in merge_columns_main:
-        df_main[col] = df_main[col].astype(str)
-    for col in merge_columns_gt:
-        df_gt[col] = df_gt[col].astype(str)
+        # Join on the composite 5-tuple key, packed into fixed-width integers.
+        logging.info("Merging main dataset with ground truth on composite key: %s (main) and %s (gt)",
+                     MAIN_KEY_COLUMNS, GT_KEY_COLUMNS)
+        try:
+            with stage("merge", files=1) as timer:
+                df_merged = merge_on_composite_key(df_main, df_gt)
+                timer.rows = len(df_merged)
+        except ValueError as e:
+            logging.error("Error merging main dataset with ground truth: %s", e)
+            return pd.DataFrame()
 
-    logging.info("Merging main dataset with ground truth on composite key: %s (main) and %s (gt)",
-                 merge_columns_main, merge_columns_gt)
-    df_merged = pd.merge(df_main, df_gt, left_on=merge_columns_main, right_on=merge_columns_gt, how='inner')
     logging.info("Merged dataset shape: %s", df_merged.shape)
 
     # Clean the merged data.
-    df_merged.drop_duplicates(inplace=True)
-    df_merged.fillna(method='ffill', inplace=True)
-    logging.info("Data cleaning complete. Final dataset shape: %s", df_merged.shape)
+    with stage("clean", rows=len(df_merged)):
+        df_merged.drop_duplicates(inplace=True)
+        df_merged.ffill(inplace=True)
+        logging.info("Data cleaning complete. Final dataset shape: %s", df_merged.shape)
+
+        # Store nominal fields as categoricals, IPs/ports packed and counters narrowed.
+        df_merged, _ = compact_dtypes(df_merged, schema, inplace=True)
 
     return df_merged
 
@@ -88,20 +125,26 @@ def exploratory_data_analysis(df):
         - Time Series Plot (if 'timestamp' and 'traffic_volume' exist)
         - Bar Chart (if 'event_type' exists)
         - Pie Chart (if 'attack_category' exists)
+
+    The input frame is not modified. For datasets on disk, eda.run_eda computes the same
+    statistics in one streaming pass and caches the report.
     """
     if df.empty:
         logging.warning("Empty dataset provided to EDA. Skipping analysis.")
         return
 
-    stats = df.describe()
+    with stage("eda", rows=len(df)):
+        stats = df.describe()
     logging.info("Data Summary:\n%s", stats)
 
+    import matplotlib.pyplot as plt
+
     # Time Series Example (if applicable)
     if 'timestamp' in df.columns and 'traffic_volume' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.sort_values('timestamp', inplace=True)
+        traffic = df[['timestamp', 'traffic_volume']].assign(timestamp=pd.to_datetime(df['timestamp']))
+        traffic = traffic.sort_values('timestamp')
         plt.figure(figsize=(10, 6))
-        plt.plot(df['timestamp'], df['traffic_volume'], label='Traffic Volume')
+        plt.plot(traffic['timestamp'], traffic['traffic_volume'], label='Traffic Volume')
         plt.xlabel('Time')
         plt.ylabel('Traffic Volume')
         plt.title('Network Traffic Over Time')
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+def minmax_decimate(y, max_points):
+    """
+    Select the positions of a shape-preserving subset of a series using min/max bucketing.
+
+    The series is split into max_points // 2 equal-width buckets and the minimum and the
+    maximum of every bucket are kept, so spikes (the interesting part of traffic plots)
+    survive no matter how aggressively the series is reduced. Fully vectorized.
+
+    Args:
+        y (array-like): Values of the series, in x order.
+        max_points (int): Upper bound on the number of positions returned.
+
+    Returns:
+        np.ndarray: Sorted int64 positions into y.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    bucket_size = -(-n // max(max_points // 2, 1))
+    n_buckets = -(-n // bucket_size)
+    pad = n_buckets * bucket_size - n
+    low = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)]).reshape(n_buckets, bucket_size)
+    high = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)]).reshape(n_buckets, bucket_size)
+    offsets = np.arange(n_buckets) * bucket_size
+    positions = np.concatenate([offsets + low.argmin(axis=1), offsets + high.argmax(axis=1)])
+    return np.unique(positions)
+
+
+def lttb_decimate(x, y, max_points):
+    """
+    Select the positions of a subset of a series with Largest-Triangle-Three-Buckets.
+
+    LTTB keeps one point per bucket, choosing the point that forms the largest triangle
+    with the previously kept point and the average of the next bucket. It gives smoother
+    results than min/max bucketing at the cost of a Python loop over buckets.
+
+    Args:
+        x (array-like): Sorted x values.
+        y (array-like): Values of the series.
+        max_points (int): Number of positions to return (at least 3).
+
+    Returns:
+        np.ndarray: Sorted int64 positions into x/y.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    positions = np.empty(max_points, dtype=np.int64)
+    positions[0], positions[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax())
+        positions[i + 1] = previous
+    return positions
+
+
+def decimate(x, y, max_points, method="minmax"):
+    """
+    Reduce a series to at most max_points points.
+
+    Args:
+        x (array-like): Sorted x values.
+        y (array-like): Values of the series.
+        max_points (int): Upper bound on the number of points.
+        method (str): "minmax" (default, vectorized) or "lttb".
+
+    Returns:
+        tuple: (x, y) arrays of the kept points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == "lttb":
+        positions = lttb_decimate(x, y, max_points)
+    elif method == "minmax":
+        positions = minmax_decimate(y, max_points)
+    else:
+        raise ValueError(f"Unknown decimation method: {method}")
+    return x[positions], y[positions]
@@ -0,0 +1,146 @@
+import logging
+import numpy as np
+import pandas as pd
+from dashboard_store import (ChartStore, resolve_filters, CATEGORY_FILTERS, RANGE_FILTERS, NO_FILTERS,
+                             FIGURE_CACHE_SIZE, MAX_SERIES_POINTS)
+
+
+def _quote(column):
+    """Quote a column name for use in SQL."""
+    return '"' + str(column).replace('"', '""') + '"'
+
+
+class DuckDBStore(ChartStore):
+    """
+    Dashboard backend that queries a columnar file on disk instead of a resident DataFrame.
+
+    Filters, group-bys and the time series decimation run inside an embedded DuckDB
+    engine over the Parquet file (e.g. the columnar cache written by column_cache), and
+    only aggregated results are pulled into Python. Each worker process therefore holds
+    the small query results and figure cache instead of a copy of the dataset, and
+    datasets larger than one worker's RAM can be served.
+
+    The row index used as the time axis is the row number within the Parquet file,
+    which matches the index of the DataFrame the file was written from.
+
+    Args:
+        parquet_path (str): Parquet file (or glob of files) holding the dataset.
+        cache_size (int): Maximum number of cached figure sets.
+        max_points (int): Maximum number of points in the time series chart.
+        threads (int): Optional limit on DuckDB worker threads per process.
+        metadata (dict): Optional result of metadata() for this file; skips the startup
+                         queries for the columns, filter options and bounds.
+        initial_figures (tuple): Optional precomputed figures for the unfiltered view.
+    """
+
+    def __init__(self, parquet_path, cache_size=FIGURE_CACHE_SIZE, max_points=MAX_SERIES_POINTS, threads=None,
+                 metadata=None, initial_figures=None):
+        import duckdb
+        super().__init__(cache_size=cache_size, max_points=max_points, initial_figures=initial_figures)
+        self._con = duckdb.connect(database=":memory:")
+        if threads:
+            self._con.execute(f"SET threads TO {int(threads)}")
+        # Views cannot take prepared parameters, so the path is embedded as a quoted literal.
+        path_literal = "'" + str(parquet_path).replace("'", "''") + "'"
+        self._con.execute(
+            "CREATE VIEW flows AS SELECT *, file_row_number AS __row_id "
+            f"FROM read_parquet({path_literal}, file_row_number = true)")
+        if metadata is not None:
+            self._load_metadata(metadata)
+            logging.info("DuckDB dashboard store ready over %s (precomputed metadata).", parquet_path)
+            return
+        columns = {row[0]: row[1] for row in self._con.execute("DESCRIBE flows").fetchall()}
+        numeric = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                   "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "DECIMAL")
+        self.category_filters = resolve_filters(CATEGORY_FILTERS, columns)
+        self.range_filters = [(col, label) for col, label in RANGE_FILTERS
+                              if col in columns and columns[col].startswith(numeric)]
+        self.has_proto = "proto" in columns
+        self.has_attack_cat = "attack_cat" in columns
+        self.has_sbytes = "sbytes" in columns
+
+        # Filter options and bounds are small and fixed, so fetch them once.
+        self._options = {col: [row[0] for row in self._query(
+            f"SELECT DISTINCT {_quote(col)} FROM flows WHERE {_quote(col)} IS NOT NULL ORDER BY 1")]
+            for col, _ in self.category_filters}
+        self._bounds = {}
+        for col, _ in self.range_filters:
+            low, high = self._query(f"SELECT min({_quote(col)}), max({_quote(col)}) FROM flows")[0]
+            self._bounds[col] = (low or 0, high or 0)
+        self.protocols = self._options.get("proto", [])
+        logging.info("DuckDB dashboard store ready over %s (%d protocols).", parquet_path, len(self.protocols))
+
+    def metadata(self):
+        """Return the filter columns, options and bounds as a JSON-serializable dict."""
+        return {"category_filters": self.category_filters, "range_filters": self.range_filters,
+                "has_proto": self.has_proto, "has_attack_cat": self.has_attack_cat, "has_sbytes": self.has_sbytes,
+                "options": self._options, "bounds": self._bounds}
+
+    def _load_metadata(self, metadata):
+        self.category_filters = [tuple(item) for item in metadata["category_filters"]]
+        self.range_filters = [tuple(item) for item in metadata["range_filters"]]
+        self.has_proto = metadata["has_proto"]
+        self.has_attack_cat = metadata["has_attack_cat"]
+        self.has_sbytes = metadata["has_sbytes"]
+        self._options = dict(metadata["options"])
+        self._bounds = {col: tuple(bounds) for col, bounds in metadata["bounds"].items()}
+        self.protocols = self._options.get("proto", [])
+
+    def _query(self, sql, params=None):
+        # A cursor per query gives each Dash request thread its own connection handle.
+        return self._con.cursor().execute(sql, params or []).fetchall()
+
+    def options(self, column):
+        """Return the values offered by the multi-select filter of a column."""
+        return self._options.get(column, [])
+
+    def bounds(self, column):
+        """Return the (min, max) of a range filter column."""
+        return self._bounds[column]
+
+    def _where(self, key, x_range=None):
+        """Translate a filter key (and optional row range) into a WHERE clause and parameters."""
+        selections, ranges = key
+        clauses, params = [], []
+        for column, values in selections:
+            clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        for column, (low, high) in ranges:
+            clauses.append(f"{_quote(column)} BETWEEN ? AND ?")
+            params.extend([low, high])
+        if x_range is not None:
+            clauses.append("__row_id BETWEEN ? AND ?")
+            params.extend([max(int(x_range[0]), 0), max(int(x_range[1]), 0)])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def counts(self, column, key=NO_FILTERS):
+        """Return the non-zero value counts of a categorical column under a filter key."""
+        where, params = self._where(key)
+        rows = self._query(f"SELECT {_quote(column)}, count(*) AS n FROM flows{where} "
+                           f"GROUP BY 1 HAVING {_quote(column)} IS NOT NULL ORDER BY n DESC", params)
+        return pd.Series({value: count for value, count in rows}, dtype="int64")
+
+    def series_points(self, key=NO_FILTERS, x_range=None):
+        """
+        Return the (x, y) points of the sbytes series for a filter key and optional row
+        range, reduced inside DuckDB with min/max bucketing over the row number.
+        """
+        if not self.has_sbytes:
+            return None
+        where, params = self._where(key, x_range)
+        n, low, high = self._query(f"SELECT count(*), min(__row_id), max(__row_id) FROM flows{where}", params)[0]
+        if n <= self.max_points:
+            rows = self._query(f"SELECT __row_id, sbytes FROM flows{where} ORDER BY 1", params)
+        else:
+            buckets = max(self.max_points // 2, 1)
+            width = (high - low + 1) / buckets
+            rows = self._query(
+                f"SELECT unnest([arg_min(__row_id, sbytes), arg_max(__row_id, sbytes)]) AS x, "
+                f"unnest([min(sbytes), max(sbytes)]) AS y "
+                f"FROM flows{where} GROUP BY floor((__row_id - {int(low)}) / {width}) ORDER BY x",
+                params)
+        x = np.array([row[0] for row in rows], dtype=np.int64)
+        y = np.array([row[1] for row in rows], dtype=np.float64)
+        # A bucket whose min and max fall on the same row yields the same point twice.
+        x, unique = np.unique(x, return_index=True)
+        return x, y[unique]
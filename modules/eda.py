@@ -0,0 +1,176 @@
+import os
+import glob
+import json
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from column_cache import file_fingerprint, CACHE_DIRNAME
+from parallel_ingest import resolve_input_files
+from streaming_stats import StreamingStats, QuantileSketch, stats_for_file
+from instrumentation import stage
+
+# Bump when the report layout or the statistics change so cached reports are recomputed.
+REPORT_VERSION = 2
+# Categories shown in the frequency charts.
+TOP_CATEGORIES = 20
+
+
+def _report_path(paths, schema, chunk_rows, read_kwargs):
+    """Report file next to the first input, keyed by the input fingerprints and the settings."""
+    payload = json.dumps({"version": REPORT_VERSION, "sources": [file_fingerprint(p) for p in paths],
+                          "schema": schema or {}, "chunk_rows": chunk_rows, "read": read_kwargs},
+                         sort_keys=True, default=str)
+    key = hashlib.sha256(payload.encode()).hexdigest()[:16]
+    directory = os.path.join(os.path.dirname(os.path.abspath(paths[0])), CACHE_DIRNAME)
+    return os.path.join(directory, f"{os.path.basename(paths[0])}.eda.{key}.json")
+
+
+def _render_histogram(column, sketch_state, output_path):
+    """Worker task: plot the bucket counts of a quantile sketch as a histogram."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    sketch = QuantileSketch.from_dict(sketch_state)
+    points = sorted([(-sketch._value(i), c) for i, c in sketch.negative.items()]
+                    + ([(0.0, sketch.zero)] if sketch.zero else [])
+                    + [(sketch._value(i), c) for i, c in sketch.positive.items()])
+    fig, ax = plt.subplots(figsize=(8, 5))
+    if points:
+        ax.bar(range(len(points)), [c for _, c in points])
+        ticks = list(range(0, len(points), max(len(points) // 8, 1)))
+        ax.set_xticks(ticks, [f"{points[i][0]:.3g}" for i in ticks], rotation=45)
+    ax.set_xlabel(column)
+    ax.set_ylabel("Count")
+    ax.set_title(f"Distribution of {column}")
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+
+def _render_frequencies(column, frequencies, output_path, kind):
+    """Worker task: bar or pie chart of the most frequent values of a categorical column."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    top = list(frequencies.items())[:TOP_CATEGORIES]
+    fig, ax = plt.subplots(figsize=(8, 5) if kind == "bar" else (6, 6))
+    if kind == "pie":
+        ax.pie([c for _, c in top], labels=[v for v, _ in top], autopct='%1.1f%%')
+    else:
+        ax.bar(range(len(top)), [c for _, c in top])
+        ax.set_xticks(range(len(top)), [v for v, _ in top], rotation=45)
+        ax.set_xlabel(column)
+        ax.set_ylabel("Count")
+    ax.set_title(f"{column} Frequency" if kind == "bar" else f"{column} Distribution")
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+
+def _report_key(report):
+    """Short hash of the report contents, used to name the figures drawn from it."""
+    payload = json.dumps({"numeric": report["numeric"], "categorical": report["categorical"]},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def render_figures(report, output_dir, workers=None):
+    """
+    Render the EDA figures of a report in worker processes.
+
+    One histogram per numeric column, a bar chart per categorical column and a pie chart
+    of attack_cat. File names carry a hash of the report (e.g. hist_sbytes.<hash>.png),
+    so figures already drawn from the same statistics are not rendered again and figures
+    of an older report are replaced.
+
+    Returns:
+        list: Paths of the figures.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    key = _report_key(report)
+    tasks = []
+    for col, state in report["numeric"].items():
+        tasks.append((_render_histogram, (col, state["sketch"], os.path.join(output_dir, f"hist_{col}.{key}.png"))))
+    for col, state in report["categorical"].items():
+        kind = "pie" if col == "attack_cat" else "bar"
+        tasks.append((_render_frequencies, (col, state["frequencies"],
+                                            os.path.join(output_dir, f"{kind}_{col}.{key}.png"), kind)))
+    pending = [(function, args) for function, args in tasks if not os.path.exists(args[2])]
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(function, *args) for function, args in pending]:
+                future.result()
+    # Remove the figures of earlier reports for the same charts.
+    current = {os.path.basename(args[2]).rsplit(".", 2)[0]: args[2] for _, args in tasks}
+    for path in glob.glob(os.path.join(output_dir, "*.png")):
+        stem = os.path.basename(path).rsplit(".", 2)[0]
+        if stem in current and os.path.abspath(path) != os.path.abspath(current[stem]):
+            os.remove(path)
+    logging.info("Rendered %d figures in %s (%d already present).", len(pending), output_dir,
+                 len(tasks) - len(pending))
+    return [args[2] for _, args in tasks]
+
+
+def run_eda(filepaths, schema=None, output_dir=None, chunk_rows=100_000, workers=None, **read_kwargs):
+    """
+    Streaming exploratory data analysis with a cached, machine-readable report.
+
+    Each input file is summarized in one chunked pass (in worker processes when there
+    are several files) and the mergeable partial statistics are combined. The report
+    is written as JSON to the ".cache" folder next to the data, keyed by the input
+    fingerprints, so re-running on unchanged inputs just loads it. Figures are then
+    rendered in worker processes when output_dir is given.
+
+    Args:
+        filepaths (str or list): CSV file(s) or glob pattern(s).
+        schema (dict): Optional schema from load_feature_schema.
+        output_dir (str): Directory for the PNG figures; None skips rendering.
+        chunk_rows (int): Rows per chunk.
+        workers (int): Worker processes for the statistics and the figures.
+        **read_kwargs: Extra keyword arguments for pd.read_csv (e.g. header, names).
+
+    Returns:
+        dict or None: The report ("rows", "numeric", "categorical", "sources"), or None
+                      if the inputs could not be read.
+    """
+    paths = resolve_input_files(filepaths)
+    if not paths:
+        logging.error("No files match %s", filepaths)
+        return None
+    report_path = _report_path(paths, schema, chunk_rows, read_kwargs)
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            report = json.load(f)
+        logging.info("Loaded cached EDA report %s", report_path)
+    else:
+        timer = stage("eda", files=len(paths))
+        try:
+            with timer:
+                if len(paths) == 1:
+                    parts = [stats_for_file(paths[0], schema, chunk_rows, **read_kwargs)]
+                else:
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        futures = [pool.submit(stats_for_file, p, schema, chunk_rows, **read_kwargs)
+                                   for p in paths]
+                        parts = [future.result() for future in futures]
+                stats = parts[0]
+                for part in parts[1:]:
+                    stats.merge(part)
+                timer.rows = stats.rows
+        except (OSError, ValueError) as e:
+            logging.error("Error computing EDA statistics: %s", e)
+            return None
+        report = dict(stats.to_dict(), sources=paths)
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path + ".tmp", "w") as f:
+            json.dump(report, f, default=str)
+        os.replace(report_path + ".tmp", report_path)
+        logging.info("Data Summary:\n%s", StreamingStats.from_dict(report, schema).summary())
+        logging.info("EDA report written to %s", report_path)
+
+    if output_dir:
+        with stage("eda_figures"):
+            render_figures(report, output_dir, workers)
+    return report
@@ -0,0 +1,241 @@
+import os
+import time
+import logging
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import accuracy_score
+from schema import stable_dtypes
+from parallel_ingest import resolve_input_files
+from model_registry import DEFAULT_REGISTRY_DIR
+from modeling import select_feature_columns, TARGET, HIST_GRADIENT_BOOSTING
+
+# Attack categories of UNSW-NB15; partial_fit needs every class up front.
+ATTACK_CATEGORIES = ['Normal', 'Generic', 'Exploits', 'Fuzzers', 'DoS', 'Reconnaissance',
+                     'Analysis', 'Backdoor', 'Shellcode', 'Worms']
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_CHECKPOINT_PATH = os.path.join(DEFAULT_REGISTRY_DIR, 'incremental', 'checkpoint.joblib')
+# Width of the hashed one-hot encoding of the categorical features.
+HASHED_FEATURES = 256
+
+
+class IncrementalModel:
+    """
+    Linear attack category classifier that can be updated one chunk at a time.
+
+    Every piece keeps constant-size state, so a chunk can be folded in without seeing
+    the earlier ones again. Numeric features are compressed with a signed log1p (byte
+    and packet counters span many orders of magnitude) and standardized with a running
+    mean and variance. Categorical features are one-hot encoded through the hashing
+    trick, so protocols or services that appear later in the stream need no refit.
+    The classifier is an SGDClassifier with logistic loss.
+
+    Args:
+        numeric (list): Numeric feature columns.
+        categorical (list): Categorical feature columns.
+        classes (list): Every class the stream may contain.
+        random_state (int): Seed for the classifier and the per-chunk shuffles.
+        **sgd_params: Extra SGDClassifier parameters (e.g. alpha).
+    """
+
+    def __init__(self, numeric, categorical, classes=ATTACK_CATEGORIES, random_state=42, **sgd_params):
+        self.numeric = list(numeric)
+        self.categorical = list(categorical)
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.feature_names_in_ = np.asarray(self.categorical + self.numeric, dtype=object)
+        self.scaler = StandardScaler()
+        self.hasher = FeatureHasher(n_features=HASHED_FEATURES, input_type="string", alternate_sign=False)
+        self.classifier = SGDClassifier(loss="log_loss", random_state=random_state, **sgd_params)
+        self.rng = np.random.default_rng(random_state)
+        self.rows_seen = 0
+        self.history = []
+
+    def _numeric_matrix(self, df):
+        # Values that are not numbers (e.g. the blank entries of ct_ftp_cmd) count as missing.
+        X = df.reindex(columns=self.numeric).apply(pd.to_numeric, errors="coerce")
+        X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.sign(X) * np.log1p(np.abs(X))
+
+    def _transform(self, df, X_numeric):
+        X = self.scaler.transform(X_numeric) if self.numeric else np.empty((len(df), 0))
+        X = np.nan_to_num(X, nan=0.0, posinf=0.0, neginf=0.0)
+        if not self.categorical:
+            return X
+        columns = df.reindex(columns=self.categorical)
+        tokens = list(zip(*[(col + "=" + columns[col].astype(str)).tolist() for col in self.categorical]))
+        return np.hstack([X, self.hasher.transform(tokens).toarray()])
+
+    def partial_fit(self, df, y):
+        """
+        Update the model with one chunk. Rows whose label is not in classes_ are dropped.
+
+        Returns:
+            int: Number of rows used.
+        """
+        y = np.asarray(y, dtype=object)
+        known = np.isin(y, self.classes_)
+        if not known.all():
+            logging.warning("Dropping %d rows with unknown attack categories: %s",
+                            int((~known).sum()), sorted(set(map(str, y[~known])))[:10])
+            df, y = df[known], y[known]
+        if not len(y):
+            return 0
+        order = self.rng.permutation(len(y))
+        df, y = df.iloc[order], y[order]
+        X_numeric = self._numeric_matrix(df)
+        if self.numeric:
+            self.scaler.partial_fit(X_numeric)
+        self.classifier.partial_fit(self._transform(df, X_numeric), y, classes=self.classes_)
+        self.rows_seen += len(y)
+        return len(y)
+
+    def predict(self, df):
+        """Predict attack categories for a DataFrame holding the feature columns."""
+        return self.classifier.predict(self._transform(df, self._numeric_matrix(df)))
+
+
+def _clean_labels(series):
+    """Strip the attack categories; blank ones mark normal traffic in the raw captures."""
+    labels = series.astype(object).where(series.notna(), "Normal").astype(str).str.strip()
+    return labels.replace("", "Normal").to_numpy(dtype=object)
+
+
+def _file_stats(path):
+    """Size and modification time of a training file, used to detect a changed stream."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _save_checkpoint(path, model, position, chunk_rows, sources):
+    """
+    Atomically write the model and the stream position it has consumed.
+
+    The position is a list of (file, chunk index) pairs, which only identify the same
+    rows for the same chunk_rows and unchanged files, so both are stored with it.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    files = {file for file, _ in position}
+    joblib.dump({"model": model, "position": position, "chunk_rows": chunk_rows,
+                 "sources": {file: stats for file, stats in sources.items() if file in files}}, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _checkpoint_mismatch(state, chunk_rows):
+    """
+    Return why a checkpoint cannot be resumed with this chunk size and these files,
+    or None if it can.
+    """
+    if state.get("chunk_rows") != chunk_rows:
+        return f"it was written with chunk_rows={state.get('chunk_rows')}, not {chunk_rows}"
+    sources = state.get("sources", {})
+    for file in {file for file, _ in state["position"]}:
+        if file not in sources:
+            return f"it does not record the size and mtime of {file}"
+        if os.path.exists(file) and _file_stats(file) != sources[file]:
+            return f"{file} has changed since"
+    return None
+
+
+def train_incremental_model(train_filepaths, test_data=None, schema=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                            checkpoint_path=DEFAULT_CHECKPOINT_PATH, checkpoint_every=1, resume=True,
+                            model=None, classes=ATTACK_CATEGORIES, **sgd_params):
+    """
+    Train (or keep training) the attack category classifier on a stream of CSV chunks.
+
+    The training files are read chunk_rows rows at a time, so memory is bounded by one
+    chunk plus the testing set, whatever the size of the stream. After every chunk the
+    model is scored on test_data and, every checkpoint_every chunks, written to
+    checkpoint_path together with the position reached in the stream. An interrupted
+    run resumes from the last checkpoint, and a new capture can be folded into an
+    existing model by passing it (or its checkpoint) with the new files. A checkpoint
+    written with another chunk_rows, or whose files have since changed size or
+    modification time, is not resumed: training restarts from the beginning.
+
+    Args:
+        train_filepaths (str or list): CSV file(s) or glob pattern(s), consumed in order.
+        test_data (pd.DataFrame): Optional testing set scored after every chunk.
+        schema (dict): Optional schema from load_feature_schema used to type the chunks
+                       (see schema.stable_dtypes) and so to fix the feature columns.
+        chunk_rows (int): Rows per chunk.
+        checkpoint_path (str): Checkpoint file; None disables checkpointing.
+        checkpoint_every (int): Chunks between checkpoints.
+        resume (bool): Continue from checkpoint_path if it exists.
+        model (IncrementalModel): Existing model to update instead of starting afresh.
+        classes (list): Every class the stream may contain.
+        **sgd_params: Extra SGDClassifier parameters for a new model.
+
+    Returns:
+        IncrementalModel: The updated model (per-chunk metrics in model.history), or None
+                          if no training data could be read.
+    """
+    paths = resolve_input_files(train_filepaths)
+    if not paths:
+        logging.error("No training files match %s", train_filepaths)
+        return None
+
+    done, sources = set(), {}
+    if resume and model is None and checkpoint_path and os.path.exists(checkpoint_path):
+        state = joblib.load(checkpoint_path)
+        mismatch = _checkpoint_mismatch(state, chunk_rows)
+        if mismatch:
+            logging.warning("Not resuming from %s because %s; training from the start.", checkpoint_path, mismatch)
+        else:
+            model, done, sources = state["model"], set(map(tuple, state["position"])), dict(state["sources"])
+            logging.info("Resuming from %s: %d rows seen, %d chunks done.", checkpoint_path, model.rows_seen,
+                         len(done))
+
+    X_test = y_test = None
+    chunk_index = 0
+    for path in paths:
+        try:
+            sources[os.path.abspath(path)] = _file_stats(path)
+            reader = pd.read_csv(path, chunksize=chunk_rows, low_memory=False)
+        except (OSError, ValueError) as e:
+            logging.error("Error reading %s: %s", path, e)
+            continue
+        with reader:
+            for file_chunk, chunk in enumerate(reader):
+                position = (os.path.abspath(path), file_chunk)
+                if position in done:
+                    continue
+                start = time.perf_counter()
+                if schema:
+                    # Same dtypes for every chunk, so the feature columns picked from the first
+                    # chunk follow the schema rather than whatever values that chunk holds.
+                    stable_dtypes(chunk, schema)
+                if TARGET not in chunk.columns:
+                    logging.error("Column '%s' is missing from %s.", TARGET, path)
+                    break
+                if model is None:
+                    categorical, numeric = select_feature_columns(chunk, HIST_GRADIENT_BOOSTING)
+                    model = IncrementalModel(numeric, categorical, classes=classes, **sgd_params)
+                    logging.info("Incremental model over %d numeric and %d categorical features.",
+                                 len(numeric), len(categorical))
+                used = model.partial_fit(chunk, _clean_labels(chunk[TARGET]))
+                done.add(position)
+                chunk_index += 1
+
+                record = {"file": path, "chunk": file_chunk, "rows": used, "rows_seen": model.rows_seen,
+                          "seconds": time.perf_counter() - start}
+                if test_data is not None:
+                    if y_test is None:
+                        X_test = test_data.reindex(columns=model.feature_names_in_)
+                        y_test = _clean_labels(test_data[TARGET])
+                    record["accuracy"] = accuracy_score(y_test, model.predict(X_test))
+                model.history.append(record)
+                logging.info("Chunk %d (%s #%d): %d rows in %.2fs, %d seen%s", chunk_index, os.path.basename(path),
+                             file_chunk, used, record["seconds"], model.rows_seen,
+                             f", test accuracy {record['accuracy']:.2%}" if "accuracy" in record else "")
+                if checkpoint_path and chunk_index % max(checkpoint_every, 1) == 0:
+                    _save_checkpoint(checkpoint_path, model, sorted(done), chunk_rows, sources)
+
+    if model is None:
+        logging.error("No training data could be read from %s", train_filepaths)
+        return None
+    if checkpoint_path:
+        _save_checkpoint(checkpoint_path, model, sorted(done), chunk_rows, sources)
+    return model
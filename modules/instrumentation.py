@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import logging
+import threading
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; RSS is then not recorded.
+    resource = None
+
+# Set PIPELINE_METRICS=1 (or call enable()) to record stage timings.
+METRICS_ENV = "PIPELINE_METRICS"
+METRICS_ROUTE = "/metrics"
+# Upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                   300.0)
+# Distinct label sets kept per stage; further ones are folded into one "other" series.
+MAX_SERIES_PER_STAGE = 500
+# Longest label value kept (filter selections can be long lists).
+MAX_LABEL_LENGTH = 80
+
+
+def _current_rss_bytes():
+    """Current RSS of the process (from /proc, so Linux only), or None where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _PeakTracker:
+    """
+    Per-stage peak RSS from the kernel's resettable high-water mark (Linux only).
+
+    Writing "5" to /proc/self/clear_refs resets VmHWM (cheaply; no page table walk), and
+    VmHWM in /proc/self/status is then the peak since that reset. Stages can nest or run
+    in several threads, so before every reset the current mark is folded into the peak
+    of every stage still running; a stage's peak is therefore the maximum RSS over its
+    whole run. The lifetime peak is tracked the same way, since the reset also lowers
+    ru_maxrss. Where /proc is unavailable, peaks are None.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self.lifetime = 0
+        self.available = os.path.exists("/proc/self/clear_refs")
+
+    def _high_water_mark(self):
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        self.available = False
+        return None
+
+    def _fold(self):
+        mark = self._high_water_mark()
+        if mark is not None:
+            self.lifetime = max(self.lifetime, mark)
+            for token in self._active:
+                self._active[token] = max(self._active[token], mark)
+
+    def start(self, token):
+        """Start tracking the peak of one stage run (token identifies it)."""
+        if not self.available:
+            return
+        with self._lock:
+            self._fold()
+            try:
+                with open("/proc/self/clear_refs", "w") as f:
+                    f.write("5")
+            except OSError:
+                self.available = False
+                return
+            self._active[token] = _current_rss_bytes() or 0
+
+    def stop(self, token):
+        """Return the peak RSS in bytes since start(token), or None if unknown."""
+        with self._lock:
+            if token not in self._active:
+                return None
+            self._fold()
+            return self._active.pop(token)
+
+
+_PEAKS = _PeakTracker()
+
+
+def _peak_rss_bytes():
+    """High-water mark of the process RSS since it started, or None where unavailable."""
+    if resource is None:
+        return _PEAKS.lifetime or None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak if os.uname().sysname == "Darwin" else peak * 1024
+    return max(peak, _PEAKS.lifetime)
+
+
+class _Series:
+    """Accumulated measurements of one (stage, labels) combination."""
+
+    __slots__ = ("count", "seconds", "rows", "buckets", "last_rows_per_second", "last_peak_rss")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.last_rows_per_second = 0.0
+        self.last_peak_rss = None
+
+
+class _Stage:
+    """Context manager timing one run of a stage. Set .rows to report throughput."""
+
+    __slots__ = ("registry", "name", "labels", "rows", "_start", "_rss")
+
+    def __init__(self, registry, name, labels, rows):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.rows = rows
+
+    def __enter__(self):
+        self._rss = _current_rss_bytes()
+        _PEAKS.start(id(self))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        self.registry.record(self.name, seconds, self.rows, self.labels, failed=exc_type is not None,
+                             rss_start=self._rss, stage_peak_rss=_PEAKS.stop(id(self)))
+        return False
+
+
+class _NoopStage:
+    """Shared stand-in returned by stage() while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of pipeline stage measurements.
+
+    Every finished stage adds its wall time to a latency histogram and its row count
+    to a counter, keyed by the stage name and its labels, and emits one structured
+    (JSON) log line with the wall time, rows, rows/sec, the peak RSS during the stage
+    (see _PeakTracker), the RSS at its end and its change over the stage, and the
+    process-lifetime peak RSS.
+    Metrics are per process; with several server workers, each exposes its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._series_per_stage = {}
+
+    def record(self, name, seconds, rows=None, labels=None, failed=False, rss_start=None, stage_peak_rss=None):
+        """
+        Record one run of a stage. rss_start is the RSS in bytes when the stage began and
+        stage_peak_rss the highest RSS during the stage.
+        """
+        labels = tuple(sorted((k, str(v)[:MAX_LABEL_LENGTH]) for k, v in (labels or {}).items()))
+        if failed:
+            labels += (("status", "error"),)
+        rss, peak_rss = _current_rss_bytes(), _peak_rss_bytes()
+        rows_per_second = rows / seconds if rows and seconds > 0 else 0.0
+        with self._lock:
+            key = (name, labels)
+            series = self._series.get(key)
+            if series is None:
+                if self._series_per_stage.get(name, 0) >= MAX_SERIES_PER_STAGE:
+                    key = (name, (("overflow", "other"),))
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _Series()
+                    self._series_per_stage[name] = self._series_per_stage.get(name, 0) + 1
+            series.count += 1
+            series.seconds += seconds
+            series.rows += rows or 0
+            if rows:
+                series.last_rows_per_second = rows_per_second
+            if stage_peak_rss is not None:
+                series.last_peak_rss = stage_peak_rss
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series.buckets[i] += 1
+                    break
+        record = {"stage": name, **dict(labels), "seconds": round(seconds, 6), "rows": rows,
+                  "rows_per_second": round(rows_per_second, 1)}
+        if stage_peak_rss is not None:
+            record["peak_rss_mb"] = round(stage_peak_rss / 1e6, 1)
+        if rss is not None:
+            record["rss_mb"] = round(rss / 1e6, 1)
+            if rss_start is not None:
+                record["rss_delta_mb"] = round((rss - rss_start) / 1e6, 1)
+        if peak_rss is not None:
+            record["process_peak_rss_mb"] = round(peak_rss / 1e6, 1)
+        logging.info("stage %s", json.dumps(record))
+
+    def snapshot(self):
+        """Return {(stage, labels): dict of count/seconds/rows/rows_per_second}."""
+        with self._lock:
+            return {key: {"count": s.count, "seconds": s.seconds, "rows": s.rows,
+                          "rows_per_second": s.last_rows_per_second, "peak_rss": s.last_peak_rss,
+                          "buckets": list(s.buckets)}
+                    for key, s in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._series_per_stage.clear()
+
+    def render_prometheus(self):
+        """Render the measurements in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = ["# HELP pipeline_stage_seconds Wall time of pipeline stages and dashboard callbacks.",
+                 "# TYPE pipeline_stage_seconds histogram"]
+        snapshot = self.snapshot()
+        for (name, labels), s in sorted(snapshot.items()):
+            base = (("stage", name),) + labels
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS, s["buckets"]):
+                cumulative += n
+                lines.append(f"pipeline_stage_seconds_bucket{label_text(base, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"pipeline_stage_seconds_bucket{label_text(base, [('le', '+Inf')])} {s['count']}")
+            lines.append(f"pipeline_stage_seconds_sum{label_text(base)} {s['seconds']}")
+            lines.append(f"pipeline_stage_seconds_count{label_text(base)} {s['count']}")
+        lines += ["# HELP pipeline_stage_rows_total Rows processed by pipeline stages.",
+                  "# TYPE pipeline_stage_rows_total counter"]
+        lines += [f"pipeline_stage_rows_total{label_text((('stage', name),) + labels)} {s['rows']}"
+                  for (name, labels), s in sorted(snapshot.items()) if s["rows"]]
+        lines += ["# HELP pipeline_stage_rows_per_second Throughput of the last run of a stage.",
+                  "# TYPE pipeline_stage_rows_per_second gauge"]
+        lines += [f"pipeline_stage_rows_per_second{label_text((('stage', name),) + labels)} {s['rows_per_second']}"
+                  for (name, labels), s in sorted(snapshot.items()) if s["rows"]]
+        lines += ["# HELP pipeline_stage_peak_rss_bytes Peak resident set size during the last run of a stage.",
+                  "# TYPE pipeline_stage_peak_rss_bytes gauge"]
+        lines += [f"pipeline_stage_peak_rss_bytes{label_text((('stage', name),) + labels)} {s['peak_rss']}"
+                  for (name, labels), s in sorted(snapshot.items()) if s["peak_rss"] is not None]
+        rss, peak_rss = _current_rss_bytes(), _peak_rss_bytes()
+        if rss is not None:
+            lines += ["# HELP process_resident_memory_bytes Current resident set size of this process.",
+                      "# TYPE process_resident_memory_bytes gauge",
+                      f"process_resident_memory_bytes {rss}"]
+        if peak_rss is not None:
+            lines += ["# HELP process_peak_rss_bytes Peak resident set size of this process since it started.",
+                      "# TYPE process_peak_rss_bytes gauge",
+                      f"process_peak_rss_bytes {peak_rss}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+_enabled = os.getenv(METRICS_ENV, "").lower() in ("1", "true", "yes", "on")
+
+
+def enable(value=True):
+    """Turn stage recording on or off for this process."""
+    global _enabled
+    _enabled = bool(value)
+
+
+def is_enabled():
+    return _enabled
+
+
+def stage(name, rows=None, **labels):
+    """
+    Time a pipeline stage.
+
+    Usage:
+        with stage("merge") as s:
+            df = merge(...)
+            s.rows = len(df)
+
+    While metrics are disabled this returns a shared no-op context manager, so the
+    cost is one function call and a flag check.
+
+    Args:
+        name (str): Stage name (csv_load, merge, clean, train, predict, eda, callback, ...).
+        rows (int): Rows processed, if known up front.
+        **labels: Extra labels (e.g. file, engine, callback, filter).
+    """
+    if not _enabled:
+        return _NOOP_STAGE
+    return _Stage(REGISTRY, name, labels, rows)
+
+
+def register_metrics_endpoint(server, route=METRICS_ROUTE):
+    """
+    Expose the metrics of this process on a Flask server in the Prometheus text format.
+
+    Args:
+        server (flask.Flask): Server to register the route on (e.g. dash_app.server).
+        route (str): URL of the endpoint.
+    """
+    from flask import Response
+
+    def metrics():
+        return Response(REGISTRY.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    server.add_url_rule(route, "metrics", metrics, methods=["GET"])
+    logging.info("Metrics endpoint %s registered (recording %s).", route, "on" if _enabled else "off")
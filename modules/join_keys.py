@@ -0,0 +1,192 @@
+import logging
+import numpy as np
+import pandas as pd
+from schema import parse_ipv4, parse_port
+
+# Composite key columns of the main dataset and the matching ground truth columns.
+MAIN_KEY_COLUMNS = ["srcip", "sport", "dstip", "dsport", "proto"]
+GT_KEY_COLUMNS = ["Source IP", "Source Port", "Destination IP", "Destination Port", "Protocol"]
+
+# Role of each key position, used to pick the encoding.
+KEY_ROLES = ("ip", "port", "ip", "port", "proto")
+
+# Bit layout of the 128-bit key, stored as two uint64 words:
+#   hi = srcip (32) | dstip (32)
+#   lo = [srcip is token][dstip is token] | sport (20) | dsport (20) | proto (12)
+PORT_BITS = 20
+PROTO_BITS = 12
+PORT_TOKEN_BASE = 1 << 16
+MAX_PORT_CODE = (1 << PORT_BITS) - 1
+MAX_PROTO_CODE = (1 << PROTO_BITS) - 1
+MAX_IP_TOKEN = (1 << 32) - 1
+SRCIP_TOKEN_FLAG = np.uint64(1 << 52)
+DSTIP_TOKEN_FLAG = np.uint64(1 << 53)
+
+
+def _as_text(value):
+    """String form of a key value, matching what Series.astype(str) produced for the old string merge."""
+    return "nan" if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+
+
+def _encode_value(role, value, packed_ip, vocab, grow):
+    """
+    Encode one distinct key value.
+
+    Encoding rules:
+      - IPv4 addresses in canonical dotted-quad form (or already packed as integers by
+        compact_dtypes) are stored as their 32-bit value.
+      - Ports in canonical decimal form are stored as their 16-bit value.
+      - Anything else (hex ports such as "0x000b", "-", IPv6, protocol names, ...) is
+        looked up in a token vocabulary built from the ground truth table. Hex ports are
+        deliberately not converted to decimal: "0x000b" and "11" were different keys in
+        the string merge and stay different here.
+
+    Returns:
+        tuple: (code, is_token), or (None, True) for a token that is unknown to the
+               vocabulary when grow is False (such a value cannot match any row).
+    """
+    if role == "ip" and packed_ip:
+        return int(value), False
+    text = _as_text(value)
+    if role == "ip":
+        parsed = parse_ipv4(text)
+    elif role == "port":
+        parsed = parse_port(text)
+    else:
+        parsed = None
+    if parsed is not None:
+        return parsed, False
+    code = vocab.get(text)
+    if code is None:
+        if not grow:
+            return None, True
+        code = vocab[text] = len(vocab)
+    return code, True
+
+
+def _encode_column(series, role, vocab, grow):
+    """
+    Encode a key column through its distinct values.
+
+    Returns:
+        tuple: (uint64 codes, bool token mask, bool unknown mask), one entry per row.
+    """
+    packed_ip = role == "ip" and pd.api.types.is_integer_dtype(series)
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    n = len(uniques)
+    encoded = np.zeros(n, dtype=np.uint64)
+    is_token = np.zeros(n, dtype=bool)
+    unknown = np.zeros(n, dtype=bool)
+    for i, value in enumerate(uniques):
+        code, token = _encode_value(role, value, packed_ip, vocab, grow)
+        if code is None:
+            unknown[i] = True
+            continue
+        if role == "port" and token:
+            code += PORT_TOKEN_BASE
+        encoded[i] = code
+        is_token[i] = token
+    limit = {"ip": MAX_IP_TOKEN, "port": MAX_PORT_CODE, "proto": MAX_PROTO_CODE}[role]
+    if n and encoded.max() > limit:
+        raise ValueError(f"Too many distinct non-numeric {role} values to pack into the join key.")
+    return encoded[codes], is_token[codes], unknown[codes]
+
+
+class CompositeKeyIndex:
+    """
+    Hash index over the ground truth table keyed by the packed 5-tuple.
+
+    The index is built once from the ground truth frame. Probing a main frame encodes
+    its key columns with the same vocabularies and returns the row pairs of the inner
+    join, in the same order as pd.merge(how='inner') on the stringified keys: main rows
+    in their original order, and for each main row its ground truth matches in their
+    original order.
+
+    Args:
+        df_gt (pd.DataFrame): The ground truth table.
+        key_columns (list): Ground truth key columns, in 5-tuple order.
+    """
+
+    def __init__(self, df_gt, key_columns=GT_KEY_COLUMNS):
+        self._vocabs = [{} for _ in KEY_ROLES]
+        hi, lo, unknown = self._encode(df_gt, key_columns, grow=True)
+        group_ids, keys = pd.MultiIndex.from_arrays([hi, lo]).factorize()
+        self._keys = keys
+        self._order = np.argsort(group_ids, kind="stable")
+        self._counts = np.bincount(group_ids, minlength=len(keys))
+        self._starts = np.concatenate([[0], np.cumsum(self._counts)[:-1]]).astype(np.int64)
+        logging.info("Built composite key index over %d ground truth rows (%d distinct keys).",
+                     len(df_gt), len(keys))
+
+    def _encode(self, df, key_columns, grow):
+        words = []
+        unknown = np.zeros(len(df), dtype=bool)
+        for col, role, vocab in zip(key_columns, KEY_ROLES, self._vocabs):
+            codes, is_token, missing = _encode_column(df[col], role, vocab, grow)
+            words.append((codes, is_token))
+            unknown |= missing
+        (src, src_token), (sport, _), (dst, dst_token), (dport, _), (proto, _) = words
+        hi = (src << np.uint64(32)) | dst
+        lo = (sport << np.uint64(32)) | (dport << np.uint64(PROTO_BITS)) | proto
+        lo |= np.where(src_token, SRCIP_TOKEN_FLAG, np.uint64(0))
+        lo |= np.where(dst_token, DSTIP_TOKEN_FLAG, np.uint64(0))
+        return hi, lo, unknown
+
+    def probe(self, df_main, key_columns=MAIN_KEY_COLUMNS):
+        """
+        Find the inner join row pairs between a main frame and the indexed ground truth.
+
+        Args:
+            df_main (pd.DataFrame): Frame to probe (a whole dataset or one chunk of it).
+            key_columns (list): Main key columns, in 5-tuple order.
+
+        Returns:
+            tuple: (left, right) int64 arrays of row positions into df_main and the
+                   ground truth frame, one entry per joined row.
+        """
+        hi, lo, unknown = self._encode(df_main, key_columns, grow=False)
+        group = self._keys.get_indexer(pd.MultiIndex.from_arrays([hi, lo]))
+        group[unknown] = -1
+        matched = np.flatnonzero(group >= 0)
+        group = group[matched]
+        counts = self._counts[group]
+        left = np.repeat(matched, counts)
+        # Position of each output row within its group of ground truth matches.
+        first_out = np.cumsum(counts) - counts
+        within = np.arange(len(left)) - np.repeat(first_out, counts)
+        right = self._order[np.repeat(self._starts[group], counts) + within]
+        return left.astype(np.int64), right.astype(np.int64)
+
+
+def join_on_index(df_main, df_gt, left, right, suffixes=("_x", "_y")):
+    """
+    Assemble the joined frame from the row pairs returned by CompositeKeyIndex.probe.
+    Overlapping column names get the same suffixes pd.merge would add.
+    """
+    overlap = set(df_main.columns) & set(df_gt.columns)
+    left_part = df_main.take(left).reset_index(drop=True)
+    right_part = df_gt.take(right).reset_index(drop=True)
+    if overlap:
+        left_part = left_part.rename(columns={c: f"{c}{suffixes[0]}" for c in overlap})
+        right_part = right_part.rename(columns={c: f"{c}{suffixes[1]}" for c in overlap})
+    return pd.concat([left_part, right_part], axis=1)
+
+
+def merge_on_composite_key(df_main, df_gt, index=None):
+    """
+    Inner-join the main dataset with the ground truth on the 5-tuple key.
+
+    Produces the same rows, in the same order, as the previous string-based
+    pd.merge, but the key columns keep their original dtypes.
+
+    Args:
+        df_main (pd.DataFrame): The main dataset.
+        df_gt (pd.DataFrame): The ground truth table.
+        index (CompositeKeyIndex): Optional prebuilt index over df_gt.
+
+    Returns:
+        pd.DataFrame: The joined dataset.
+    """
+    index = index or CompositeKeyIndex(df_gt)
+    left, right = index.probe(df_main)
+    return join_on_index(df_main, df_gt, left, right)
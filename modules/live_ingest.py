@@ -0,0 +1,365 @@
+import os
+import csv
+import time
+import socket
+import logging
+import threading
+import socketserver
+import numpy as np
+from schema import normalize_name
+from instrumentation import stage
+
+# Width of the event-time windows, in seconds.
+DEFAULT_WINDOW_SECONDS = 1
+# Windows kept per ring buffer (10 minutes of 1 s windows).
+DEFAULT_CAPACITY = 600
+# Distinct values counted per dimension; later ones share the "other" counter.
+DEFAULT_MAX_VALUES = 32
+# Windows a record may arrive late; a window is closed (and charted) after this many newer windows.
+DEFAULT_LATENESS_WINDOWS = 2
+# Records handed to the aggregator at once, and how long a partial batch may wait.
+BATCH_RECORDS = 5000
+BATCH_WAIT_S = 0.2
+POLL_INTERVAL_S = 0.2
+OTHER = "other"
+DIMENSIONS = ("proto", "attack_cat")
+
+
+class RollingWindowCounts:
+    """
+    Per-window flow counters over a bounded ring of event-time windows.
+
+    Each record is assigned to the window holding its start time (stime); ltime is not
+    used, so a long flow is counted once, in the window it started in. Every window
+    keeps a count per protocol and per attack category in a fixed-size ring buffer:
+    when event time moves past the oldest window, its slot is subtracted from the
+    running totals and reused. Memory is bounded by capacity x max_values, and adding
+    a batch or reading the totals costs time proportional to the batch and the number
+    of counters, never to the history.
+
+    A window is closed once lateness_windows newer windows have been seen, and closed
+    windows are never changed again: records that arrive for a closed window (it may
+    already be charted) are dropped, like records for windows that have left the ring,
+    so the totals always match the series. Both are counted in .dropped.
+
+    Args:
+        window_seconds (float): Width of a window.
+        capacity (int): Windows kept.
+        max_values (int): Distinct values counted per dimension before "other".
+        lateness_windows (int): Windows a record may arrive late.
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, capacity=DEFAULT_CAPACITY,
+                 max_values=DEFAULT_MAX_VALUES, lateness_windows=DEFAULT_LATENESS_WINDOWS):
+        self.window_seconds = window_seconds
+        self.capacity = int(capacity)
+        self.max_values = int(max_values)
+        self.lateness_windows = int(lateness_windows)
+        self._lock = threading.Lock()
+        self._window_ids = np.full(self.capacity, -1, dtype=np.int64)
+        self._flows = np.zeros(self.capacity, dtype=np.int64)
+        self._attacks = np.zeros(self.capacity, dtype=np.int64)
+        # Column max_values of each counter matrix is the "other" bucket.
+        self._counts = {dim: np.zeros((self.capacity, self.max_values + 1), dtype=np.int64) for dim in DIMENSIONS}
+        self._totals = {dim: np.zeros(self.max_values + 1, dtype=np.int64) for dim in DIMENSIONS}
+        self._codes = {dim: {} for dim in DIMENSIONS}
+        self.newest = None
+        self.oldest = None
+        self.records = 0
+        self.dropped = 0
+        self.version = 0
+
+    def _encode(self, dim, values):
+        codes = self._codes[dim]
+        out = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = len(codes) if len(codes) < self.max_values else self.max_values
+                if code < self.max_values:
+                    codes[value] = code
+            out[i] = code
+        return out
+
+    def _advance(self, newest):
+        """Move the ring forward to window newest, retiring the windows that fall out."""
+        start = newest - self.capacity + 1
+        if self.newest is not None:
+            start = max(start, self.newest + 1)
+        for window in range(start, newest + 1):
+            slot = window % self.capacity
+            if self._window_ids[slot] >= 0:
+                for dim in DIMENSIONS:
+                    self._totals[dim] -= self._counts[dim][slot]
+                    self._counts[dim][slot] = 0
+                self._flows[slot] = self._attacks[slot] = 0
+            self._window_ids[slot] = window
+        self.newest = newest
+
+    def add(self, event_times, protocols, categories):
+        """
+        Count a batch of flows.
+
+        Args:
+            event_times (array): Start times (epoch seconds).
+            protocols (list): Protocol of each flow.
+            categories (list): Attack category of each flow ("Normal" for normal traffic).
+
+        Returns:
+            int: Flows counted (records for closed windows are dropped).
+        """
+        windows = np.floor_divide(np.asarray(event_times, dtype=np.float64), self.window_seconds).astype(np.int64)
+        if not len(windows):
+            return 0
+        attacks = np.array([c != "Normal" for c in categories], dtype=bool)
+        with self._lock:
+            # Windows closed before this batch; the ones it closes itself are not charted yet.
+            closed = None if self.newest is None else self.newest - self.lateness_windows
+            newest = int(windows.max())
+            if self.newest is None or newest > self.newest:
+                self._advance(newest)
+            keep = windows > self.newest - self.capacity
+            if closed is not None:
+                keep &= windows > closed
+            self.dropped += int((~keep).sum())
+            windows, slots = windows[keep], windows[keep] % self.capacity
+            if len(windows):
+                oldest = int(windows.min())
+                self.oldest = oldest if self.oldest is None else min(self.oldest, oldest)
+            codes = {"proto": self._encode("proto", [p for p, k in zip(protocols, keep) if k]),
+                     "attack_cat": self._encode("attack_cat", [c for c, k in zip(categories, keep) if k])}
+            np.add.at(self._flows, slots, 1)
+            np.add.at(self._attacks, slots, attacks[keep].astype(np.int64))
+            for dim in DIMENSIONS:
+                np.add.at(self._counts[dim], (slots, codes[dim]), 1)
+                self._totals[dim] += np.bincount(codes[dim], minlength=self.max_values + 1)
+            self.records += len(windows)
+            self.version += 1
+        return len(windows)
+
+    def closed_since(self, cursor=None):
+        """
+        Return the closed windows after cursor, oldest first.
+
+        Args:
+            cursor (int): Last window already returned (None for everything in the ring).
+
+        Returns:
+            tuple: (window start times in epoch seconds, flows, attack flows, new cursor).
+        """
+        with self._lock:
+            if self.newest is None:
+                return [], [], [], cursor
+            closed = self.newest - self.lateness_windows
+            first = max(self.newest - self.capacity + 1, self.oldest)
+            if cursor is not None:
+                first = max(first, cursor + 1)
+            windows = np.arange(first, closed + 1, dtype=np.int64)
+            if not len(windows):
+                return [], [], [], cursor
+            slots = windows % self.capacity
+            valid = self._window_ids[slots] == windows
+            flows = np.where(valid, self._flows[slots], 0)
+            attacks = np.where(valid, self._attacks[slots], 0)
+        starts = (windows * self.window_seconds).tolist()
+        return starts, flows.tolist(), attacks.tolist(), int(windows[-1])
+
+    def totals(self, dim):
+        """Return {value: count} of a dimension over the windows in the ring, largest first."""
+        with self._lock:
+            counts = self._totals[dim].copy()
+            labels = {code: value for value, code in self._codes[dim].items()}
+        labels[self.max_values] = OTHER
+        return {labels[code]: int(counts[code]) for code in np.argsort(-counts, kind="stable") if counts[code] > 0}
+
+
+class FlowParser:
+    """
+    Parse UNSW-NB15 main-format lines (no header, features file column order).
+
+    Args:
+        names (list): Column names in file order (e.g. list(load_feature_schema(...))).
+    """
+
+    def __init__(self, names):
+        positions = {normalize_name(name): i for i, name in enumerate(names)}
+        missing = [col for col in ("stime", "proto", "attack_cat") if col not in positions]
+        if missing:
+            raise ValueError(f"Columns {missing} are missing from the flow format.")
+        self.width = len(names)
+        self._stime, self._proto, self._category = positions["stime"], positions["proto"], positions["attack_cat"]
+
+    def parse(self, lines):
+        """
+        Return (event times, protocols, attack categories) of the well-formed lines.
+
+        A blank attack category marks normal traffic; malformed lines are skipped.
+        """
+        times, protocols, categories = [], [], []
+        for row in csv.reader(lines):
+            if len(row) < self.width:
+                continue
+            try:
+                times.append(float(row[self._stime]))
+            except ValueError:
+                continue
+            protocols.append(row[self._proto].strip())
+            categories.append(row[self._category].strip() or "Normal")
+        return np.asarray(times, dtype=np.float64), protocols, categories
+
+
+class LiveIngestor:
+    """
+    Feed flow records from a file or a TCP socket into RollingWindowCounts.
+
+    Sources are given as "file:<path>" (the file is tailed like `tail -F`: new lines are
+    read as they are appended, and truncation or rotation is followed) or
+    "tcp:<host>:<port>" (clients connect and send newline-delimited records). Lines are
+    parsed and counted in batches on a background thread.
+
+    Args:
+        counts (RollingWindowCounts): Aggregator to update.
+        parser (FlowParser): Parser for the record format.
+        source (str): "file:<path>" or "tcp:<host>:<port>".
+        from_start (bool): Read a tailed file from the beginning instead of its end.
+    """
+
+    def __init__(self, counts, parser, source, from_start=False):
+        self.counts = counts
+        self.parser = parser
+        self.source = source
+        self.from_start = from_start
+        self._stop = threading.Event()
+        self._threads = []
+        self._server = None
+
+    def start(self):
+        kind, _, target = self.source.partition(":")
+        if kind == "file":
+            thread = threading.Thread(target=self._tail, args=(target,), name="live-tail", daemon=True)
+        elif kind == "tcp":
+            host, _, port = target.rpartition(":")
+            self._server = _LineServer((host or "127.0.0.1", int(port)), _LineHandler)
+            self._server.ingestor = self
+            thread = threading.Thread(target=self._server.serve_forever, name="live-socket", daemon=True)
+        else:
+            raise ValueError(f"Unknown live source {self.source!r}; use file:<path> or tcp:<host>:<port>.")
+        thread.start()
+        self._threads.append(thread)
+        logging.info("Live ingestion started from %s.", self.source)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def ingest(self, lines):
+        """Parse and count a batch of lines."""
+        with stage("live_ingest", rows=len(lines)):
+            times, protocols, categories = self.parser.parse(lines)
+            return self.counts.add(times, protocols, categories)
+
+    def _flush(self, pending, batch, deadline, final=False):
+        """Split complete lines off pending into batch and ingest it when due; returns the new state."""
+        lines = pending.split("\n")
+        pending = lines.pop() if not final else ""
+        batch.extend(line for line in lines if line.strip())
+        if batch and (final or len(batch) >= BATCH_RECORDS or time.monotonic() >= deadline):
+            self.ingest(batch)
+            batch = []
+        if not batch:
+            deadline = time.monotonic() + BATCH_WAIT_S
+        return pending, batch, deadline
+
+    def _tail(self, path):
+        handle, inode, pending, batch = None, None, "", []
+        deadline = time.monotonic() + BATCH_WAIT_S
+        # Only the file found at startup is read from its end; files appearing after a rotation are read in full.
+        seek_end = not self.from_start
+        while not self._stop.is_set():
+            if handle is None:
+                try:
+                    handle = open(path, "r", newline="")
+                except OSError:
+                    self._stop.wait(POLL_INTERVAL_S)
+                    seek_end = False
+                    continue
+                inode = os.fstat(handle.fileno()).st_ino
+                if seek_end:
+                    handle.seek(0, os.SEEK_END)
+                seek_end = False
+            chunk = handle.read(1 << 20)
+            # Without new data a partial batch is ingested right away.
+            pending, batch, deadline = self._flush(pending + chunk, batch, deadline if chunk else 0)
+            if chunk:
+                continue
+            # No new data: follow truncation and rotation, then wait.
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or stat.st_ino != inode:
+                handle.close()
+                handle, pending = None, ""
+            elif stat.st_size < handle.tell():
+                handle.seek(0)
+                pending = ""
+            else:
+                self._stop.wait(POLL_INTERVAL_S)
+        if handle is not None:
+            handle.close()
+
+
+class _LineServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _LineHandler(socketserver.BaseRequestHandler):
+    """Read newline-delimited records from one client connection."""
+
+    def handle(self):
+        ingestor = self.server.ingestor
+        self.request.settimeout(BATCH_WAIT_S)
+        pending, batch = "", []
+        deadline = time.monotonic() + BATCH_WAIT_S
+        while not ingestor._stop.is_set():
+            try:
+                data = self.request.recv(1 << 16)
+            except socket.timeout:
+                pending, batch, deadline = ingestor._flush(pending, batch, 0)
+                continue
+            except OSError:
+                break
+            if not data:
+                break
+            pending, batch, deadline = ingestor._flush(pending + data.decode("utf-8", errors="replace"), batch,
+                                                       deadline)
+        ingestor._flush(pending, batch, 0, final=True)
+
+
+def start_live_ingestion(source, features_filepath, from_start=False, **counts_params):
+    """
+    Start counting flows from a live source.
+
+    Args:
+        source (str): "file:<path>" or "tcp:<host>:<port>".
+        features_filepath (str): NUSW-NB15_features.csv, giving the column order of the records.
+        from_start (bool): Read a tailed file from the beginning.
+        **counts_params: RollingWindowCounts parameters (window_seconds, capacity, ...).
+
+    Returns:
+        LiveIngestor or None: The running ingestor (its .counts feed the dashboard), or
+                              None if the source could not be started.
+    """
+    from schema import load_feature_schema
+    try:
+        parser = FlowParser(list(load_feature_schema(features_filepath)))
+        return LiveIngestor(RollingWindowCounts(**counts_params), parser, source, from_start).start()
+    except (OSError, ValueError) as e:
+        logging.error("Could not start live ingestion from %s: %s", source, e)
+        return None
@@ -1,39 +1,132 @@
+import os
 import logging
-import pandas as pd
-from modeling import train_predictive_model
-from dashboard import build_dashboard
+from instrumentation import stage, register_metrics_endpoint
+from startup_snapshot import load_snapshot, create_snapshot_app, DEFAULT_SNAPSHOT_DIR
 from security import apply_security_measures
 
-def main():
-    # Apply security measures (if needed)
-    security_config = apply_security_measures()
+# Define file paths for the training and testing sets.
+TRAINING_SET_PATH = '../data/UNSW_NB15_training-set.csv'
+TESTING_SET_PATH  = '../data/UNSW_NB15_testing-set.csv'
+FEATURES_PATH     = '../data/NUSW-NB15_features.csv'
+
+def _create_full_app(live=None):
+    """Load the CSVs, train (or load) the model and build the dashboard from the DataFrame."""
+    # Heavy libraries (scikit-learn, plotly) are only imported on this path.
+    from schema import load_feature_schema, compact_dtypes
+    from column_cache import read_csv_cached, ensure_cache
+    from modeling import train_predictive_model, RANDOM_FOREST
+    from model_registry import ModelRegistry
+    from incremental_training import train_incremental_model
+    from dashboard import build_dashboard
+    from duckdb_store import DuckDBStore
+    from scoring import register_scoring_endpoint
+
+    # Columns used by the model and the dashboard; only these are read from the columnar cache.
+    train_columns = ['proto', 'service', 'state', 'sbytes', 'dbytes', 'spkts', 'attack_cat', 'label']
+    test_columns  = ['sbytes', 'dbytes', 'spkts', 'attack_cat']
+
+    # MODEL_ENGINE=hist_gradient_boosting trains on the full feature set, so read every column.
+    engine = os.getenv("MODEL_ENGINE", RANDOM_FOREST)
+    # TRAINING_MODE=incremental streams the training set in chunks into an online model.
+    incremental = os.getenv("TRAINING_MODE", "full") == "incremental"
+    if engine != RANDOM_FOREST or incremental:
+        train_columns = test_columns = None
+    # Cross-validation costs about (folds + 1) fits, so serving starts skip it unless MODEL_CV_FOLDS is set.
+    cv = int(os.getenv("MODEL_CV_FOLDS", "0"))
 
-    # Define file paths for the training and testing sets.
-    training_set_path = '../data/UNSW_NB15_training-set.csv'
-    testing_set_path  = '../data/UNSW_NB15_testing-set.csv'
-    
     # Load the training set and testing set.
     try:
-        df_train = pd.read_csv(training_set_path, low_memory=False)
-        df_test  = pd.read_csv(testing_set_path, low_memory=False)
+        schema = load_feature_schema(FEATURES_PATH)
+        with stage("csv_load", file=os.path.basename(TRAINING_SET_PATH)) as timer:
+            df_train = read_csv_cached(TRAINING_SET_PATH, columns=train_columns, schema=schema)
+            timer.rows = len(df_train)
+        with stage("csv_load", file=os.path.basename(TESTING_SET_PATH)) as timer:
+            df_test = read_csv_cached(TESTING_SET_PATH, columns=test_columns, schema=schema)
+            timer.rows = len(df_test)
     except Exception as e:
         logging.error("Error loading training or testing set: %s", e)
-        return
+        return None
+
+    # The dashboard keeps the training set in memory for its whole lifetime.
+    df_train, _ = compact_dtypes(df_train, schema, inplace=True)
 
     logging.info("Training set shape: %s", df_train.shape)
     logging.info("Testing set shape: %s", df_test.shape)
-    
+
     # Now, pass these dataframes to your model training function.
     # If your current train_predictive_model function expects a single dataframe,
     # you might update it to accept training and testing data separately.
-    model = train_predictive_model(df_train, test_data=df_test)
+    # Unchanged data, features and hyperparameters load the saved model instead of retraining.
+    if incremental:
+        model = train_incremental_model(TRAINING_SET_PATH, test_data=df_test, schema=schema)
+    else:
+        model = train_predictive_model(df_train, test_data=df_test, registry=ModelRegistry(), cv=cv,
+                                       engine=engine)
     if model is None:
         logging.error("Model training failed. Exiting.")
+        return None
+
+    # Optionally, you can build the dashboard based on the training set (or combined data).
+    # DASHBOARD_BACKEND=duckdb queries the columnar cache on disk instead of holding the frame.
+    cache_path = None
+    if os.getenv("DASHBOARD_BACKEND", "memory") == "duckdb":
+        cache_path = ensure_cache(TRAINING_SET_PATH, schema=schema)
+    if cache_path:
+        app = build_dashboard(store=DuckDBStore(cache_path), live=live)
+    else:
+        app = build_dashboard(df_train, live=live)
+
+    # Serve the trained model next to the dashboard (POST /score).
+    register_scoring_endpoint(app.server, model, schema)
+    return app
+
+def create_app():
+    """
+    Build the Dash app, from the startup snapshot when there is a current one.
+
+    Build the snapshot offline with `python startup_snapshot.py`; STARTUP_SNAPSHOT
+    points to another snapshot directory, or disables it with "off". Without a
+    snapshot the CSVs are loaded and the model trained (or loaded from the registry).
+    A snapshot built for another MODEL_ENGINE, TRAINING_MODE or DASHBOARD_BACKEND is
+    treated as stale.
+
+    LIVE_SOURCE=file:<path> or tcp:<host>:<port> adds live charts fed by new flow
+    records in the UNSW-NB15 format (see live_ingest).
+
+    Returns:
+        dash.Dash or None: The configured app, or None if loading or training failed.
+    """
+    # Apply security measures (if needed)
+    security_config = apply_security_measures()
+
+    # Live flow records, tailed from a file or received on a socket, feed rolling-window counters.
+    live = None
+    if os.getenv("LIVE_SOURCE"):
+        from live_ingest import start_live_ingestion
+        ingestor = start_live_ingestion(os.getenv("LIVE_SOURCE"), FEATURES_PATH)
+        live = ingestor.counts if ingestor is not None else None
+
+    snapshot_dir = os.getenv("STARTUP_SNAPSHOT", DEFAULT_SNAPSHOT_DIR)
+    # A snapshot built for another engine, training mode or backend is not used.
+    manifest = load_snapshot(snapshot_dir, engine=os.getenv("MODEL_ENGINE"), training_mode=os.getenv("TRAINING_MODE"),
+                             dashboard_backend=os.getenv("DASHBOARD_BACKEND")) if snapshot_dir != "off" else None
+    if manifest is not None:
+        app = create_snapshot_app(manifest, snapshot_dir, live=live)
+    else:
+        with stage("startup", phase="full"):
+            app = _create_full_app(live)
+    if app is None:
+        return None
+
+    # Stage timings of this process (PIPELINE_METRICS=1 turns recording on) on GET /metrics.
+    register_metrics_endpoint(app.server)
+    return app
+
+def main():
+    app = create_app()
+    if app is None:
         return
 
-    # Optionally, you can build the dashboard based on the training set (or combined data)
-    app = build_dashboard(df_train)
-    
     # Run the Dash app (for external access, you might use host='0.0.0.0')
     app.run_server(debug=True)
 
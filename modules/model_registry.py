@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import joblib
+import pandas as pd
+import sklearn
+
+# Default location of the saved models, relative to the modules directory like the data paths.
+DEFAULT_REGISTRY_DIR = '../models'
+MODEL_FILENAME = "model.joblib"
+METADATA_FILENAME = "metadata.json"
+# Flat node arrays of a random forest (see compiled_model), memory-mapped by serving processes.
+COMPILED_DIRNAME = "compiled"
+
+
+def data_fingerprint(df, columns):
+    """
+    Hash the contents of the given DataFrame columns (values, names and dtypes).
+
+    Args:
+        df (pd.DataFrame): The training data.
+        columns (list): Columns that influence the model (features and target).
+
+    Returns:
+        str: Hex digest identifying the data.
+    """
+    digest = hashlib.sha256()
+    subset = df[list(columns)]
+    digest.update(json.dumps([[str(c), str(t)] for c, t in subset.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(subset, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def save_compiled(model, directory):
+    """
+    Save the flat node arrays of a random forest (see compiled_model) to directory.
+
+    Returns:
+        bool: True if the arrays were written, False for models that cannot be compiled.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    if not isinstance(model, RandomForestClassifier):
+        return False
+    from compiled_model import compile_model
+    forest = compile_model(model)
+    if forest is None:
+        return False
+    forest.save(directory)
+    return True
+
+
+class ModelRegistry:
+    """
+    On-disk store of fitted models keyed by what produced them.
+
+    Each artifact lives in its own directory named after a hash of the training data,
+    the feature list, the target, the estimator hyperparameters and the scikit-learn
+    version. Training with unchanged inputs can therefore load the saved model instead
+    of refitting. Models are written uncompressed with joblib.
+
+    Random forests are also saved as the flat node arrays of compiled_model, one .npy
+    file each. load_compiled memory-maps them, so serving processes share one copy
+    through the page cache. (Memory-mapping the joblib file does not achieve this:
+    scikit-learn copies the node arrays of every tree into its own buffers on load.)
+
+    With an encryption key, model files are stored encrypted (see security.EncryptedWriter)
+    and decrypted into memory on load; no compiled arrays are written.
+
+    Args:
+        root (str): Directory holding the artifacts. Created on first save.
+        encryption_key (bytes): Optional 32-byte AES-256-GCM key for the model files.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, encryption_key=None):
+        self.root = root
+        self.encryption_key = encryption_key
+
+    def key_for(self, df_train, features, target, params):
+        """
+        Compute the artifact key for a training run.
+
+        Args:
+            df_train (pd.DataFrame): Training data.
+            features (list): Feature columns.
+            target (str): Target column.
+            params (dict): Estimator hyperparameters (e.g. model.get_params()).
+
+        Returns:
+            str: The artifact key.
+        """
+        payload = json.dumps({
+            "data": data_fingerprint(df_train, list(features) + [target]),
+            "features": list(features),
+            "target": target,
+            "params": params,
+            "sklearn": sklearn.__version__,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key, mmap_mode=None):
+        """
+        Load a saved model.
+
+        Args:
+            key (str): Artifact key from key_for.
+            mmap_mode (str): Passed to joblib.load. Only top-level arrays stay mapped; the
+                tree arrays are copied by scikit-learn (use load_compiled to share them).
+
+        Returns:
+            tuple or None: (model, metadata dict), or None if no usable artifact exists.
+        """
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, METADATA_FILENAME)) as f:
+                metadata = json.load(f)
+            if self.encryption_key:
+                from security import EncryptedFile
+                with EncryptedFile(os.path.join(path, MODEL_FILENAME), self.encryption_key) as f:
+                    model = joblib.load(f)
+            else:
+                model = joblib.load(os.path.join(path, MODEL_FILENAME), mmap_mode=mmap_mode)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("Ignoring unreadable model artifact %s: %r", path, e)
+            return None
+        logging.info("Loaded model %s from the registry.", key)
+        return model, metadata
+
+    def load_compiled(self, key, mmap_mode='r'):
+        """
+        Load the compiled node arrays of a saved random forest.
+
+        Args:
+            key (str): Artifact key from key_for.
+            mmap_mode (str): Passed to np.load; 'r' shares the arrays between processes.
+
+        Returns:
+            CompiledForest or None: The predictor, or None if the artifact has no compiled arrays.
+        """
+        path = os.path.join(self._path(key), COMPILED_DIRNAME)
+        if not os.path.isdir(path):
+            return None
+        from compiled_model import CompiledForest
+        try:
+            forest = CompiledForest.load(path, mmap_mode=mmap_mode)
+        except Exception as e:
+            logging.warning("Ignoring unreadable compiled model %s: %r", path, e)
+            return None
+        logging.info("Loaded compiled model %s from the registry.", key)
+        return forest
+
+    def save(self, key, model, metadata):
+        """
+        Save a fitted model with its metadata (features, metrics, ...).
+
+        The artifact is written to a temporary directory and renamed into place, so
+        concurrent readers never see a partially written model.
+
+        Returns:
+            str: Directory of the saved artifact.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp_path = tempfile.mkdtemp(prefix=f".{key}-", dir=self.root)
+        try:
+            model_path = os.path.join(tmp_path, MODEL_FILENAME)
+            if self.encryption_key:
+                # Serialized straight into the encryptor; no plaintext copy touches the disk.
+                from security import EncryptedWriter
+                with EncryptedWriter(model_path, self.encryption_key) as f:
+                    joblib.dump(model, f)
+            else:
+                joblib.dump(model, model_path)
+                save_compiled(model, os.path.join(tmp_path, COMPILED_DIRNAME))
+            metadata = dict(metadata, key=key, created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                            sklearn=sklearn.__version__, encrypted=bool(self.encryption_key))
+            with open(os.path.join(tmp_path, METADATA_FILENAME), "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(tmp_path, path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        logging.info("Saved model %s to %s", key, path)
+        return path
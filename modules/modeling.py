@@ -1,20 +1,196 @@
+import time
 import logging
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestClassifier
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold, ParameterGrid
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
 from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
+from schema import normalize_name, GROUND_TRUTH_SCHEMA
+from instrumentation import stage
+
+TARGET = 'attack_cat'
+RANDOM_FOREST = "random_forest"
+HIST_GRADIENT_BOOSTING = "hist_gradient_boosting"
+
+# Features of the original RandomForest engine.
+BASELINE_FEATURES = ['sbytes', 'dbytes', 'spkts']
+# Nominal features handled natively by the gradient boosting engine.
+CATEGORICAL_FEATURES = ['proto', 'service', 'state']
+# Identifiers, addresses, timestamps, labels and ground truth fields never used as features.
+NON_FEATURE_COLUMNS = {normalize_name(c) for c in
+                       ['id', 'label', TARGET, 'srcip', 'dstip', 'sport', 'dsport', 'stime', 'ltime']
+                       + list(GROUND_TRUTH_SCHEMA)}
+
+# Hyperparameters searched by default per engine; extend per deployment (see train_predictive_model).
+DEFAULT_PARAM_GRIDS = {
+    RANDOM_FOREST: {"n_estimators": [100], "max_depth": [None]},
+    HIST_GRADIENT_BOOSTING: {"max_iter": [200], "learning_rate": [0.1], "max_leaf_nodes": [31]},
+}
+DEFAULT_PARAM_GRID = DEFAULT_PARAM_GRIDS[RANDOM_FOREST]
+
+def select_feature_columns(df, engine=RANDOM_FOREST):
+    """
+    Pick the feature columns for an engine.
+
+    The RandomForest engine keeps its original three byte/packet counters. The gradient
+    boosting engine uses every numeric column of the UNSW-NB15 feature set plus the
+    proto/service/state categoricals, leaving out identifiers, addresses, ports,
+    timestamps and anything derived from the label.
+
+    Returns:
+        tuple: (categorical columns, numeric columns)
+    """
+    if engine == RANDOM_FOREST:
+        return [], [c for c in BASELINE_FEATURES if c in df.columns]
+    categorical = [c for c in CATEGORICAL_FEATURES if c in df.columns]
+    numeric = [c for c in df.columns
+               if normalize_name(c) not in NON_FEATURE_COLUMNS and c not in categorical
+               and pd.api.types.is_numeric_dtype(df[c])]
+    return categorical, numeric
+
+def make_preprocessor(categorical, numeric):
+    """
+    Vectorized preprocessing for the gradient boosting engine: categoricals are ordinal
+    encoded (unseen values become missing, which the model handles natively) and
+    numeric columns are passed through. Output columns are categoricals first.
+    """
+    encoder = OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=np.nan,
+                             encoded_missing_value=np.nan, dtype=np.float64)
+    return ColumnTransformer([("categorical", encoder, categorical), ("numeric", "passthrough", numeric)],
+                             verbose_feature_names_out=False)
+
+def make_estimator(engine, params, n_jobs=1, n_categorical=0, random_state=42):
+    """
+    Build an unfitted estimator for an engine.
+
+    Args:
+        engine (str): RANDOM_FOREST or HIST_GRADIENT_BOOSTING.
+        params (dict): Hyperparameters for the estimator.
+        n_jobs (int): Cores for RandomForest (gradient boosting uses OpenMP threads).
+        n_categorical (int): Number of leading categorical columns in the encoded input.
+        random_state (int): Seed.
+    """
+    if engine == RANDOM_FOREST:
+        return RandomForestClassifier(random_state=random_state, n_jobs=n_jobs, **params)
+    if engine == HIST_GRADIENT_BOOSTING:
+        categorical = list(range(n_categorical)) if n_categorical else None
+        return HistGradientBoostingClassifier(random_state=random_state, categorical_features=categorical, **params)
+    raise ValueError(f"Unknown model engine: {engine}")
+
+def _fit_fold(X, y, train_idx, test_idx, params, random_state, engine=RANDOM_FOREST, n_categorical=0):
+    """Fit and score one (candidate, fold) pair inside a worker. Returns (score, fit s, score s)."""
+    start = time.perf_counter()
+    model = make_estimator(engine, params, n_jobs=1, n_categorical=n_categorical, random_state=random_state)
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    score = accuracy_score(y[test_idx], model.predict(X[test_idx]))
+    return score, fit_time, time.perf_counter() - start
+
+def cross_validate_model(X, y, param_grid=None, n_splits=5, n_jobs=-1, random_state=42, max_nbytes='1M',
+                         engine=RANDOM_FOREST, n_categorical=0):
+    """
+    Stratified k-fold cross-validation with a grid search over the engine's hyperparameters.
+
+    The fold splits are computed once and reused for every candidate, and all
+    (candidate, fold) fits run concurrently in a joblib process pool, so at most
+    candidates x folds cores are used (5 with the single-candidate default grids);
+    widen param_grid to use more. Arrays larger than
+    max_nbytes are memory-mapped into the workers instead of copied, so memory stays
+    close to one copy of the data plus one model per worker.
+
+    Args:
+        X (pd.DataFrame or np.ndarray): Features.
+        y (pd.Series or np.ndarray): Target.
+        param_grid (dict): Hyperparameter grid (see sklearn ParameterGrid).
+        n_splits (int): Number of folds. Reduced if the rarest class has fewer members.
+        n_jobs (int): Worker processes (-1 uses all cores).
+        random_state (int): Seed for the splits and the forests.
+        max_nbytes (str): Size above which arrays are shared through memory mapping.
+        engine (str): Model engine (see make_estimator).
+        n_categorical (int): Number of leading ordinal-encoded categorical columns in X.
+
+    Returns:
+        dict: "best_params", "best_score" and "results" (one entry per candidate with its
+              mean/std score and per-fold scores and timings), or None if the data cannot
+              be split.
+    """
+    X = X.to_numpy() if hasattr(X, "to_numpy") else np.asarray(X)
+    codes, _ = pd.factorize(np.asarray(y))
+    min_class = np.bincount(codes).min() if len(codes) else 0
+    if min_class < 2:
+        logging.warning("Skipping cross-validation: a class has fewer than 2 samples.")
+        return None
+    if min_class < n_splits:
+        logging.warning("Reducing CV folds from %d to %d to fit the rarest class.", n_splits, min_class)
+        n_splits = int(min_class)
+
+    splits = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X, codes))
+    candidates = list(ParameterGrid(param_grid or DEFAULT_PARAM_GRIDS[engine]))
+    tasks = [(c, f) for c in range(len(candidates)) for f in range(len(splits))]
+    logging.info("Cross-validating %d candidates x %d folds with n_jobs=%s", len(candidates), len(splits), n_jobs)
+    scores = Parallel(n_jobs=n_jobs, max_nbytes=max_nbytes, mmap_mode='r')(
+        delayed(_fit_fold)(X, codes, splits[f][0], splits[f][1], candidates[c], random_state, engine, n_categorical)
+        for c, f in tasks)
+
+    results = [{"params": params, "fold_scores": [], "fit_times": [], "score_times": []} for params in candidates]
+    for (c, f), (score, fit_time, score_time) in zip(tasks, scores):
+        logging.info("CV candidate %d fold %d: accuracy %.4f, fit %.2fs, score %.2fs",
+                     c, f, score, fit_time, score_time)
+        results[c]["fold_scores"].append(score)
+        results[c]["fit_times"].append(fit_time)
+        results[c]["score_times"].append(score_time)
+    for result in results:
+        result["mean_score"] = float(np.mean(result["fold_scores"]))
+        result["std_score"] = float(np.std(result["fold_scores"]))
+    best = max(results, key=lambda r: r["mean_score"])
+    return {"best_params": best["params"], "best_score": best["mean_score"], "results": results}
+
+def train_predictive_model(df_train, test_data=None, registry=None, mmap_mode=None,
+                           param_grid=None, cv=5, n_jobs=-1, engine=RANDOM_FOREST):
+    """
+    Train (or load) the attack category classifier.
+
+    Args:
+        df_train (pd.DataFrame): Training data.
+        test_data (pd.DataFrame): Optional testing data used to report metrics.
+        registry (ModelRegistry): Optional model registry. When the training data, features
+            and hyperparameters match a saved artifact, that model is loaded instead of
+            refitting; otherwise the fitted model is saved for the next run.
+        mmap_mode (str): Passed to ModelRegistry.load.
+        param_grid (dict): Hyperparameter grid searched with cross-validation
+            (defaults to DEFAULT_PARAM_GRIDS[engine]).
+        cv (int): Number of stratified folds; 0 or None skips cross-validation. With cv
+            folds an uncached run costs about cv + 1 fits (the folds, then the final
+            fit), so the serving entry points (main.py, startup_snapshot) default to 0.
+        n_jobs (int): Worker processes for cross-validation and the final fit.
+        engine (str): "random_forest" (the original 3-feature RandomForest) or
+            "hist_gradient_boosting" (binned gradient boosting over all UNSW-NB15 features,
+            returned as a Pipeline with its preprocessing).
+
+    Returns:
+        The fitted model, or None if required columns are missing.
+    """
+    if engine not in DEFAULT_PARAM_GRIDS:
+        logging.error("Unknown model engine '%s'.", engine)
+        return None
+    categorical, numeric = select_feature_columns(df_train, engine)
+    features = categorical + numeric
 
-def train_predictive_model(df_train, test_data=None):
     # Update required columns with the correct target column name.
-    required_columns = ['sbytes', 'dbytes', 'spkts', 'attack_cat']
+    required_columns = (features if engine != RANDOM_FOREST else BASELINE_FEATURES) + [TARGET]
     for col in required_columns:
         if col not in df_train.columns:
             logging.error("Column '%s' is missing from the training set.", col)
             return None
 
     # Extract features and target for training
-    X_train = df_train[['sbytes', 'dbytes', 'spkts']]
-    y_train = df_train['attack_cat']
+    X_train = df_train[features]
+    y_train = df_train[TARGET]
     
     # If you have a separate testing set, do similar extraction...
     if test_data is not None:
@@ -22,27 +198,56 @@ def train_predictive_model(df_train, test_data=None):
             if col not in test_data.columns:
                 logging.error("Column '%s' is missing from the testing set.", col)
                 return None
-        X_test = test_data[['sbytes', 'dbytes', 'spkts']]
-        y_test = test_data['attack_cat']
+        X_test = test_data[features]
+        y_test = test_data[TARGET]
     else:
         X_test = y_test = None
 
     # Continue with model training...
-    from sklearn.ensemble import RandomForestClassifier
-    from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
-    import numpy as np
+    param_grid = param_grid or DEFAULT_PARAM_GRIDS[engine]
+    key = None
+    if registry is not None:
+        # The chosen hyperparameters depend on the search configuration, so key on that.
+        key = registry.key_for(df_train, features, TARGET,
+                               {"engine": engine, "param_grid": param_grid, "cv": cv, "random_state": 42})
+        saved = registry.load(key, mmap_mode=mmap_mode)
+        if saved is not None:
+            model, metadata = saved
+            logging.info("Training skipped; using saved model (metrics: %s).", metadata.get("metrics"))
+            return model
 
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
+    # Encode once so the CV workers share one numeric array.
+    preprocessor = make_preprocessor(categorical, numeric) if engine != RANDOM_FOREST else None
+    X_encoded = preprocessor.fit_transform(X_train) if preprocessor is not None else X_train
+    search = None
+    if cv:
+        search = cross_validate_model(X_encoded, y_train, param_grid, n_splits=cv, n_jobs=n_jobs,
+                                      engine=engine, n_categorical=len(categorical))
+    best_params = search["best_params"] if search else list(ParameterGrid(param_grid))[0]
+    if search:
+        logging.info("Average CV Score: %.2f%% (best params: %s)", search["best_score"] * 100, best_params)
+
+    model = make_estimator(engine, best_params, n_jobs=n_jobs, n_categorical=len(categorical))
+    if preprocessor is not None:
+        model = Pipeline([("preprocess", preprocessor), ("model", model)])
+    with stage("train", rows=len(X_train), engine=engine):
+        model.fit(X_train, y_train)
     logging.info("Model training complete.")
+    metrics = {}
+    if search:
+        metrics["cv"] = search
 
     if X_test is not None:
-        y_pred = model.predict(X_test)
+        with stage("predict", rows=len(X_test), engine=engine):
+            y_pred = model.predict(X_test)
         acc = accuracy_score(y_test, y_pred)
         logging.info("Model Accuracy: %.2f%%", acc * 100)
         cm = confusion_matrix(y_test, y_pred)
         logging.info("Confusion Matrix:\n%s", cm)
-        cv_scores = np.mean([accuracy_score(y_test, model.predict(X_test))])
-        logging.info("Average CV Score: %.2f%%", cv_scores * 100)
+        metrics.update(accuracy=acc, confusion_matrix=cm.tolist())
+
+    if registry is not None:
+        registry.save(key, model, {"features": features, "target": TARGET, "engine": engine,
+                                   "params": best_params, "metrics": metrics})
 
     return model
@@ -0,0 +1,155 @@
+import io
+import os
+import glob
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from schema import stable_dtypes, GROUND_TRUTH_SCHEMA
+from column_cache import read_csv_cached, ensure_cache
+from join_keys import CompositeKeyIndex, join_on_index
+from streaming_ingest import joined_arrow_schema
+
+# Largest byte range of an input file parsed by one task.
+PARTITION_BYTES = 64 << 20
+# Per-process state set up by _init_worker, so the ground truth index is built once per worker.
+_worker = {}
+
+
+def resolve_input_files(main_filepath):
+    """
+    Expand the main dataset argument into a list of files.
+
+    Args:
+        main_filepath (str or list): A single path, a glob pattern such as
+            '../data/UNSW-NB15_*.csv', or a list of paths/patterns.
+
+    Returns:
+        list: Matching paths, patterns expanded in sorted order. Paths that do not
+              exist are kept so that the caller can report them.
+    """
+    patterns = [main_filepath] if isinstance(main_filepath, str) else list(main_filepath)
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(matches)
+    return paths
+
+
+def _partition_file(path, n_parts):
+    """
+    Split a file into n_parts byte ranges of about equal size, each starting at a line.
+
+    A range boundary is moved to the start of the next line, so every line falls in
+    exactly one range (the capture files have no quoted line breaks).
+    """
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_parts):
+            f.seek(size * i // n_parts)
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return [(path, start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def plan_partitions(paths, n_workers, partition_bytes=PARTITION_BYTES):
+    """
+    Cut the input files into (path, start, end) byte ranges for the worker processes.
+
+    Ranges are at most partition_bytes long, and small enough that there are at least
+    n_workers of them, so a few large files still keep every worker busy.
+    """
+    total = sum(os.path.getsize(p) for p in paths)
+    target = max(min(partition_bytes, -(-total // max(n_workers, 1))), 1)
+    partitions = []
+    for path in paths:
+        partitions.extend(_partition_file(path, max(1, -(-os.path.getsize(path) // target))))
+    return partitions
+
+
+def _init_worker(gt_filepath, names, schema, out_dir):
+    df_gt = read_csv_cached(gt_filepath, schema=GROUND_TRUTH_SCHEMA)
+    _worker.update(df_gt=df_gt, index=CompositeKeyIndex(df_gt), names=names, schema=schema, out_dir=out_dir,
+                   arrow_schema=joined_arrow_schema(names, schema, df_gt))
+
+
+def _ingest_partition(position, partition):
+    """
+    Parse, type and join one byte range of an input file inside a worker process.
+
+    The range is typed with stable_dtypes, so every partition has the same column types
+    whatever values it happens to contain, and is cast to the fixed Arrow schema of the
+    joined output. The joined partition is written to an Arrow IPC file and only its
+    path goes back to the parent, so no DataFrame is pickled between processes.
+    """
+    import pyarrow as pa
+    path, start, end = partition
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if data.strip():
+        df = pd.read_csv(io.BytesIO(data), header=None, names=_worker["names"], low_memory=False)
+    else:
+        df = pd.DataFrame(columns=_worker["names"])
+    stable_dtypes(df, _worker["schema"])
+    left, right = _worker["index"].probe(df)
+    merged = join_on_index(df, _worker["df_gt"], left, right)
+    table = pa.Table.from_pandas(merged, schema=_worker["arrow_schema"], preserve_index=False)
+    out_path = os.path.join(_worker["out_dir"], f"part-{position:05d}.arrow")
+    with pa.OSFile(out_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return out_path, len(df), len(merged)
+
+
+def merge_files_parallel(paths, gt_filepath, names, schema, n_workers=None, partition_bytes=PARTITION_BYTES):
+    """
+    Load main dataset files and join them with the ground truth in parallel.
+
+    The files are cut into line-aligned byte ranges (see plan_partitions), so the work
+    scales with the worker count even for a handful of large files. Each worker parses
+    its ranges, types them with schema.stable_dtypes and probes them against its own
+    ground truth index. The parent memory-maps the resulting Arrow files, which all
+    share one schema, and concatenates them in input order, so the rows come out in the
+    same order as joining the concatenated files in a single process.
+
+    Typing follows stable_dtypes rather than the per-file column cache: nominal and port
+    columns are strings, and integer columns become float64 if any file has a blank in
+    them, instead of a column changing type between files.
+
+    Args:
+        paths (list): Main dataset files, in order.
+        gt_filepath (str): Path to the ground truth CSV file.
+        names (list): Column names from the features file.
+        schema (dict): Mapping produced by load_feature_schema.
+        n_workers (int): Number of worker processes. Defaults to the CPU count.
+        partition_bytes (int): Largest byte range handed to one task.
+
+    Returns:
+        pd.DataFrame: The joined (not yet cleaned) dataset.
+    """
+    import pyarrow as pa
+    n_workers = max(1, n_workers or os.cpu_count() or 1)
+    partitions = plan_partitions(paths, n_workers, partition_bytes)
+    n_workers = min(n_workers, len(partitions))
+    # Build the ground truth cache up front so workers do not race to write it.
+    ensure_cache(gt_filepath, schema=GROUND_TRUTH_SCHEMA)
+    out_dir = tempfile.mkdtemp(prefix="ingest-")
+    try:
+        logging.info("Ingesting %d files as %d partitions with %d worker processes", len(paths), len(partitions),
+                     n_workers)
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(gt_filepath, names, schema, out_dir)) as pool:
+            results = list(pool.map(_ingest_partition, range(len(partitions)), partitions))
+        tables = []
+        for (path, start, end), (part_path, rows_read, rows_joined) in zip(partitions, results):
+            logging.debug("Partition %s [%d, %d): %d rows read, %d rows joined", path, start, end, rows_read,
+                          rows_joined)
+            tables.append(pa.ipc.open_file(pa.memory_map(part_path)).read_all())
+        logging.info("Joined %d of %d rows", sum(r[2] for r in results), sum(r[1] for r in results))
+        return pa.concat_tables(tables).to_pandas()
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
@@ -0,0 +1,171 @@
+import hmac
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from schema import IP_COLUMNS, parse_ipv4, format_ipv4
+
+FEISTEL_ROUNDS = 8
+# Values per thread-pool task when permuting packed addresses.
+BLOCK_ROWS = 1 << 18
+# Prefix of the pseudonyms given to values that are not IPv4 addresses.
+TOKEN_PREFIX = "anon-"
+# Distinct string values remembered between calls (e.g. across chunks).
+CACHE_SIZE = 1 << 20
+
+
+def derive_key(master_key, purpose=b"ip-pseudonymization"):
+    """Derive a purpose-specific 32-byte key from the master key with HKDF-SHA256."""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=purpose).derive(master_key)
+
+
+class IPPseudonymizer:
+    """
+    Deterministic, keyed pseudonymization of IP address columns.
+
+    IPv4 addresses are mapped to other IPv4 addresses by a keyed permutation of the
+    32-bit address space: an 8-round Feistel network over 16-bit halves whose round
+    functions are lookup tables filled with AES output under a derived key. The mapping
+    is a bijection, so equal addresses stay equal (joins and group-bys on the protected
+    columns still work), different addresses never collide and the holder of the key can
+    reverse it. Every round is a table lookup and an XOR over the whole array.
+
+    Values that are not IPv4 addresses are replaced by a truncated HMAC-SHA256 token.
+    String columns are factorized so each distinct value is transformed once, and
+    pseudonyms of string values are cached across calls.
+
+    Args:
+        key (bytes): Master key (e.g. apply_security_measures()["encryption_key"]).
+        workers (int): Threads used for large packed columns (defaults to the CPU count).
+    """
+
+    def __init__(self, key, workers=None):
+        subkey = derive_key(key)
+        self._hmac_key = derive_key(key, b"ip-pseudonymization-token")
+        self.workers = workers
+        # Round table i maps a 16-bit half to AES_k(i || x) truncated to 16 bits.
+        blocks = np.zeros((FEISTEL_ROUNDS, 1 << 16, 16), dtype=np.uint8)
+        blocks[:, :, 0] = np.arange(FEISTEL_ROUNDS, dtype=np.uint8)[:, None]
+        blocks[:, :, 1] = np.arange(1 << 16) >> 8
+        blocks[:, :, 2] = np.arange(1 << 16) & 0xFF
+        encryptor = Cipher(algorithms.AES(subkey), modes.ECB()).encryptor()
+        output = np.frombuffer(encryptor.update(blocks.tobytes()) + encryptor.finalize(), dtype=np.uint8)
+        output = output.reshape(FEISTEL_ROUNDS, 1 << 16, 16)
+        self._tables = (output[:, :, 0].astype(np.uint16) << 8) | output[:, :, 1]
+        self._cache = {}
+
+    def _feistel(self, values, inverse=False):
+        left, right = (values >> 16).astype(np.uint16), (values & 0xFFFF).astype(np.uint16)
+        if not inverse:
+            for table in self._tables:
+                left, right = right, left ^ table[right]
+        else:
+            for table in self._tables[::-1]:
+                left, right = right ^ table[left], left
+        return (left.astype(np.uint32) << 16) | right
+
+    def _map_packed(self, values, inverse=False):
+        values = np.asarray(values, dtype=np.uint32)
+        if len(values) <= BLOCK_ROWS:
+            return self._feistel(values, inverse)
+        blocks = [values[i:i + BLOCK_ROWS] for i in range(0, len(values), BLOCK_ROWS)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return np.concatenate(list(pool.map(lambda block: self._feistel(block, inverse), blocks)))
+
+    def pseudonymize_packed(self, values):
+        """Permute an array of uint32 packed IPv4 addresses (see schema.compact_dtypes)."""
+        return self._map_packed(values)
+
+    def reidentify_packed(self, values):
+        """Invert pseudonymize_packed."""
+        return self._map_packed(values, inverse=True)
+
+    def _token(self, value):
+        digest = hmac.new(self._hmac_key, str(value).encode("utf-8"), hashlib.sha256).hexdigest()
+        return TOKEN_PREFIX + digest[:16]
+
+    def pseudonymize_values(self, values):
+        """
+        Pseudonymize an array of distinct address strings.
+
+        Returns:
+            np.ndarray: Object array of pseudonyms, aligned with values.
+        """
+        cache = self._cache
+        missing = [value for value in values if value not in cache]
+        computed = {}
+        if missing:
+            packed = [parse_ipv4(value) for value in missing]
+            ipv4 = [value for value, p in zip(missing, packed) if p is not None]
+            if ipv4:
+                mapped = format_ipv4(self._feistel(np.array([p for p in packed if p is not None], dtype=np.uint32)))
+                computed.update(zip(ipv4, mapped))
+            for value, p in zip(missing, packed):
+                if p is None:
+                    computed[value] = self._token(value)
+        result = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            result[i] = computed[value] if value in computed else cache[value]
+        if computed:
+            # Start over once the cache is full; a batch larger than the cache is only partly kept.
+            if len(cache) + len(computed) > CACHE_SIZE:
+                cache.clear()
+            for value in missing[:CACHE_SIZE - len(cache)]:
+                cache[value] = computed[value]
+        return result
+
+    def pseudonymize_series(self, series):
+        """
+        Pseudonymize one IP column, keeping its representation.
+
+        uint32 columns are permuted directly, categorical columns have their categories
+        renamed and other columns are factorized. Missing values stay missing.
+
+        Returns:
+            pd.Series: The pseudonymized column, with the same index and name.
+        """
+        if series.dtype == np.uint32:
+            return pd.Series(self.pseudonymize_packed(series.to_numpy()), index=series.index, name=series.name)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = series.cat.categories
+            return series.cat.rename_categories(self.pseudonymize_values([str(c) for c in categories]))
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        mapped = self.pseudonymize_values([str(u) for u in uniques])
+        result = np.where(codes >= 0, mapped[np.maximum(codes, 0)] if len(mapped) else None, None)
+        return pd.Series(result, index=series.index, name=series.name, dtype=object)
+
+
+def pseudonymize_ips(df, key=None, columns=None, inplace=False, pseudonymizer=None):
+    """
+    Replace the IP address columns of a flow DataFrame with keyed pseudonyms.
+
+    The same key always gives the same pseudonyms, so datasets pseudonymized separately
+    (e.g. the main dataset and the ground truth) can still be joined on the protected
+    columns with load_and_merge_data / join_keys.
+
+    Args:
+        df (pd.DataFrame): The data to protect.
+        key (bytes): Master key. Defaults to the key from apply_security_measures()
+                     (set ENCRYPTION_KEY so it is stable between runs).
+        columns (list): Columns to pseudonymize. Defaults to the IP columns present.
+        inplace (bool): Modify df instead of working on a copy.
+        pseudonymizer (IPPseudonymizer): Reuse an existing instance (and its cache).
+
+    Returns:
+        pd.DataFrame: The DataFrame with pseudonymized IP columns.
+    """
+    if pseudonymizer is None:
+        if key is None:
+            from security import apply_security_measures
+            key = apply_security_measures()["encryption_key"]
+        pseudonymizer = IPPseudonymizer(key)
+    if not inplace:
+        df = df.copy()
+    for col in (columns if columns is not None else [c for c in IP_COLUMNS if c in df.columns]):
+        df[col] = pseudonymizer.pseudonymize_series(df[col])
+    logging.info("Pseudonymized IP columns of %d rows.", len(df))
+    return df
@@ -0,0 +1,319 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Canonical type names for the values found in the "Type " column of NUSW-NB15_features.csv.
+NOMINAL = "nominal"
+INTEGER = "integer"
+FLOAT = "float"
+TIMESTAMP = "timestamp"
+BINARY = "binary"
+
+INTEGER_TYPES = (INTEGER, TIMESTAMP, BINARY)
+
+
+def normalize_name(name):
+    """
+    Normalize a column name so that the names used in the features file
+    (e.g. "Spkts", "ct_src_ ltm") match the lower-case names used in the
+    training/testing CSVs (e.g. "spkts", "ct_src_ltm").
+    """
+    return str(name).strip().lower().replace(" ", "")
+
+
+def schema_from_features(features_df):
+    """
+    Build a column schema from an already loaded features DataFrame.
+
+    Args:
+        features_df (pd.DataFrame): Contents of NUSW-NB15_features.csv.
+
+    Returns:
+        dict: Mapping of feature name (as written in the "Name" column) to its
+              canonical type ("nominal", "integer", "float", "timestamp" or "binary").
+
+    Raises:
+        ValueError: If the "Name" or "Type" columns are missing.
+    """
+    columns = {c.strip(): c for c in features_df.columns}
+    if "Name" not in columns or "Type" not in columns:
+        raise ValueError("Features file must contain 'Name' and 'Type' columns.")
+    names = features_df[columns["Name"]].astype(str).str.strip()
+    types = features_df[columns["Type"]].astype(str).str.strip().str.lower()
+    return dict(zip(names, types))
+
+
+def load_feature_schema(features_filepath):
+    """
+    Load the column schema described by the features CSV.
+
+    Args:
+        features_filepath (str): Path to NUSW-NB15_features.csv.
+
+    Returns:
+        dict: Mapping of feature name to canonical type (see schema_from_features).
+    """
+    features_df = pd.read_csv(features_filepath, encoding='cp1252')
+    return schema_from_features(features_df)
+
+
+def lookup_type(schema, column):
+    """
+    Return the schema type of a column, matching names case- and space-insensitively.
+    Returns None for columns not described by the schema.
+    """
+    if column in schema:
+        return schema[column]
+    normalized = {normalize_name(name): kind for name, kind in schema.items()}
+    return normalized.get(normalize_name(column))
+
+
+def _coerce_numeric(series, kind):
+    """
+    Convert a column to a numeric dtype only if the conversion is lossless,
+    i.e. no value other than an existing missing value becomes NaN.
+    Columns such as the port fields, which contain hex strings and '-', are
+    returned unchanged.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        converted = series
+    else:
+        converted = pd.to_numeric(series, errors='coerce')
+        if converted.isna().sum() != series.isna().sum():
+            return series
+    if kind in INTEGER_TYPES and not converted.hasnans:
+        if pd.api.types.is_integer_dtype(converted) or (converted % 1 == 0).all():
+            return converted.astype("int64")
+    if kind == FLOAT or converted.hasnans:
+        return converted.astype("float64")
+    return converted
+
+
+def apply_schema_dtypes(df, schema):
+    """
+    Convert the columns of a freshly parsed DataFrame to the types declared in the schema.
+
+    Nominal columns are stored as strings, integer/timestamp/binary columns as int64
+    (float64 when they contain missing values) and float columns as float64. Columns
+    that cannot be converted without losing values are left as parsed, and columns
+    not covered by the schema are not touched.
+
+    Args:
+        df (pd.DataFrame): The parsed DataFrame. Modified in place.
+        schema (dict): Mapping produced by load_feature_schema.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, for chaining.
+    """
+    normalized = {normalize_name(name): kind for name, kind in schema.items()}
+    for col in df.columns:
+        kind = normalized.get(normalize_name(col))
+        if kind is None:
+            continue
+        series = df[col]
+        if kind == NOMINAL:
+            if not pd.api.types.is_string_dtype(series):
+                df[col] = series.astype(str).where(series.notna())
+            continue
+        converted = _coerce_numeric(series, kind)
+        if converted is series:
+            if not pd.api.types.is_numeric_dtype(converted):
+                logging.debug("Column '%s' kept as parsed; it is not cleanly %s.", col, kind)
+            continue
+        df[col] = converted
+    return df
+
+
+# Types of the ground truth table (NUSW-NB15_GT.csv), which is not described by the features file.
+GROUND_TRUTH_SCHEMA = {
+    "Start time": TIMESTAMP,
+    "Last time": TIMESTAMP,
+    "Attack category": NOMINAL,
+    "Attack subcategory": NOMINAL,
+    "Protocol": NOMINAL,
+    "Source IP": NOMINAL,
+    "Source Port": INTEGER,
+    "Destination IP": NOMINAL,
+    "Destination Port": INTEGER,
+    "Attack Name": NOMINAL,
+    "Attack Reference": NOMINAL,
+}
+
+# Nominal/integer columns that get a dedicated packed representation.
+IP_COLUMNS = ("srcip", "dstip", "Source IP", "Destination IP")
+PORT_COLUMNS = ("sport", "dsport", "Source Port", "Destination Port")
+
+
+def parse_ipv4(value):
+    """
+    Parse a dotted-quad IPv4 string into an integer.
+
+    Only the canonical spelling is accepted (no leading zeros, whitespace or
+    shorthand), so that packing a column and unpacking it again gives back the
+    exact same strings. Returns None for anything else.
+    """
+    if not isinstance(value, str):
+        return None
+    parts = value.split(".")
+    if len(parts) != 4:
+        return None
+    packed = 0
+    for part in parts:
+        if not part.isdigit() or str(int(part)) != part or int(part) > 255:
+            return None
+        packed = (packed << 8) | int(part)
+    return packed
+
+
+def parse_port(value):
+    """
+    Parse a port number written in canonical decimal form (e.g. 80, "80").
+    Returns None for hex strings such as "0x000b", "-", missing values and
+    anything outside 0-65535.
+    """
+    if isinstance(value, str):
+        if not value.isdigit() or str(int(value)) != value:
+            return None
+        value = int(value)
+    elif isinstance(value, (int, np.integer)):
+        value = int(value)
+    elif isinstance(value, (float, np.floating)) and np.isfinite(value) and value == int(value):
+        value = int(value)
+    else:
+        return None
+    return value if 0 <= value <= 65535 else None
+
+
+def format_ipv4(values):
+    """
+    Convert an array of uint32 packed addresses back to dotted-quad strings.
+    """
+    values = np.asarray(values, dtype=np.uint32)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    text = np.array([f"{v >> 24}.{(v >> 16) & 255}.{(v >> 8) & 255}.{v & 255}" for v in uniques.tolist()],
+                    dtype=object)
+    return text[inverse]
+
+
+def _pack_unique(series, parser, dtype):
+    """
+    Apply a scalar parser to the distinct values of a column and broadcast the result.
+
+    Flow columns have few distinct values compared to their length, so parsing the
+    uniques and mapping them back through the factorized codes is much cheaper than
+    parsing every row. Returns None if any non-missing value fails to parse or the
+    column contains missing values.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if (codes < 0).any():
+        return None
+    packed = np.empty(len(uniques), dtype=dtype)
+    for i, value in enumerate(uniques):
+        parsed = parser(value)
+        if parsed is None:
+            return None
+        packed[i] = parsed
+    return packed[codes]
+
+
+def _narrow_integer(series):
+    """Downcast an integer column to the smallest signed/unsigned type that holds its range."""
+    if series.empty:
+        return series
+    kind = "unsigned" if series.min() >= 0 else "integer"
+    return pd.to_numeric(series, downcast=kind)
+
+
+def compact_dtypes(df, schema, inplace=False):
+    """
+    Convert a flow DataFrame to a compact in-memory representation.
+
+    The conversion is driven by the schema types:
+      - IP address columns holding only IPv4 addresses become uint32 (see format_ipv4).
+      - Port columns holding only decimal ports become uint16.
+      - Other nominal columns (proto, state, service, attack_cat, ...) become categoricals,
+        as do IP/port columns that contain values without a packed form (e.g. hex ports).
+      - Integer, timestamp and binary columns are narrowed to the smallest type that holds
+        their observed range. Float columns are left untouched to avoid precision loss.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to compact.
+        schema (dict): Mapping from load_feature_schema (GROUND_TRUTH_SCHEMA entries are
+                       added automatically for merged frames).
+        inplace (bool): Modify df instead of working on a copy.
+
+    Returns:
+        tuple: (compacted DataFrame, report DataFrame indexed by column with the
+               "before", "after" and "saved" memory usage in bytes).
+    """
+    if not inplace:
+        df = df.copy()
+    combined = dict(GROUND_TRUTH_SCHEMA)
+    combined.update(schema)
+    normalized = {normalize_name(name): kind for name, kind in combined.items()}
+    ip_columns = {normalize_name(c) for c in IP_COLUMNS}
+    port_columns = {normalize_name(c) for c in PORT_COLUMNS}
+    before = df.memory_usage(index=False, deep=True)
+
+    for col in df.columns:
+        name = normalize_name(col)
+        kind = normalized.get(name)
+        if kind is None:
+            continue
+        series = df[col]
+        packed = None
+        if name in ip_columns:
+            packed = _pack_unique(series, parse_ipv4, np.uint32)
+        elif name in port_columns:
+            packed = _pack_unique(series, parse_port, np.uint16)
+        if packed is not None:
+            df[col] = packed
+        elif kind == NOMINAL or name in ip_columns or name in port_columns:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                df[col] = series.astype("category")
+        elif kind in INTEGER_TYPES and pd.api.types.is_integer_dtype(series):
+            df[col] = _narrow_integer(series)
+
+    after = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({"before": before, "after": after})
+    report["saved"] = report["before"] - report["after"]
+    total_before, total_after = report["before"].sum(), report["after"].sum()
+    logging.info("Compacted DataFrame from %.1f MB to %.1f MB (%.1fx smaller).",
+                 total_before / 1e6, total_after / 1e6, total_before / max(total_after, 1))
+    logging.debug("Per-column memory usage (bytes):\n%s", report.sort_values("saved", ascending=False))
+    return df, report
+
+
+def stable_dtypes(df, schema):
+    """
+    Convert the columns of one chunk of a larger file to chunk-independent dtypes.
+
+    pandas infers dtypes per chunk, so the same column can come back as int64 in one
+    chunk and object in the next (e.g. a port column that only contains hex values
+    further down the file). Streaming code needs every chunk to look alike, so here
+    nominal and port columns are always strings, integer/timestamp/binary columns are
+    nullable Int64 and float columns are float64. Values that are not numeric in a
+    numeric column (such as the blank entries found in ct_ftp_cmd) become missing.
+
+    Args:
+        df (pd.DataFrame): The chunk. Modified in place.
+        schema (dict): Mapping produced by load_feature_schema.
+
+    Returns:
+        pd.DataFrame: The same DataFrame, for chaining.
+    """
+    normalized = {normalize_name(name): kind for name, kind in schema.items()}
+    port_columns = {normalize_name(c) for c in PORT_COLUMNS}
+    for col in df.columns:
+        name = normalize_name(col)
+        kind = normalized.get(name)
+        if kind is None:
+            continue
+        series = df[col]
+        if kind == NOMINAL or name in port_columns:
+            df[col] = series.astype(str).where(series.notna()).astype(object)
+        elif kind in INTEGER_TYPES:
+            df[col] = pd.to_numeric(series, errors='coerce').round().astype("Int64")
+        else:
+            df[col] = pd.to_numeric(series, errors='coerce').astype("float64")
+    return df
@@ -0,0 +1,299 @@
+import io
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from schema import lookup_type, NOMINAL, INTEGER_TYPES
+from instrumentation import stage
+
+SCORE_ROUTE = "/score"
+# Content type of binary payloads: a 2-D float array in np.save format, columns in feature order.
+NPY_CONTENT_TYPE = "application/x-npy"
+# Largest number of records accepted in a single request.
+MAX_RECORDS_PER_REQUEST = 10000
+# Micro-batching defaults: flush when this many rows are queued or the oldest has waited this long.
+DEFAULT_MAX_BATCH_SIZE = 1024
+DEFAULT_MAX_LATENCY_MS = 5.0
+# How long a request waits for its predictions before giving up.
+REQUEST_TIMEOUT_S = 30.0
+
+
+class MicroBatcher:
+    """
+    Group concurrent scoring requests into batches for one vectorized predict call.
+
+    Requests are queued with a Future. A single worker thread takes the first queued
+    request, keeps collecting until max_batch_size rows are queued or max_latency_ms
+    has passed since that request arrived, concatenates the columns, calls predict once
+    and hands every request its slice of the predictions. The per-call overhead of
+    predict is then paid once per batch instead of once per request. If the batch
+    fails, its requests are scored separately so only the failing one gets the error.
+
+    Args:
+        predict (callable): Maps a DataFrame of features to an array of labels.
+        features (list): Feature columns, in model order.
+        max_batch_size (int): Row count that triggers a flush.
+        max_latency_ms (float): Maximum time the oldest request waits for a batch to fill.
+    """
+
+    def __init__(self, predict, features, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_latency_ms=DEFAULT_MAX_LATENCY_MS):
+        self._predict = predict
+        self.features = list(features)
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_latency = max(float(max_latency_ms), 0.0) / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, columns):
+        """
+        Queue records for scoring.
+
+        Args:
+            columns (dict): Feature name -> 1-D array, all of the same length.
+
+        Returns:
+            Future: Resolves to the array of predicted labels for these records.
+        """
+        future = Future()
+        self._queue.put((columns, future))
+        return future
+
+    def close(self):
+        """Stop the worker thread after the queued requests are scored."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch, rows = [item], len(next(iter(item[0].values())))
+            deadline = time.monotonic() + self.max_latency
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+                rows += len(next(iter(item[0].values())))
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            if len(batch) == 1:
+                columns = batch[0][0]
+            else:
+                columns = {f: np.concatenate([c[f] for c, _ in batch]) for f in self.features}
+            with stage("predict", rows=len(next(iter(columns.values()))), source="score"):
+                labels = np.asarray(self._predict(pd.DataFrame(columns, columns=self.features)))
+        except Exception as e:
+            if len(batch) > 1:
+                # Score the requests one by one so a bad request only fails itself.
+                logging.warning("Scoring batch of %d requests failed (%s); retrying them separately.",
+                                len(batch), e)
+                for item in batch:
+                    self._score([item])
+                return
+            logging.error("Scoring request failed: %s", e)
+            batch[0][1].set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(labels)
+        offset = 0
+        for columns, future in batch:
+            n = len(next(iter(columns.values())))
+            future.set_result(labels[offset:offset + n])
+            offset += n
+
+
+def _feature_kinds(features, schema):
+    """Map each model feature to 'nominal', 'integer' or 'float' using the feature schema."""
+    kinds = {}
+    for feature in features:
+        kind = lookup_type(schema or {}, feature)
+        kinds[feature] = "nominal" if kind == NOMINAL else "integer" if kind in INTEGER_TYPES else "float"
+    return kinds
+
+
+def _validate_numeric(feature, values, kind):
+    if not np.isfinite(values).all():
+        raise ValueError(f"Feature '{feature}' has missing or non-finite values")
+    if kind == "integer" and not np.array_equal(values, np.floor(values)):
+        raise ValueError(f"Feature '{feature}' must be an integer")
+    return values
+
+
+def records_to_columns(records, kinds):
+    """
+    Validate JSON flow records against the feature schema and convert them to columns.
+
+    Args:
+        records (list): One dict per flow, mapping feature name to value.
+        kinds (dict): Feature -> 'nominal', 'integer' or 'float' (see _feature_kinds).
+
+    Returns:
+        dict: Feature name -> 1-D array.
+
+    Raises:
+        ValueError: If a record is malformed, misses a feature or has a value of the wrong type.
+    """
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("Expected a list of flow records (JSON objects)")
+    columns = {}
+    for feature, kind in kinds.items():
+        try:
+            values = [record[feature] for record in records]
+        except KeyError:
+            raise ValueError(f"Missing feature '{feature}'") from None
+        if kind == "nominal":
+            if not all(isinstance(v, str) for v in values):
+                raise ValueError(f"Feature '{feature}' must be a string")
+            columns[feature] = np.array(values, dtype=object)
+            continue
+        # Lists or objects would only fail later, inside the batch shared with other requests.
+        array = None
+        if not any(isinstance(v, (str, bool)) or v is None for v in values):
+            try:
+                array = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                pass
+        if array is None or np.ndim(array) != 1:
+            raise ValueError(f"Feature '{feature}' must be numeric")
+        columns[feature] = _validate_numeric(feature, array, kind)
+    return columns
+
+
+def array_to_columns(array, kinds):
+    """
+    Validate a binary payload (2-D float array, one column per feature in model order).
+
+    Raises:
+        ValueError: If the array has the wrong shape or the model needs nominal features.
+    """
+    if any(kind == "nominal" for kind in kinds.values()):
+        raise ValueError("Binary payloads are only accepted for models without nominal features")
+    if array.ndim != 2 or array.shape[1] != len(kinds):
+        raise ValueError(f"Expected an array of shape (n, {len(kinds)}), got {array.shape}")
+    if array.dtype.kind not in "iuf":
+        raise ValueError("Binary payloads must hold numbers")
+    array = array.astype(np.float64, copy=False)
+    return {feature: _validate_numeric(feature, array[:, i], kind) for i, (feature, kind) in enumerate(kinds.items())}
+
+
+def _model_features(model):
+    features = getattr(model, "feature_names_in_", None)
+    if features is None:
+        raise ValueError("The model does not record its feature names; train it on a DataFrame.")
+    return [str(f) for f in features]
+
+
+def _make_batcher(model, schema, max_batch_size, max_latency_ms, compiled):
+    """Return (batcher, feature kinds) serving a fitted model."""
+    features = _model_features(model)
+    kinds = _feature_kinds(features, schema)
+    predict = model.predict
+    # scikit-learn is already loaded by the time a fitted model exists.
+    from sklearn.ensemble import RandomForestClassifier
+    if compiled and isinstance(model, RandomForestClassifier):
+        from compiled_model import compile_model
+        forest = compile_model(model)
+        predict = forest.predict if forest is not None else predict
+    return MicroBatcher(predict, features, max_batch_size=max_batch_size, max_latency_ms=max_latency_ms), kinds
+
+
+def register_scoring_endpoint(server, model, schema=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                              max_latency_ms=DEFAULT_MAX_LATENCY_MS, route=SCORE_ROUTE, compiled=True):
+    """
+    Add a flow-scoring endpoint to a Flask server (e.g. the server of the Dash app).
+
+    POST a JSON list of flow records (or {"records": [...]}) with every model feature,
+    or a binary np.save array with Content-Type application/x-npy whose columns follow
+    the model's feature order. The response is {"predictions": [attack category, ...]}
+    in request order; invalid payloads get a 400 with an "error" message. Requests are
+    scored through a MicroBatcher.
+
+    Args:
+        server (flask.Flask): Server to register the route on.
+        model: Fitted model from train_predictive_model (fitted on a DataFrame), or a
+               callable returning one. A callable is only invoked by the first request,
+               so loading the model (and scikit-learn) stays off the startup path.
+        schema (dict): Feature schema (load_feature_schema) used to validate the records.
+        max_batch_size (int): Rows that trigger an immediate predict call.
+        max_latency_ms (float): Longest time a request waits for its batch to fill.
+        route (str): URL of the endpoint.
+        compiled (bool): Score RandomForest models through compiled_model.
+
+    Returns:
+        MicroBatcher: The batcher serving the endpoint (exposes batch/row counters), or
+                      None when the model is loaded on the first request.
+    """
+    from flask import request, jsonify
+
+    lazy = callable(model) and not hasattr(model, "predict")
+    state = {}
+    lock = threading.Lock()
+    if not lazy:
+        state["batcher"], state["kinds"] = _make_batcher(model, schema, max_batch_size, max_latency_ms, compiled)
+
+    def serving():
+        if not state:
+            with lock:
+                if not state:
+                    loaded = model()
+                    state["batcher"], state["kinds"] = _make_batcher(loaded, schema, max_batch_size,
+                                                                     max_latency_ms, compiled)
+                    logging.info("Model loaded for %s (%d features).", route, len(state["batcher"].features))
+        return state["batcher"], state["kinds"]
+
+    def score():
+        try:
+            batcher, kinds = serving()
+        except Exception as e:
+            logging.error("Loading the model for %s failed: %r", route, e)
+            return jsonify(error="Model unavailable"), 503
+        try:
+            if request.mimetype == NPY_CONTENT_TYPE:
+                try:
+                    array = np.load(io.BytesIO(request.get_data()), allow_pickle=False)
+                except (OSError, EOFError) as e:
+                    raise ValueError(f"Unreadable binary payload: {e}") from None
+                columns = array_to_columns(array, kinds)
+            else:
+                payload = request.get_json(silent=True)
+                if isinstance(payload, dict):
+                    payload = payload.get("records")
+                columns = records_to_columns(payload, kinds)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        n = len(next(iter(columns.values()))) if columns else 0
+        if n > MAX_RECORDS_PER_REQUEST:
+            return jsonify(error=f"At most {MAX_RECORDS_PER_REQUEST} records per request"), 413
+        if n == 0:
+            return jsonify(predictions=[])
+        try:
+            labels = batcher.submit(columns).result(timeout=REQUEST_TIMEOUT_S)
+        except Exception as e:
+            return jsonify(error=f"Scoring failed: {e}"), 500
+        return jsonify(predictions=labels.tolist())
+
+    server.add_url_rule(route, "score", score, methods=["POST"])
+    if lazy:
+        logging.info("Scoring endpoint %s registered; the model loads on the first request.", route)
+        return None
+    batcher = state["batcher"]
+    logging.info("Scoring endpoint %s ready for %d features (batch size %d, max latency %.1f ms).",
+                 route, len(batcher.features), batcher.max_batch_size, max_latency_ms)
+    return batcher
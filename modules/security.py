@@ -1,13 +1,25 @@
+import io
 import os
+import struct
 import logging
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from flask import Flask
-from flask_talisman import Talisman
-import dash_auth
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
 
+# Segmented file format: header (magic, segment size, random nonce prefix), then one
+# AES-GCM ciphertext + tag per plaintext segment.
+ENCRYPTED_MAGIC = b"UNSWGCM1"
+_HEADER = struct.Struct(">8sI8s")
+HEADER_SIZE = _HEADER.size
+TAG_SIZE = 16
+DEFAULT_SEGMENT_SIZE = 1 << 20
+# Segments handed to the thread pool per round; bounds the memory held in flight.
+SEGMENTS_PER_WORKER = 4
+
 def setup_authentication(app):
     """
     Set up basic authentication for the dashboard.
@@ -21,6 +33,7 @@ def setup_authentication(app):
     PASSWORD = os.getenv("DASHBOARD_PASSWORD", "supersecret")
     
     VALID_USERNAME_PASSWORD_PAIRS = {USERNAME: PASSWORD}
+    import dash_auth
     auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
     logging.info("Basic Authentication has been configured for the dashboard.")
     return auth
@@ -38,6 +51,7 @@ def enforce_https(app):
     Returns:
         The Talisman instance wrapping the app.
     """
+    from flask_talisman import Talisman
     talisman = Talisman(app, force_https=True)
     logging.info("HTTPS enforcement via Flask-Talisman has been applied.")
     return talisman
@@ -74,13 +88,13 @@ def encrypt_data(data, key):
         - AES-GCM requires a unique nonce for each encryption operation.
         - The nonce must be stored alongside the ciphertext for decryption.
     """
-    # Initialize AESGCM with the provided key
-    aesgcm = AESGCM(key)
+    # Reuse the AESGCM object (and its expanded key schedule) for this key
+    aesgcm = _aesgcm(key)
     # Generate a 12-byte nonce (96 bits) for AES-GCM, which is the recommended size
     nonce = os.urandom(12)
     # Encrypt the data; additional authenticated data (AAD) is set to None
     ciphertext = aesgcm.encrypt(nonce, data, None)
-    logging.info("Data encryption completed using AES-256-GCM.")
+    logging.debug("Data encryption completed using AES-256-GCM.")
     return nonce, ciphertext
 
 def decrypt_data(nonce, ciphertext, key):
@@ -98,11 +112,307 @@ def decrypt_data(nonce, ciphertext, key):
     Raises:
         Exception: If decryption fails (e.g., due to an invalid key or corrupted data).
     """
-    aesgcm = AESGCM(key)
-    plaintext = aesgcm.decrypt(nonce, ciphertext, None)
-    logging.info("Data decryption completed using AES-256-GCM.")
+    plaintext = _aesgcm(key).decrypt(nonce, ciphertext, None)
+    logging.debug("Data decryption completed using AES-256-GCM.")
     return plaintext
 
+@lru_cache(maxsize=16)
+def _aesgcm(key):
+    """Return a cached AESGCM instance for a key."""
+    return AESGCM(key)
+
+def _segment_nonce(prefix, index):
+    """12-byte nonce of a segment: the file's random 8-byte prefix followed by the segment index."""
+    return prefix + struct.pack(">I", index)
+
+def _segment_aad(header, index, final):
+    """Authenticate the header, the segment position and whether it is the last segment."""
+    return header + struct.pack(">Q?", index, final)
+
+def _iter_segments(src, size):
+    """Yield (index, chunk, final) for a readable stream cut into segments of the given size."""
+    index, chunk = 0, src.read(size)
+    while True:
+        following = src.read(size) if len(chunk) == size else b""
+        yield index, chunk, not following
+        if not following:
+            return
+        index, chunk = index + 1, following
+
+def _run_segments(function, segments, dst, workers):
+    """Apply function to (index, chunk, final) segments across a thread pool, writing results in order."""
+    workers = workers or os.cpu_count() or 1
+    window = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for segment in segments:
+            window.append(segment)
+            if len(window) >= workers * SEGMENTS_PER_WORKER:
+                for output in pool.map(lambda seg: function(*seg), window):
+                    dst.write(output)
+                window = []
+        for output in pool.map(lambda seg: function(*seg), window):
+            dst.write(output)
+
+def encrypt_stream(src, dst, key, segment_size=DEFAULT_SEGMENT_SIZE, workers=None):
+    """
+    Encrypt a binary stream into the segmented AES-GCM format.
+
+    The plaintext is split into segment_size segments, each encrypted independently with
+    a nonce derived from a random per-file prefix and the segment index. The index and a
+    last-segment flag are authenticated with every segment, so reordering, truncating or
+    splicing segments is detected on decryption. Segments are encrypted across a thread
+    pool (AES-GCM in cryptography releases the GIL) in bounded windows.
+
+    Args:
+        src: Readable binary file object.
+        dst: Writable binary file object.
+        key (bytes): A 32-byte AES-256-GCM key.
+        segment_size (int): Plaintext bytes per segment.
+        workers (int): Threads used for encryption (defaults to the CPU count).
+
+    Returns:
+        int: Number of plaintext bytes encrypted.
+    """
+    aesgcm = _aesgcm(key)
+    prefix = os.urandom(8)
+    header = _HEADER.pack(ENCRYPTED_MAGIC, segment_size, prefix)
+    dst.write(header)
+    total = 0
+
+    def encrypt_segment(index, chunk, final):
+        return aesgcm.encrypt(_segment_nonce(prefix, index), chunk, _segment_aad(header, index, final))
+
+    def counted(segments):
+        nonlocal total
+        for segment in segments:
+            total += len(segment[1])
+            yield segment
+
+    _run_segments(encrypt_segment, counted(_iter_segments(src, segment_size)), dst, workers)
+    return total
+
+def _read_header(src):
+    header = src.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE:
+        raise ValueError("Not an encrypted file: header is truncated")
+    magic, segment_size, prefix = _HEADER.unpack(header)
+    if magic != ENCRYPTED_MAGIC or segment_size <= 0:
+        raise ValueError("Not an encrypted file: unknown header")
+    return header, segment_size, prefix
+
+def decrypt_stream(src, dst, key, workers=None):
+    """
+    Decrypt a stream written by encrypt_stream.
+
+    Raises:
+        ValueError: If the stream does not start with a valid header.
+        cryptography.exceptions.InvalidTag: If any segment was modified, reordered or removed.
+
+    Returns:
+        int: Number of plaintext bytes written.
+    """
+    aesgcm = _aesgcm(key)
+    header, segment_size, prefix = _read_header(src)
+    total = 0
+
+    def decrypt_segment(index, chunk, final):
+        return aesgcm.decrypt(_segment_nonce(prefix, index), chunk, _segment_aad(header, index, final))
+
+    def counted(segments):
+        nonlocal total
+        for segment in segments:
+            total += max(len(segment[1]) - TAG_SIZE, 0)
+            yield segment
+
+    _run_segments(decrypt_segment, counted(_iter_segments(src, segment_size + TAG_SIZE)), dst, workers)
+    return total
+
+def _transform_file(function, src_path, dst_path, key, **kwargs):
+    # Write next to the destination and rename, so a failure never leaves a partial file behind.
+    tmp_path = dst_path + ".tmp"
+    try:
+        with open(src_path, "rb") as src, open(tmp_path, "wb") as dst:
+            total = function(src, dst, key, **kwargs)
+        os.replace(tmp_path, dst_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return total
+
+def encrypt_file(src_path, dst_path, key, segment_size=DEFAULT_SEGMENT_SIZE, workers=None):
+    """
+    Encrypt a file (e.g. a capture CSV or a Parquet cache) with encrypt_stream.
+
+    Returns:
+        int: Number of plaintext bytes encrypted.
+    """
+    total = _transform_file(encrypt_stream, src_path, dst_path, key, segment_size=segment_size, workers=workers)
+    logging.info("Encrypted %s to %s (%d bytes).", src_path, dst_path, total)
+    return total
+
+def decrypt_file(src_path, dst_path, key, workers=None):
+    """
+    Decrypt a file written by encrypt_file. Nothing is written if authentication fails.
+
+    Returns:
+        int: Number of plaintext bytes decrypted.
+    """
+    total = _transform_file(decrypt_stream, src_path, dst_path, key, workers=workers)
+    logging.info("Decrypted %s to %s (%d bytes).", src_path, dst_path, total)
+    return total
+
+class EncryptedFile(io.RawIOBase):
+    """
+    Read-only, seekable view of the plaintext of a file written by encrypt_file.
+
+    Only the segments covering the requested byte range are read and authenticated, so
+    readers that seek (Parquet, joblib) decrypt just the parts they use. The most
+    recently decrypted segment is kept to serve sequential small reads.
+
+    Args:
+        path (str): Encrypted file.
+        key (bytes): The 32-byte AES-256-GCM key.
+    """
+
+    def __init__(self, path, key):
+        super().__init__()
+        self._file = open(path, "rb")
+        self._aesgcm = _aesgcm(key)
+        self._header, self.segment_size, self._prefix = _read_header(self._file)
+        stored = os.fstat(self._file.fileno()).st_size - HEADER_SIZE
+        stride = self.segment_size + TAG_SIZE
+        self.n_segments = max(-(-stored // stride), 1)
+        self.size = stored - self.n_segments * TAG_SIZE
+        if self.size < 0:
+            raise ValueError("Encrypted file is truncated")
+        self._position = 0
+        self._cached = (None, b"")
+
+    def read_segment(self, index):
+        """Decrypt and return the plaintext of one segment."""
+        if self._cached[0] == index:
+            return self._cached[1]
+        if not 0 <= index < self.n_segments:
+            raise IndexError(f"Segment {index} out of range")
+        self._file.seek(HEADER_SIZE + index * (self.segment_size + TAG_SIZE))
+        chunk = self._file.read(self.segment_size + TAG_SIZE)
+        final = index == self.n_segments - 1
+        plaintext = self._aesgcm.decrypt(_segment_nonce(self._prefix, index), chunk,
+                                         _segment_aad(self._header, index, final))
+        self._cached = (index, plaintext)
+        return plaintext
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._position = offset
+        return offset
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self._position < self.size:
+            index, offset = divmod(self._position, self.segment_size)
+            segment = self.read_segment(index)
+            n = min(len(segment) - offset, len(view) - written)
+            view[written:written + n] = segment[offset:offset + n]
+            written += n
+            self._position += n
+        return written
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+class EncryptedWriter(io.RawIOBase):
+    """
+    Write-only file object that encrypts its input into the format of encrypt_stream.
+
+    Written bytes are buffered and each full segment is encrypted as soon as a byte of
+    the next one arrives, so the plaintext never reaches the disk. The last segment is
+    encrypted by close. Pass it to serializers that write to file objects (joblib.dump).
+
+    Args:
+        path (str): Encrypted file to create.
+        key (bytes): The 32-byte AES-256-GCM key.
+        segment_size (int): Plaintext bytes per segment.
+    """
+
+    def __init__(self, path, key, segment_size=DEFAULT_SEGMENT_SIZE):
+        super().__init__()
+        self._file = open(path, "wb")
+        self._aesgcm = _aesgcm(key)
+        self.segment_size = segment_size
+        self._prefix = os.urandom(8)
+        self._header = _HEADER.pack(ENCRYPTED_MAGIC, segment_size, self._prefix)
+        self._file.write(self._header)
+        self._buffer = bytearray()
+        self._index = 0
+        self._position = 0
+
+    def _encrypt_segment(self, chunk, final):
+        self._file.write(self._aesgcm.encrypt(_segment_nonce(self._prefix, self._index), bytes(chunk),
+                                              _segment_aad(self._header, self._index, final)))
+        self._index += 1
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        self._buffer += data
+        n = len(memoryview(data).cast("B"))
+        self._position += n
+        # A segment is known not to be the last one only once the next one has started.
+        while len(self._buffer) > self.segment_size:
+            self._encrypt_segment(self._buffer[:self.segment_size], final=False)
+            del self._buffer[:self.segment_size]
+        return n
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._encrypt_segment(self._buffer, final=True)
+                self._buffer = bytearray()
+            finally:
+                self._file.close()
+        super().close()
+
+def read_encrypted_parquet(path, key, columns=None):
+    """
+    Read columns of an encrypted Parquet file (e.g. an encrypted column cache).
+
+    Only the footer and the pages of the requested columns are decrypted.
+
+    Args:
+        path (str): Parquet file encrypted with encrypt_file.
+        key (bytes): The 32-byte AES-256-GCM key.
+        columns (list): Columns to read (all by default).
+
+    Returns:
+        pd.DataFrame: The requested columns.
+    """
+    import pyarrow.parquet as pq
+    with EncryptedFile(path, key) as f:
+        return pq.read_table(f, columns=columns).to_pandas()
+
 def apply_security_measures(app=None):
     """
     Apply multiple security measures.
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+from instrumentation import stage
+
+SNAPSHOT_VERSION = 1
+# Same parent folder as the model registry (model_registry.DEFAULT_REGISTRY_DIR).
+DEFAULT_SNAPSHOT_DIR = os.path.join('..', 'models', 'snapshot')
+MANIFEST_FILENAME = "manifest.json"
+MODEL_FILENAME = "model.joblib"
+COMPILED_DIRNAME = "compiled"
+FLOWS_FILENAME = "flows.parquet"
+# modeling.RANDOM_FOREST, repeated so that checking a snapshot does not import scikit-learn.
+DEFAULT_ENGINE = "random_forest"
+# A snapshot is always trained in full and served through DuckDB.
+SNAPSHOT_TRAINING_MODE = "full"
+SNAPSHOT_DASHBOARD_BACKEND = "duckdb"
+
+
+def _source_stats(paths):
+    """Size and modification time of the source files, used to detect a stale snapshot."""
+    return {os.path.abspath(p): [os.stat(p).st_size, os.stat(p).st_mtime_ns] for p in paths}
+
+
+def build_snapshot(training_set_path, testing_set_path, features_path, snapshot_dir=DEFAULT_SNAPSHOT_DIR,
+                   engine=None, registry=None, cv=0):
+    """
+    Offline build step: precompute everything the dashboard and /score need at startup.
+
+    Loads and types the training and testing sets, trains the model (or loads it from
+    the registry when nothing changed), and writes to snapshot_dir:
+        flows.parquet   the dashboard columns of the training set, queried through DuckDB
+        model.joblib    the model
+        compiled/       for a random forest, its flat node arrays (memory-mapped by /score)
+        manifest.json   filter options and bounds, the unfiltered figures, the feature
+                        schema and the size/mtime of the source files
+
+    A server started with create_snapshot_app then needs neither the CSVs nor pandas
+    parsing, model training or plotly to serve its first page.
+
+    Args:
+        training_set_path (str): Training set CSV.
+        testing_set_path (str): Testing set CSV.
+        features_path (str): Features CSV.
+        snapshot_dir (str): Output directory.
+        engine (str): Model engine (see modeling); defaults to the random forest.
+        registry (ModelRegistry): Registry used to reuse a previously trained model.
+        cv (int): Cross-validation folds (see train_predictive_model); 0 skips it, which
+                  keeps the build to a single fit.
+
+    Returns:
+        dict or None: The manifest, or None if the data could not be loaded or the
+                      model could not be trained.
+    """
+    import joblib
+    from schema import load_feature_schema, compact_dtypes
+    from column_cache import read_csv_cached
+    from modeling import train_predictive_model
+    from model_registry import ModelRegistry, save_compiled
+    from dashboard_store import CATEGORY_FILTERS, RANGE_FILTERS, resolve_filters
+    from duckdb_store import DuckDBStore
+
+    engine = engine or DEFAULT_ENGINE
+    try:
+        schema = load_feature_schema(features_path)
+        df_train = read_csv_cached(training_set_path, schema=schema)
+        df_test = read_csv_cached(testing_set_path, schema=schema)
+    except Exception as e:
+        logging.error("Error loading training or testing set: %s", e)
+        return None
+    df_train, _ = compact_dtypes(df_train, schema, inplace=True)
+
+    model = train_predictive_model(df_train, test_data=df_test, registry=registry or ModelRegistry(),
+                                   cv=cv, engine=engine)
+    if model is None:
+        logging.error("Model training failed; no snapshot written.")
+        return None
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    dashboard_columns = [col for col, _ in resolve_filters(CATEGORY_FILTERS + RANGE_FILTERS, df_train.columns)]
+    dashboard_columns += [col for col in ("sbytes",) if col in df_train.columns and col not in dashboard_columns]
+    flows_path = os.path.join(snapshot_dir, FLOWS_FILENAME)
+    df_train[dashboard_columns].reset_index(drop=True).to_parquet(flows_path + ".tmp", index=False)
+    os.replace(flows_path + ".tmp", flows_path)
+    model_path = os.path.join(snapshot_dir, MODEL_FILENAME)
+    joblib.dump(model, model_path + ".tmp")
+    os.replace(model_path + ".tmp", model_path)
+    compiled_path = os.path.join(snapshot_dir, COMPILED_DIRNAME)
+    shutil.rmtree(compiled_path, ignore_errors=True)
+    save_compiled(model, compiled_path)
+
+    store = DuckDBStore(flows_path)
+    figures = [json.loads(figure.to_json()) for figure in store.figures()]
+    manifest = {"version": SNAPSHOT_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "engine": engine,
+                "training_mode": SNAPSHOT_TRAINING_MODE, "dashboard_backend": SNAPSHOT_DASHBOARD_BACKEND,
+                "sources": _source_stats([training_set_path, testing_set_path, features_path]),
+                "schema": schema, "rows": len(df_train), "dashboard": store.metadata(), "figures": figures}
+    with open(os.path.join(snapshot_dir, MANIFEST_FILENAME + ".tmp"), "w") as f:
+        json.dump(manifest, f, default=str)
+    os.replace(os.path.join(snapshot_dir, MANIFEST_FILENAME + ".tmp"), os.path.join(snapshot_dir, MANIFEST_FILENAME))
+    logging.info("Startup snapshot written to %s (%d rows, %d dashboard columns).", snapshot_dir, len(df_train),
+                 len(dashboard_columns))
+    return manifest
+
+
+def load_snapshot(snapshot_dir=DEFAULT_SNAPSHOT_DIR, engine=None, training_mode=None, dashboard_backend=None):
+    """
+    Read the manifest of a startup snapshot.
+
+    A snapshot is stale when one of its source files still exists but has changed size
+    or modification time; source files that are absent (e.g. a deployment shipping only
+    the snapshot) are not checked. It is also not used when the requested model engine,
+    training mode or dashboard backend differs from the one it was built with.
+
+    Args:
+        snapshot_dir (str): Directory of the snapshot.
+        engine (str): Model engine wanted (MODEL_ENGINE); None means the default engine.
+        training_mode (str): Training mode wanted (TRAINING_MODE); None means "full".
+        dashboard_backend (str): Dashboard backend wanted (DASHBOARD_BACKEND); None
+                                 accepts the DuckDB backend of the snapshot.
+
+    Returns:
+        dict or None: The manifest, or None when there is no usable snapshot.
+    """
+    path = os.path.join(snapshot_dir, MANIFEST_FILENAME)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring unreadable startup snapshot %s: %s", path, e)
+        return None
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        logging.info("Startup snapshot %s has version %s; rebuild it.", path, manifest.get("version"))
+        return None
+    defaults = {"engine": DEFAULT_ENGINE, "training_mode": SNAPSHOT_TRAINING_MODE,
+                "dashboard_backend": SNAPSHOT_DASHBOARD_BACKEND}
+    requested = {"engine": engine, "training_mode": training_mode, "dashboard_backend": dashboard_backend}
+    for setting, default in defaults.items():
+        built, wanted = manifest.get(setting, default), requested[setting] or default
+        if built != wanted:
+            logging.warning("Startup snapshot %s was built with %s=%s but %s is requested; not using it.",
+                            path, setting, built, wanted)
+            return None
+    for source, recorded in manifest["sources"].items():
+        if os.path.exists(source) and _source_stats([source])[source] != recorded:
+            logging.info("Startup snapshot %s is stale (%s changed); rebuild it.", path, source)
+            return None
+    if not all(os.path.exists(os.path.join(snapshot_dir, name)) for name in (FLOWS_FILENAME, MODEL_FILENAME)):
+        logging.warning("Startup snapshot %s is incomplete.", path)
+        return None
+    return manifest
+
+
+def create_snapshot_app(manifest, snapshot_dir=DEFAULT_SNAPSHOT_DIR, live=None):
+    """
+    Build the dashboard (and /score) from a startup snapshot.
+
+    The dashboard queries flows.parquet through DuckDB with the precomputed filter
+    options and unfiltered figures, and the model is loaded on the first /score request,
+    so startup only imports Dash and DuckDB. A random forest is served from its compiled
+    node arrays, memory-mapped so that every serving process shares one copy.
+
+    Args:
+        manifest (dict): Result of load_snapshot.
+        snapshot_dir (str): Directory of the snapshot.
+        live (RollingWindowCounts): Optional live counters for the dashboard (see live_ingest).
+
+    Returns:
+        dash.Dash: The configured Dash application.
+    """
+    from dashboard import build_dashboard
+    from duckdb_store import DuckDBStore
+    from scoring import register_scoring_endpoint
+
+    with stage("startup", phase="dashboard"):
+        store = DuckDBStore(os.path.join(snapshot_dir, FLOWS_FILENAME), metadata=manifest["dashboard"],
+                            initial_figures=manifest["figures"])
+        app = build_dashboard(store=store, live=live)
+
+    def load_model():
+        compiled_path = os.path.join(snapshot_dir, COMPILED_DIRNAME)
+        if os.path.isdir(compiled_path):
+            from compiled_model import CompiledForest
+            return CompiledForest.load(compiled_path, mmap_mode='r')
+        import joblib
+        return joblib.load(os.path.join(snapshot_dir, MODEL_FILENAME))
+
+    register_scoring_endpoint(app.server, load_model, manifest["schema"])
+    logging.info("Serving startup snapshot %s (built %s, %d rows).", snapshot_dir, manifest["created"],
+                 manifest["rows"])
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the startup snapshot used by main.py.")
+    parser.add_argument("--train", default='../data/UNSW_NB15_training-set.csv')
+    parser.add_argument("--test", default='../data/UNSW_NB15_testing-set.csv')
+    parser.add_argument("--features", default='../data/NUSW-NB15_features.csv')
+    parser.add_argument("--output", default=DEFAULT_SNAPSHOT_DIR)
+    parser.add_argument("--engine", default=os.getenv("MODEL_ENGINE"))
+    parser.add_argument("--cv", type=int, default=int(os.getenv("MODEL_CV_FOLDS", "0")),
+                        help="Cross-validation folds (0 skips cross-validation)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if build_snapshot(args.train, args.test, args.features, args.output, engine=args.engine, cv=args.cv) is None:
+        raise SystemExit(1)
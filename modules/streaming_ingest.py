@@ -0,0 +1,244 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+from schema import (load_feature_schema, stable_dtypes, normalize_name, GROUND_TRUTH_SCHEMA,
+                    INTEGER_TYPES, NOMINAL, PORT_COLUMNS)
+from column_cache import read_csv_cached
+from join_keys import CompositeKeyIndex, join_on_index
+
+# A joined chunk is held alongside the raw chunk, its fingerprints and the forward-filled copy.
+CHUNK_EXPANSION = 4
+MIN_CHUNK_ROWS = 1000
+SAMPLE_ROWS = 1000
+
+
+def joined_arrow_schema(names, schema, df_gt, suffixes=("_x", "_y")):
+    """
+    Build the Parquet schema of the joined output before any chunk is read.
+
+    The main dataset columns get the types stable_dtypes gives them (strings for nominal
+    and port columns, int64 for integer/timestamp/binary, float64 otherwise), so a chunk in
+    which an integer column gains missing values or a text column is entirely empty still
+    matches. The ground truth table is loaded whole, so its columns keep their loaded dtypes.
+    Column order and suffixes follow join_on_index.
+    """
+    import pyarrow as pa
+    normalized = {normalize_name(name): kind for name, kind in schema.items()}
+    port_columns = {normalize_name(c) for c in PORT_COLUMNS}
+    overlap = set(names) & set(df_gt.columns)
+    fields = []
+    for name in names:
+        key = normalize_name(name)
+        kind = normalized.get(key)
+        if kind == NOMINAL or key in port_columns:
+            arrow_type = pa.string()
+        elif kind in INTEGER_TYPES:
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.float64()
+        fields.append(pa.field(f"{name}{suffixes[0]}" if name in overlap else name, arrow_type))
+    for name, dtype in df_gt.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_dtype(dtype):
+            arrow_type = pa.from_numpy_dtype(getattr(dtype, "numpy_dtype", dtype))
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(f"{name}{suffixes[1]}" if name in overlap else name, arrow_type))
+    return pa.schema(fields)
+
+
+class _ChunkWriter:
+    """
+    Append DataFrame chunks to a Parquet file (when the path ends in .parquet) or a CSV file.
+    Every Parquet chunk is cast to the schema given up front (see joined_arrow_schema).
+    """
+
+    def __init__(self, output_path, schema=None):
+        self.output_path = output_path
+        self.parquet = output_path.endswith(".parquet")
+        self.schema = schema
+        self._writer = None
+        self._header = True
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.output_path, mode="a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class _FingerprintSet:
+    """
+    Set of 64-bit row fingerprints kept as one sorted uint64 array (8 bytes per row).
+
+    New fingerprints are merged into the sorted array in one linear pass, so adding a
+    chunk costs O(n + k log k) rather than a full re-sort. If max_bytes is given, adding
+    fingerprints that would grow the set past it raises MemoryError.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._seen = np.empty(0, dtype=np.uint64)
+        self.max_bytes = max_bytes
+
+    @property
+    def nbytes(self):
+        return self._seen.nbytes
+
+    def add_new(self, fingerprints):
+        """
+        Return a mask of the fingerprints not seen before (keeping only the first of any
+        repeats within the batch) and add them to the set.
+        """
+        fresh = ~pd.Index(fingerprints).duplicated()
+        if len(self._seen):
+            pos = np.searchsorted(self._seen, fingerprints)
+            pos[pos == len(self._seen)] = 0
+            fresh &= self._seen[pos] != fingerprints
+        if fresh.any():
+            new = np.sort(fingerprints[fresh])
+            if self.max_bytes is not None and self._seen.nbytes + new.nbytes > self.max_bytes:
+                raise MemoryError(
+                    f"Duplicate detection needs more than {self.max_bytes / 2**20:.1f} MB for row "
+                    "fingerprints; raise memory_budget_mb.")
+            self._seen = np.insert(self._seen, np.searchsorted(self._seen, new), new)
+        return fresh
+
+
+def _forward_fill(chunk, carry):
+    """
+    Forward-fill a chunk, filling its leading gaps from the last values of the previous chunks.
+
+    Returns:
+        tuple: (filled chunk, carry dict for the next chunk)
+    """
+    chunk = chunk.ffill()
+    if carry:
+        chunk = chunk.fillna(carry)
+    if len(chunk):
+        last = chunk.iloc[-1]
+        carry = dict(carry)
+        carry.update(last[last.notna()].to_dict())
+    return chunk, carry
+
+
+def stream_and_merge_data(main_filepath, gt_filepath, features_filepath, output_path,
+                          memory_budget_mb=512):
+    """
+    Out-of-core version of load_and_merge_data for captures that do not fit in memory.
+
+    The ground truth table is loaded once and indexed on the composite key. The main
+    dataset is then read in bounded chunks. Each chunk is probed against the index,
+    deduplicated against a running set of row fingerprints, forward-filled using the
+    values carried over from earlier chunks and appended to output_path. The chunk
+    size is derived from the memory budget and shrinks as the fingerprint set grows.
+
+    Differences from load_and_merge_data:
+      - Chunks use fixed dtypes (see schema.stable_dtypes), so non-numeric values in
+        numeric columns become missing and are forward-filled.
+      - Duplicates are detected with 64-bit row hashes, not by comparing values.
+      - The fingerprint set costs 8 bytes per distinct output row, which is the only
+        state that grows with the size of the input. It may use at most half of what
+        the budget leaves after the ground truth table, but never less than a quarter
+        of the budget (the case once the ground truth takes more than half of it).
+        Merging new fingerprints in briefly needs a second copy. Inputs with more distinct rows than that fail with an error
+        asking for a larger memory_budget_mb.
+      - The output has a fixed schema derived from the feature schema, and a partial
+        output file is removed if the merge fails. When no row matches, an empty file
+        with that schema (or CSV header) is written.
+
+    Args:
+        main_filepath (str): Path to the main dataset CSV file.
+        gt_filepath (str): Path to the ground truth CSV file.
+        features_filepath (str): Path to the features CSV file containing column metadata.
+        output_path (str): Destination file (.parquet, otherwise CSV).
+        memory_budget_mb (int): Approximate peak memory to stay under.
+
+    Returns:
+        dict: Summary with the number of chunks, rows read and rows written, or
+              an empty dict on failure.
+    """
+    for path, desc in [(main_filepath, "Main data file"), (gt_filepath, "Ground truth file"),
+                       (features_filepath, "Features file")]:
+        if not os.path.exists(path):
+            logging.error(f"{desc} {path} not found.")
+            return {}
+
+    try:
+        schema = load_feature_schema(features_filepath)
+        df_gt = read_csv_cached(gt_filepath, schema=GROUND_TRUTH_SCHEMA)
+        index = CompositeKeyIndex(df_gt)
+    except Exception as e:
+        logging.error("Error preparing ground truth index: %s", e)
+        return {}
+
+    names = list(schema)
+    budget = memory_budget_mb * 1024 * 1024
+    resident = df_gt.memory_usage(index=False, deep=True).sum()
+    if resident >= budget:
+        logging.warning("Ground truth table alone (%.1f MB) exceeds the memory budget.", resident / 2**20)
+
+    try:
+        sample = stable_dtypes(pd.read_csv(main_filepath, header=None, names=names, nrows=SAMPLE_ROWS), schema)
+        row_bytes = (sample.memory_usage(index=False, deep=True).sum() / max(len(sample), 1)
+                     + resident / max(len(df_gt), 1))
+        arrow_schema = joined_arrow_schema(names, schema, df_gt) if output_path.endswith(".parquet") else None
+    except Exception as e:
+        logging.error("Error sampling the main dataset: %s", e)
+        return {}
+
+    seen = _FingerprintSet(max_bytes=max(budget - resident, budget // 2) // 2)
+    writer = _ChunkWriter(output_path, schema=arrow_schema)
+    carry = {}
+    summary = {"chunks": 0, "rows_read": 0, "rows_written": 0, "output_path": output_path}
+    logging.info("Streaming %s into %s with a %d MB memory budget", main_filepath, output_path, memory_budget_mb)
+    try:
+        reader = pd.read_csv(main_filepath, header=None, names=names, iterator=True, low_memory=False)
+        while True:
+            available = budget - resident - seen.nbytes
+            rows = max(MIN_CHUNK_ROWS, int(available / (row_bytes * CHUNK_EXPANSION)))
+            try:
+                chunk = reader.get_chunk(rows)
+            except StopIteration:
+                break
+            stable_dtypes(chunk, schema)
+            left, right = index.probe(chunk)
+            merged = join_on_index(chunk, df_gt, left, right)
+            fingerprints = pd.util.hash_pandas_object(merged, index=False).to_numpy()
+            merged = merged[seen.add_new(fingerprints)]
+            merged, carry = _forward_fill(merged, carry)
+            if len(merged):
+                writer.write(merged)
+            summary["chunks"] += 1
+            summary["rows_read"] += len(chunk)
+            summary["rows_written"] += len(merged)
+            logging.info("Chunk %d: read %d rows, wrote %d rows", summary["chunks"], len(chunk), len(merged))
+        reader.close()
+        if not summary["rows_written"]:
+            # Callers open output_path, so write it even when nothing matched.
+            empty = np.empty(0, dtype=np.int64)
+            writer.write(join_on_index(sample.iloc[:0], df_gt, empty, empty))
+    except Exception as e:
+        logging.error("Error streaming main dataset: %s", e)
+        writer.close()
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return {}
+    writer.close()
+
+    logging.info("Streaming merge complete: %d rows read, %d rows written to %s",
+                 summary["rows_read"], summary["rows_written"], output_path)
+    return summary
@@ -0,0 +1,262 @@
+import math
+import logging
+from collections import Counter
+import numpy as np
+import pandas as pd
+from schema import lookup_type, NOMINAL
+
+# Relative accuracy of the quantile sketches: estimates are within 1% of the true value.
+SKETCH_ACCURACY = 0.01
+# Magnitudes below this fall in the zero bucket of a sketch.
+SKETCH_MIN_VALUE = 1e-9
+REPORT_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative error guarantees (DDSketch-style).
+
+    Values are counted in logarithmically sized buckets, bucket i covering
+    (gamma^(i-1), gamma^i] with gamma = (1 + accuracy) / (1 - accuracy), so any
+    quantile estimate is within the relative accuracy of the true value. Positive
+    and negative values use separate bucket stores and tiny magnitudes share a zero
+    bucket. Two sketches are merged by adding their bucket counts.
+
+    Args:
+        accuracy (float): Relative accuracy of the quantile estimates.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zero = 0
+        self.count = 0
+
+    def _add_buckets(self, store, magnitudes):
+        indexes, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                    return_counts=True)
+        store.update(dict(zip(indexes.tolist(), counts.tolist())))
+
+    def update(self, values):
+        """Add an array of finite values."""
+        values = np.asarray(values, dtype=np.float64)
+        large = np.abs(values) > SKETCH_MIN_VALUE
+        self._add_buckets(self.positive, values[large & (values > 0)])
+        self._add_buckets(self.negative, -values[large & (values < 0)])
+        self.zero += int((~large).sum())
+        self.count += len(values)
+
+    def merge(self, other):
+        """Add the counts of another sketch with the same accuracy."""
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def _value(self, index):
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1); None for an empty sketch."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self):
+        return {"accuracy": self.accuracy, "zero": self.zero, "count": self.count,
+                "positive": sorted(self.positive.items()), "negative": sorted(self.negative.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["accuracy"])
+        sketch.zero, sketch.count = data["zero"], data["count"]
+        sketch.positive = Counter({int(i): c for i, c in data["positive"]})
+        sketch.negative = Counter({int(i): c for i, c in data["negative"]})
+        return sketch
+
+
+class StreamingStats:
+    """
+    Column statistics computed in one pass over a stream of DataFrame chunks.
+
+    Numeric columns keep count, missing count, mean, sum of squared deviations, min,
+    max and a QuantileSketch; categorical columns keep exact value frequencies. Every
+    part is mergeable (moments with Chan's parallel formulas), so chunks or whole files
+    can be summarized independently, e.g. in worker processes, and combined.
+
+    Args:
+        schema (dict): Optional schema from load_feature_schema. Nominal columns are
+                       treated as categorical; without a schema, non-numeric dtypes are.
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema
+        self.rows = 0
+        self.numeric = {}
+        self.categorical = {}
+
+    def _is_categorical(self, df, column):
+        kind = lookup_type(self.schema, column) if self.schema else None
+        return kind == NOMINAL or not pd.api.types.is_numeric_dtype(df[column])
+
+    def update(self, df):
+        """Fold one chunk into the statistics."""
+        self.rows += len(df)
+        categorical = [c for c in df.columns if self._is_categorical(df, c)]
+        numeric = [c for c in df.columns if c not in categorical]
+        if numeric:
+            X = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+            finite = np.isfinite(X)
+            counts = finite.sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                masked = np.where(finite, X, np.nan)
+                means = np.nansum(masked, axis=0) / np.maximum(counts, 1)
+                m2 = np.nansum((masked - means) ** 2, axis=0)
+            for i, col in enumerate(numeric):
+                n = int(counts[i])
+                values = X[finite[:, i], i]
+                chunk = {"count": n, "missing": len(df) - n, "mean": float(means[i]), "m2": float(m2[i]),
+                         "min": float(values.min()) if n else None, "max": float(values.max()) if n else None,
+                         "sketch": QuantileSketch()}
+                chunk["sketch"].update(values)
+                self._merge_numeric(col, chunk)
+        for col in categorical:
+            series = df[col]
+            counts = Counter({str(k): int(v) for k, v in series.value_counts(dropna=True).items()})
+            state = self.categorical.setdefault(col, {"count": 0, "missing": 0, "frequencies": Counter()})
+            state["frequencies"].update(counts)
+            state["count"] += int(series.notna().sum())
+            state["missing"] += int(series.isna().sum())
+        return self
+
+    def _merge_numeric(self, col, other):
+        state = self.numeric.get(col)
+        if state is None:
+            self.numeric[col] = other
+            return
+        n = state["count"] + other["count"]
+        if other["count"]:
+            delta = other["mean"] - state["mean"]
+            state["mean"] += delta * other["count"] / n
+            state["m2"] += other["m2"] + delta ** 2 * state["count"] * other["count"] / n
+            state["min"] = other["min"] if state["min"] is None else min(state["min"], other["min"])
+            state["max"] = other["max"] if state["max"] is None else max(state["max"], other["max"])
+        state["count"] = n
+        state["missing"] += other["missing"]
+        state["sketch"].merge(other["sketch"])
+
+    def merge(self, other):
+        """Fold the statistics of another StreamingStats into this one."""
+        self.rows += other.rows
+        for col, state in other.numeric.items():
+            self._merge_numeric(col, dict(state, sketch=QuantileSketch().merge(state["sketch"])))
+        for col, state in other.categorical.items():
+            mine = self.categorical.setdefault(col, {"count": 0, "missing": 0, "frequencies": Counter()})
+            mine["frequencies"].update(state["frequencies"])
+            mine["count"] += state["count"]
+            mine["missing"] += state["missing"]
+        return self
+
+    def summary(self, quantiles=(0.25, 0.5, 0.75)):
+        """Return a describe()-like DataFrame of the numeric columns (sample std, sketch quantiles)."""
+        rows = {}
+        for col, s in self.numeric.items():
+            std = math.sqrt(s["m2"] / (s["count"] - 1)) if s["count"] > 1 else float("nan")
+            row = {"count": s["count"], "mean": s["mean"] if s["count"] else float("nan"), "std": std, "min": s["min"]}
+            row.update({f"{q:.0%}": s["sketch"].quantile(q) for q in quantiles})
+            row["max"] = s["max"]
+            rows[col] = row
+        return pd.DataFrame(rows)
+
+    def to_dict(self):
+        """Machine-readable report, including the mergeable sketch state."""
+        numeric = {}
+        for col, s in self.numeric.items():
+            std = math.sqrt(s["m2"] / (s["count"] - 1)) if s["count"] > 1 else None
+            numeric[col] = {"count": s["count"], "missing": s["missing"], "mean": s["mean"] if s["count"] else None,
+                            "std": std, "m2": s["m2"], "min": s["min"], "max": s["max"],
+                            "quantiles": {str(q): s["sketch"].quantile(q) for q in REPORT_QUANTILES},
+                            "sketch": s["sketch"].to_dict()}
+        categorical = {col: {"count": s["count"], "missing": s["missing"], "distinct": len(s["frequencies"]),
+                             "frequencies": dict(s["frequencies"].most_common())}
+                       for col, s in self.categorical.items()}
+        return {"rows": self.rows, "numeric": numeric, "categorical": categorical}
+
+    @classmethod
+    def from_dict(cls, data, schema=None):
+        stats = cls(schema)
+        stats.rows = data["rows"]
+        for col, s in data["numeric"].items():
+            stats.numeric[col] = {"count": s["count"], "missing": s["missing"], "mean": s["mean"] or 0.0,
+                                  "m2": s["m2"], "min": s["min"], "max": s["max"],
+                                  "sketch": QuantileSketch.from_dict(s["sketch"])}
+        for col, s in data["categorical"].items():
+            stats.categorical[col] = {"count": s["count"], "missing": s["missing"],
+                                      "frequencies": Counter(s["frequencies"])}
+        return stats
+
+
+def _schema_dtypes(columns, schema):
+    """
+    Split the columns described by the schema into those read as strings (nominal) and
+    those converted to float64 (every other type).
+    """
+    nominal, numeric = [], []
+    for col in columns:
+        kind = lookup_type(schema, col)
+        if kind == NOMINAL:
+            nominal.append(col)
+        elif kind is not None:
+            numeric.append(col)
+    return nominal, numeric
+
+
+def stats_for_file(filepath, schema=None, chunk_rows=100_000, **read_kwargs):
+    """
+    Compute StreamingStats for one CSV file, reading it chunk_rows rows at a time.
+
+    With a schema, every chunk gets the same dtypes: nominal columns are read as strings
+    (dtype= on read_csv) and the other schema columns are converted to float64, with
+    values that are not numbers counted as missing. A column therefore never has its
+    statistics split between the numeric and categorical summaries.
+
+    Args:
+        filepath (str): CSV file.
+        schema (dict): Optional schema used to type the chunks and pick categorical columns.
+        chunk_rows (int): Rows per chunk.
+        **read_kwargs: Extra keyword arguments for pd.read_csv (e.g. header, names).
+
+    Returns:
+        StreamingStats: Statistics of the file.
+    """
+    stats = StreamingStats(schema)
+    numeric = []
+    if schema:
+        columns = pd.read_csv(filepath, nrows=0, **read_kwargs).columns
+        nominal, numeric = _schema_dtypes(columns, schema)
+        read_kwargs["dtype"] = dict({col: str for col in nominal}, **(read_kwargs.get("dtype") or {}))
+    with pd.read_csv(filepath, chunksize=chunk_rows, low_memory=False, **read_kwargs) as reader:
+        for chunk in reader:
+            for col in numeric:
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce").astype("float64")
+            stats.update(chunk)
+    logging.info("Summarized %s: %d rows, %d numeric and %d categorical columns.", filepath, stats.rows,
+                 len(stats.numeric), len(stats.categorical))
+    return stats
@@ -0,0 +1,62 @@
+"""
+WSGI entry point serving the dashboard from the columnar cache through DuckDB.
+
+Run from the modules directory, e.g.:
+    gunicorn -w 16 -b 0.0.0.0:8050 wsgi:server
+
+Every worker queries the Parquet cache of the training set on disk, so adding workers
+does not add another in-memory copy of the dataset. The cache is built on first use
+(see column_cache.ensure_cache).
+
+When MODEL_KEY names a model in the registry (see model_registry), it is served on
+POST /score (see scoring). A random forest is served from its compiled node arrays,
+memory-mapped so that all workers share one copy; other models are loaded by each worker.
+
+With PIPELINE_METRICS=1, stage and callback timings are exposed on GET /metrics
+(see instrumentation); every worker reports its own.
+"""
+import os
+import logging
+from schema import load_feature_schema
+from column_cache import ensure_cache
+from dashboard import build_dashboard
+from duckdb_store import DuckDBStore
+from model_registry import ModelRegistry
+from scoring import register_scoring_endpoint
+from instrumentation import register_metrics_endpoint
+
+TRAINING_SET_PATH = '../data/UNSW_NB15_training-set.csv'
+FEATURES_PATH = '../data/NUSW-NB15_features.csv'
+
+
+def create_app(training_set_path=TRAINING_SET_PATH, features_path=FEATURES_PATH):
+    """
+    Build the DuckDB-backed dashboard.
+
+    Returns:
+        dash.Dash: The configured Dash application.
+    """
+    schema = load_feature_schema(features_path)
+    cache_path = ensure_cache(training_set_path, schema=schema)
+    if cache_path is None:
+        raise RuntimeError("Columnar cache for the training set could not be built (is pyarrow installed?).")
+    logging.info("Serving dashboard from %s", cache_path)
+    dash_app = build_dashboard(store=DuckDBStore(cache_path))
+
+    model_key = os.getenv("MODEL_KEY")
+    if model_key:
+        registry = ModelRegistry()
+        model = registry.load_compiled(model_key, mmap_mode='r')
+        if model is None:
+            saved = registry.load(model_key)
+            model = saved[0] if saved is not None else None
+        if model is None:
+            logging.error("Model %s not found in the registry; /score is disabled.", model_key)
+        else:
+            register_scoring_endpoint(dash_app.server, model, schema)
+    register_metrics_endpoint(dash_app.server)
+    return dash_app
+
+
+app = create_app()
+server = app.server